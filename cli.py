@@ -3,6 +3,9 @@
 import argparse
 import subprocess
 import sys
+from pathlib import Path
+
+BENCHMARKS_DIR = Path('src/dashboard/benchmarks')
 
 def lock():
     command = 'uv pip compile requirements.in --universal --output-file requirements.txt'.split(" ")
@@ -24,6 +27,23 @@ def preview():
     """Run the dashboard preview"""
     subprocess.run([sys.executable, 'src/dashboard/run.py'], check=True)
 
+def refresh(retry_failed=False):
+    """Run an incremental crawl, fetching only new or stale ementas"""
+    if retry_failed:
+        # Only re-fetch the pages recorded in the failed-page ledger
+        command = ['scrapy', 'retry_failed']
+    else:
+        command = ['scrapy', 'crawl', 'janus_disciplinas', '-a', 'incremental=1']
+    subprocess.run(command, check=True, cwd='src/scraper')
+
+def pipeline(args):
+    """Build the stale dashboard artifacts, see src/dashboard/pipeline.py"""
+    subprocess.run([sys.executable, 'src/dashboard/pipeline.py', *args], check=True)
+
+def bench(name, args):
+    """Run one of the dashboard benchmarks in src/dashboard/benchmarks"""
+    subprocess.run([sys.executable, BENCHMARKS_DIR / f'bench_{name}.py', *args], check=True)
+
 def main():
     parser = argparse.ArgumentParser(description='CLI tool for viz-disciplinas-usp project management')
     subparsers = parser.add_subparsers(dest='command', help='Available commands')
@@ -32,6 +52,21 @@ def main():
     subparsers.add_parser('lock-dev', help='Compile requirements-dev.in to requirements-dev.txt')
     subparsers.add_parser('lock-all', help='Run both lock and lock-dev commands')
     subparsers.add_parser('preview', help='Run the dashboard preview')
+    refresh_parser = subparsers.add_parser('refresh', help='Run an incremental crawl of the scraped data')
+    refresh_parser.add_argument(
+        '--retry-failed',
+        action='store_true',
+        help='Only re-fetch pages that failed or came back incomplete in the last crawl'
+    )
+    pipeline_parser = subparsers.add_parser('pipeline', help='Build the stale dashboard artifacts')
+    pipeline_parser.add_argument('args', nargs=argparse.REMAINDER, help='Arguments passed to the pipeline (--force, --dry-run)')
+    bench_parser = subparsers.add_parser('bench', help='Run a dashboard benchmark')
+    bench_parser.add_argument(
+        'name',
+        choices=sorted(path.stem.removeprefix('bench_') for path in BENCHMARKS_DIR.glob('bench_*.py')),
+        help='Benchmark to run'
+    )
+    bench_parser.add_argument('args', nargs=argparse.REMAINDER, help='Arguments passed to the benchmark')
 
     args = parser.parse_args()
 
@@ -39,10 +74,17 @@ def main():
         'lock': lock,
         'lock-dev': lock_dev,
         'lock-all': lock_all,
-        'preview': preview
+        'preview': preview,
+        'refresh': refresh
     }
 
-    if args.command in commands:
+    if args.command == 'refresh':
+        refresh(retry_failed=args.retry_failed)
+    elif args.command == 'pipeline':
+        pipeline(args.args)
+    elif args.command == 'bench':
+        bench(args.name, args.args)
+    elif args.command in commands:
         commands[args.command]()
     else:
         parser.print_help()
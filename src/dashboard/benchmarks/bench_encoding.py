@@ -0,0 +1,104 @@
+"""
+Throughput of the CPU encoder per configuration.
+
+Encodes the ementa texts of the preprocessed dataframe (or synthetic texts of varied
+length if it doesn't exist) with every combination of backend, batch size and number
+of processes, plus a baseline of a plain `SentenceTransformer.encode` call. Reports
+model load time, texts/sec and the peak resident memory of the encoding (of this
+process only, the memory of an encode pool's workers isn't included).
+
+    python cli.py bench encoding --backend torch onnx onnx-int8 --batch-size 32 64
+"""
+
+import argparse
+import itertools
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from profiling import profiled
+from transformer.encoding import BACKENDS, CpuEncoder
+from transformer.normalize import TextNormalizer
+from utils.config.model import MODEL_EMBEDDING, TEXT_COL
+from utils.config.path import onnx_export_dir, preprocessed_data_path
+from utils.data.artifacts import read_artifact
+
+
+def load_texts(n_texts: int, seed: int = 0) -> list[str]:
+    """Normalized ementa texts, as `DataEmbedder` gives them to the model."""
+    if preprocessed_data_path.exists():
+        df = read_artifact(preprocessed_data_path, TEXT_COL)
+        texts = df[TEXT_COL].fillna('').agg(' '.join, axis=1).tolist()
+    else:
+        rng = np.random.default_rng(seed)
+        words = [f'palavra{i}' for i in range(2000)]
+        texts = [
+            ' '.join(rng.choice(words, rng.integers(5, 400)))
+            for _ in range(n_texts)
+        ]
+    texts = (texts * (n_texts // max(len(texts), 1) + 1))[:n_texts]
+    return TextNormalizer().transform(texts)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--texts', type=int, default=2000, help='texts to encode (default: 2000)')
+    parser.add_argument(
+        '--backend', nargs='+', default=['torch'], choices=BACKENDS,
+        help='backends to compare (default: torch)',
+    )
+    parser.add_argument(
+        '--batch-size', type=int, nargs='+', default=[32, 64, 128],
+        help='batch sizes to compare (default: 32 64 128)',
+    )
+    parser.add_argument(
+        '--processes', type=int, nargs='+', default=[1],
+        help='encode pool sizes to compare (default: 1)',
+    )
+    args = parser.parse_args()
+
+    texts = load_texts(args.texts)
+    print(f"{len(texts)} texts, model {MODEL_EMBEDDING}")
+    print(f"{'config':<36}  {'load (s)':>8}  {'texts/s':>8}  {'peak RSS (MB)':>13}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        export_dir = onnx_export_dir if onnx_export_dir.parent.exists() else Path(tmp_dir)
+
+        # baseline: the previous DataEmbedder behaviour
+        with profiled() as load:
+            encoder = CpuEncoder(MODEL_EMBEDDING)
+            model = encoder.model
+        with profiled() as run:
+            model.encode(texts, batch_size=32)
+        print(
+            f"{'plain encode, batch 32':<36}  {load.wall_secs:>8.1f}  "
+            f"{len(texts) / run.wall_secs:>8.1f}  {run.peak_rss_bytes / 2**20:>13.0f}"
+        )
+
+        for backend, batch_size, processes in itertools.product(
+            args.backend, args.batch_size, args.processes
+        ):
+            with profiled() as load:
+                encoder = CpuEncoder(
+                    MODEL_EMBEDDING,
+                    batch_size=batch_size,
+                    processes=processes,
+                    backend=backend,
+                    export_dir=export_dir,
+                )
+                encoder.model
+            with profiled() as run:
+                encoder.encode(texts)
+            name = f'{backend}, batch {batch_size}, {processes} proc'
+            print(
+                f"{name:<36}  {load.wall_secs:>8.1f}  "
+                f"{len(texts) / run.wall_secs:>8.1f}  {run.peak_rss_bytes / 2**20:>13.0f}"
+            )
+
+
+if __name__ == '__main__':
+    main()
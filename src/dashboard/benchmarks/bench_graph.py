@@ -0,0 +1,131 @@
+"""
+Size, load time and memory of the graph artifacts: GraphML versus CSR.
+
+Builds k-NN graphs of synthetic embeddings with the dashboard node attributes (label,
+comunidade, is_mandatory, institute, type, x, y), writes each one as GraphML, as the
+pipeline did before, and as a CSR graph artifact (`utils/data/csr_graph.py`), then
+reports the artifact size, the time to load it and the memory of the loaded graph
+(allocations traced with `tracemalloc` for NetworkX; `CsrGraph.memory_usage` for the
+CSR graph, which counts the memory-mapped adjacency although it lives in the page cache,
+shared by every process that maps it). Also times the neighbour lookups the dashboard
+does on each rerun, and checks that the GraphML graph, converted with
+`CsrGraph.from_networkx`, equals the CSR artifact.
+
+    python cli.py bench graph --rows 2000 10000 30000
+"""
+
+import argparse
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+from time import perf_counter
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bench_knn import synthetic_embeddings
+from transformer.graph import KNNGraphBuilder
+from utils.data.csr_graph import CsrGraph
+
+
+def synthetic_graph(n_rows: int, dim: int, k: int) -> CsrGraph:
+    rng = np.random.default_rng(0)
+    node_ids = [f'SCC{i}' for i in range(n_rows)]
+    builder = KNNGraphBuilder(synthetic_embeddings(n_rows, dim), node_ids, node_ids, k=k)
+    nodes = pd.DataFrame({
+        'id': node_ids,
+        'label': [f'Disciplina {i}' for i in range(n_rows)],
+        'comunidade': rng.integers(0, 40, n_rows),
+        'is_mandatory': rng.random(n_rows) < 0.2,
+        'institute': 'Instituto de Ciências Matemáticas e de Computação',
+        'type': 'disciplina',
+        'x': rng.random(n_rows),
+        'y': rng.random(n_rows),
+    })
+    return CsrGraph(builder.adjacency, nodes)
+
+
+def measure(load):
+    """Seconds to run `load` and bytes still allocated by its result (Python allocator only)."""
+    tracemalloc.start()
+    start = perf_counter()
+    graph = load()
+    elapsed = perf_counter() - start
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return graph, elapsed, allocated
+
+
+def lookup_time(neighbors, node_ids: list[str]) -> float:
+    start = perf_counter()
+    for node_id in node_ids:
+        neighbors(node_id)
+    return (perf_counter() - start) / len(node_ids)
+
+
+def check_round_trip(graphml: nx.Graph, csr: CsrGraph) -> None:
+    """Raise if the GraphML graph and the CSR artifact differ in nodes, attributes or edges."""
+    converted = CsrGraph.from_networkx(graphml)
+    if not np.array_equal(converted.ids, csr.ids):
+        raise AssertionError('GraphML and CSR node ids differ')
+    pd.testing.assert_frame_equal(
+        converted.nodes.reset_index(drop=True),
+        csr.nodes.reset_index(drop=True)[converted.nodes.columns],
+        check_dtype=False,
+    )
+    if (converted.adjacency != csr.adjacency).nnz:
+        raise AssertionError('GraphML and CSR edges differ')
+
+
+def size(path: Path) -> int:
+    return sum(file.stat().st_size for file in path.rglob('*')) if path.is_dir() else path.stat().st_size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        '--rows', type=int, nargs='+', default=[2000, 10_000, 30_000],
+        help='catalogue sizes (default: 2000 10000 30000)',
+    )
+    parser.add_argument('--dim', type=int, default=64, help='embedding dimension (default: 64)')
+    parser.add_argument('-k', type=int, default=5, help='neighbours per node (default: 5)')
+    args = parser.parse_args()
+
+    print(
+        f"{'rows':>7}  {'format':<7}  {'size (MB)':>9}  {'load (s)':>8}  "
+        f"{'memory (MB)':>11}  {'neighbors (us)':>14}"
+    )
+    for n_rows in args.rows:
+        graph = synthetic_graph(n_rows, args.dim, args.k)
+        sample = graph.ids[:: max(n_rows // 500, 1)].tolist()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            graphml_path, csr_path = Path(tmp) / 'grafo.graphml', Path(tmp) / 'grafo'
+            nx.write_graphml(graph.to_networkx(), graphml_path)
+            graph.write(csr_path)
+
+            graphml, elapsed, allocated = measure(lambda: nx.read_graphml(graphml_path))
+            lookup = lookup_time(lambda node_id: list(graphml.neighbors(node_id)), sample)
+            print(
+                f"{n_rows:>7}  {'graphml':<7}  {size(graphml_path) / 2**20:>9.1f}  {elapsed:>8.3f}  "
+                f"{allocated / 2**20:>11.1f}  {lookup * 1e6:>14.1f}"
+            )
+
+            loaded, elapsed, _ = measure(lambda: CsrGraph.read(csr_path))
+            allocated = loaded.memory_usage()
+            # the id -> row index is built on the first lookup, as in the dashboard
+            lookup = lookup_time(loaded.neighbors, sample)
+            print(
+                f"{'':>7}  {'csr':<7}  {size(csr_path) / 2**20:>9.1f}  {elapsed:>8.3f}  "
+                f"{allocated / 2**20:>11.1f}  {lookup * 1e6:>14.1f}"
+            )
+            check_round_trip(graphml, loaded)
+            del loaded, graphml
+
+
+if __name__ == '__main__':
+    main()
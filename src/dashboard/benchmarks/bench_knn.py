@@ -0,0 +1,105 @@
+"""
+Recall and timing of the kNN graph engines at several catalogue sizes.
+
+Compares the previous `KNNGraphBuilder` (brute-force `NearestNeighbors` over the whole
+matrix plus one `add_edge` call per neighbour) with the blocked dot-product engine
+and, if `pynndescent` is installed, the approximate NNDescent index. Reports the time
+of the neighbour search, the total time of search plus graph construction, the peak
+resident memory and the recall@k against the brute-force neighbours.
+
+    python cli.py bench knn --rows 2000 10000 30000
+"""
+
+import argparse
+import importlib.util
+import sys
+from pathlib import Path
+
+import networkx as nx
+import numpy as np
+from sklearn.neighbors import NearestNeighbors
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from profiling import profiled
+from transformer.graph import KNNGraphBuilder
+from transformer.knn import nearest_neighbors
+
+
+def synthetic_embeddings(n_rows: int, dim: int, seed: int = 0) -> np.ndarray:
+    """Clustered unit vectors, like sentence embeddings of related ementas."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(n_rows // 50, 1), dim))
+    vectors = centers[rng.integers(0, len(centers), n_rows)] + 0.5 * rng.normal(size=(n_rows, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def legacy_neighbors(embeddings: np.ndarray, k: int) -> np.ndarray:
+    nn = NearestNeighbors(n_neighbors=k + 1, metric='cosine', algorithm='brute')
+    nn.fit(embeddings)
+    return nn.kneighbors(embeddings, return_distance=False)
+
+
+def legacy_graph(indices: np.ndarray, node_ids: list[str], k: int) -> nx.Graph:
+    graph = nx.Graph()
+    for i, node_id in enumerate(node_ids):
+        graph.add_node(node_id, label=node_id)
+    for i, neighbors in enumerate(indices):
+        for j in range(1, k + 1):
+            graph.add_edge(node_ids[i], node_ids[neighbors[j]])
+    return graph
+
+
+def recall(indices: np.ndarray, reference: np.ndarray) -> float:
+    hits = sum(len(set(row) & set(ref)) for row, ref in zip(indices.tolist(), reference.tolist()))
+    return hits / reference.size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        '--rows', type=int, nargs='+', default=[2000, 10_000, 30_000],
+        help='catalogue sizes (default: 2000 10000 30000)',
+    )
+    parser.add_argument('--dim', type=int, default=384, help='embedding dimension (default: 384)')
+    parser.add_argument('-k', type=int, default=5, help='neighbours per node (default: 5)')
+    args = parser.parse_args()
+
+    methods = ['exact'] + (['approx'] if importlib.util.find_spec('pynndescent') else [])
+    print(
+        f"{'rows':>7}  {'engine':<7}  {'search (s)':>10}  {'total (s)':>9}  "
+        f"{'peak (MB)':>9}  {'recall':>6}"
+    )
+    for n_rows in args.rows:
+        embeddings = synthetic_embeddings(n_rows, args.dim)
+        node_ids = [f'SCC{i}' for i in range(n_rows)]
+
+        with profiled() as search:
+            legacy = legacy_neighbors(embeddings, args.k)
+        with profiled() as build:
+            legacy_graph(legacy, node_ids, args.k)
+        # without the row itself, as the other engines return
+        reference = np.array([
+            [j for j in row if j != i][:args.k] for i, row in enumerate(legacy.tolist())
+        ])
+        print(
+            f"{n_rows:>7}  {'brute':<7}  {search.wall_secs:>10.2f}  "
+            f"{search.wall_secs + build.wall_secs:>9.2f}  "
+            f"{max(search.peak_rss_bytes, build.peak_rss_bytes) / 2**20:>9.0f}  {1:>6.3f}"
+        )
+
+        for method in methods:
+            with profiled() as search:
+                indices, _ = nearest_neighbors(embeddings, args.k, method=method)
+            builder = KNNGraphBuilder(embeddings, node_ids, node_ids, k=args.k, method=method)
+            with profiled() as build:
+                builder.graph
+            print(
+                f"{'':>7}  {method:<7}  {search.wall_secs:>10.2f}  {build.wall_secs:>9.2f}  "
+                f"{max(search.peak_rss_bytes, build.peak_rss_bytes) / 2**20:>9.0f}  "
+                f"{recall(indices, reference):>6.3f}"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+End-to-end wall time of the pipeline stages that only depend on the embeddings.
+
+Builds a synthetic catalogue and a random embedding matrix, registers them as sources
+of a `StageGraph` (the matrix is a `.npy` file read with `mmap_mode='r'`, like the
+embeddings stage artifact) and runs the vizinhos, UMAP, t-SNE, k-NN and docentes stages
+once sequentially and once in a process pool, each run with an empty cache. UMAP is
+skipped if `umap-learn` isn't installed.
+
+    python cli.py bench pipeline --rows 5000 --jobs 4
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+import tempfile
+from functools import partial
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pipeline import (
+    DocentesStage,
+    KnnStage,
+    NeighborsStage,
+    TsneStage,
+    UmapStage,
+    neighbors_k,
+    print_plan,
+)
+from stages import StageGraph
+from utils.config.model import KNN_PARAMS, NEIGHBORS_PARAMS, TSNE_PARAMS, UMAP_PARAMS
+from utils.data.artifacts import read_artifact, write_artifact
+
+
+def synthetic_sources(directory: Path, n_rows: int, dim: int, seed: int = 0) -> tuple[Path, Path]:
+    """Write a preprocessed-like catalogue and a normalized embedding matrix."""
+    rng = np.random.default_rng(seed)
+    docentes = np.array([f'Docente {i}' for i in range(n_rows // 3 + 1)], dtype=object)
+    df = pd.DataFrame({
+        'codigo': [f'SCC{5000 + i}' for i in range(n_rows)],
+        'disciplina': [f'Disciplina {i}' for i in range(n_rows)],
+        'commissao': [f'Comissão {i % 40}' for i in range(n_rows)],
+        'docentes_responsaveis': [
+            ' | '.join(docentes[rng.integers(0, len(docentes), 2)]) for _ in range(n_rows)
+        ],
+    })
+    dados_path = directory / 'dados.parquet'
+    write_artifact(df, dados_path)
+
+    # clustered points, so that the projections and neighbours have some structure
+    centers = rng.normal(size=(50, dim))
+    embeddings = centers[rng.integers(0, 50, n_rows)] + 0.3 * rng.normal(size=(n_rows, dim))
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+    embeddings_path = directory / 'embeddings.npy'
+    np.save(embeddings_path, embeddings.astype(np.float32))
+    return dados_path, embeddings_path
+
+
+def build_graph(cache_dir: Path, dados_path: Path, embeddings_path: Path) -> StageGraph:
+    graph = StageGraph(cache_dir)
+    graph.add_source('dados', key='dados', load=partial(read_artifact, dados_path))
+    graph.add_source(
+        'embeddings', key='embeddings', load=partial(np.load, embeddings_path, mmap_mode='r')
+    )
+    graph.add(NeighborsStage(
+        k=neighbors_k(UMAP_PARAMS, TSNE_PARAMS, KNN_PARAMS), **NEIGHBORS_PARAMS
+    ))
+    if importlib.util.find_spec('umap') is not None:
+        graph.add(UmapStage(**UMAP_PARAMS))
+    graph.add(TsneStage(**TSNE_PARAMS))
+    graph.add(KnnStage(**KNN_PARAMS))
+    graph.add(DocentesStage())
+    return graph
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=5000, help='catalogue size (default: 5000)')
+    parser.add_argument('--dim', type=int, default=768, help='embedding dimension (default: 768)')
+    parser.add_argument(
+        '--jobs', type=int, default=min(4, os.cpu_count() or 1),
+        help='processes of the parallel run (default: %(default)s)',
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        dados_path, embeddings_path = synthetic_sources(tmp_dir, args.rows, args.dim)
+
+        times = {}
+        for jobs in (1, args.jobs):
+            graph = build_graph(tmp_dir / f'cache-{jobs}', dados_path, embeddings_path)
+            started = perf_counter()
+            plan = graph.run(jobs=jobs)
+            times[jobs] = perf_counter() - started
+            print(f"jobs={jobs}: {times[jobs]:.1f}s")
+            print_plan(plan)
+
+        print(f"speedup {times[1] / times[args.jobs]:.1f}x with {args.jobs} jobs "
+              f"({os.cpu_count()} cpus)")
+
+
+if __name__ == '__main__':
+    main()
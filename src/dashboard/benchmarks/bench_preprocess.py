@@ -0,0 +1,140 @@
+"""
+Benchmark of `DataReader._preprocess` on synthetic catalogues.
+
+Builds frames shaped like the raw scrapped JSON (object columns, cargas as strings such
+as '120 horas' or '15 semanas', ~1% of the rows without créditos) and compares the
+vectorized preprocessing against the previous row-wise implementation, reporting wall
+time, peak traced memory and the memory of the typed (non-text) columns of the result.
+
+    python cli.py bench preprocess --rows 10000 100000 1000000
+"""
+
+import argparse
+import gc
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+from time import perf_counter
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.data.reader import CATEGORY_COLUMNS, CODE_COLUMNS, INT_DTYPES, DataReader
+
+# columns whose dtype changes with the preprocessing, the text columns are left as is
+TYPED_COLUMNS = ['criacao', *CATEGORY_COLUMNS, *CODE_COLUMNS, *INT_DTYPES]
+
+
+def synthetic_catalogue(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """Raw scrapped rows, with the dtypes `pd.read_json` gives them."""
+    rng = np.random.default_rng(seed)
+    comissoes = np.array([f'Comissão {i}' for i in range(40)], dtype=object)
+    programas = np.array([f'Programa {i}' for i in range(120)], dtype=object)
+    areas = np.array([f'Área {i}' for i in range(240)], dtype=object)
+    textos = np.array([f'texto da ementa {i} ' * 40 for i in range(500)], dtype=object)
+
+    area = rng.integers(0, len(areas), n_rows)
+    n_creditos = rng.integers(1, 13, n_rows).astype(object)
+    n_creditos[rng.random(n_rows) < 0.01] = None
+    semanas = rng.integers(1, 16, n_rows)
+    carga_total = np.where(
+        rng.random(n_rows) < 0.5,
+        [f'{h} horas' for h in semanas * 15],
+        [f'{s} semanas' for s in semanas],
+    ).astype(object)
+    dias = rng.integers(1, 29, n_rows)
+    meses = rng.integers(1, 13, n_rows)
+    anos = rng.integers(1990, 2025, n_rows)
+
+    return pd.DataFrame({
+        'codigo': [f'SCC{5000 + i}' for i in range(n_rows)],
+        'disciplina': textos[rng.integers(0, len(textos), n_rows)],
+        'criacao': [f'{d:02d}/{m:02d}/{a}' for d, m, a in zip(dias, meses, anos)],
+        'n_creditos': n_creditos,
+        'carga_teorica': rng.integers(0, 8, n_rows).astype(object),
+        'carga_pratica': rng.integers(0, 8, n_rows).astype(object),
+        'carga_estudo': rng.integers(0, 8, n_rows).astype(object),
+        'duracao': [f'{s} semanas' for s in semanas],
+        'carga_total': carga_total,
+        'objetivos': textos[rng.integers(0, len(textos), n_rows)],
+        'conteudo': textos[rng.integers(0, len(textos), n_rows)],
+        'commissao': comissoes[area % len(comissoes)],
+        'nome_programa': programas[area % len(programas)],
+        'area_concentracao': areas[area],
+    }, dtype=object)
+
+
+def _extrair_carga_horaria(valor_texto: str | None) -> int:
+    numero_str, tipo = str(valor_texto).split(' ')
+    if tipo == 'horas':
+        return int(numero_str)
+    elif tipo == 'semanas':
+        return 7 * 24 * int(numero_str)
+    else:
+        raise ValueError(f"Tipo desconhecido: {tipo}")
+
+
+def legacy_preprocess(df: pd.DataFrame) -> pd.DataFrame:
+    """Row-wise implementation replaced by the vectorized `DataReader._preprocess`."""
+    df = df.loc[~df['n_creditos'].isnull()].copy()
+    df.loc[:, 'criacao'] = pd.to_datetime(df['criacao'], format='%d/%m/%Y', errors='coerce')
+    for col in ('carga_teorica', 'carga_pratica', 'carga_estudo', 'n_creditos'):
+        df.loc[:, col] = df[col].astype(int)
+    df.loc[:, 'carga_total'] = df['carga_total'].apply(_extrair_carga_horaria)
+    df.loc[:, 'duracao'] = df['duracao'].apply(_extrair_carga_horaria)
+    df.loc[:, 'carga_total'] = df['carga_total'].astype(int)
+    df.loc[:, 'duracao'] = df['duracao'].astype(int)
+    return df
+
+
+def measure(preprocess: Callable, df: pd.DataFrame) -> tuple[float, float, float]:
+    """Wall time (s), peak traced memory (MB) and typed columns memory (MB)."""
+    gc.collect()
+    started = perf_counter()
+    result = preprocess(df)
+    elapsed = perf_counter() - started
+    typed = result[[col for col in TYPED_COLUMNS if col in result.columns]]
+    result_mb = typed.memory_usage(deep=True).sum() / 2**20
+    del result
+
+    # tracemalloc slows the run down, so the peak is measured in a second run
+    gc.collect()
+    tracemalloc.start()
+    preprocess(df)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2**20, result_mb
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        '--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+        help='catalogue sizes (default: 10k 100k 1M)',
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        reader = DataReader(Path(tmp_dir), Path(tmp_dir) / 'output.parquet')
+        paths = {'legacy': legacy_preprocess, 'vectorized': reader._preprocess}
+
+        print(f"{'rows':>9}  {'path':<10}  {'time (s)':>9}  {'peak (MB)':>10}  {'typed (MB)':>11}")
+        for n_rows in args.rows:
+            df = synthetic_catalogue(n_rows)
+            times = {}
+            for name, preprocess in paths.items():
+                elapsed, peak_mb, result_mb = measure(preprocess, df)
+                times[name] = elapsed
+                print(
+                    f"{n_rows:>9}  {name:<10}  {elapsed:>9.3f}  {peak_mb:>10.1f}  "
+                    f"{result_mb:>11.1f}"
+                )
+            print(f"{'':>9}  speedup {times['legacy'] / times['vectorized']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
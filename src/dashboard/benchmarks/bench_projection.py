@@ -0,0 +1,94 @@
+"""
+Runtime and neighbourhood preservation of the projections with and without PCA.
+
+Projects synthetic embeddings with t-SNE (and UMAP, if `umap-learn` is installed) the
+way the pipeline does: from the full embeddings with the shared cosine neighbours
+(`pca: False`), and from the PCA pre-reduction (`pca: True`) at each requested number
+of components. Reports the time of the preparation (neighbour search or PCA), of the
+projection, the explained variance, the trustworthiness of the 2-D layout and the
+recall@k of its neighbours against the cosine neighbours of the full embeddings.
+
+    python cli.py bench projection --rows 5000 --components 50 100
+"""
+
+import argparse
+import importlib.util
+import sys
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+from sklearn.manifold import trustworthiness
+from sklearn.neighbors import NearestNeighbors
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bench_knn import recall, synthetic_embeddings
+from transformer.knn import knn_exact, tsne_neighbors
+from transformer.pca import PcaReducer
+from transformer.tsne import TsneTransformer
+from utils.config.model import TSNE_PARAMS, UMAP_PARAMS
+
+
+def projectors() -> dict[str, tuple[type, dict, int]]:
+    """Projector class, its parameters without `pca` and the neighbours it needs."""
+    tsne_params = {key: value for key, value in TSNE_PARAMS.items() if key != 'pca'}
+    found = {'tsne': (TsneTransformer, tsne_params, tsne_neighbors(tsne_params['perplexity']))}
+    if importlib.util.find_spec('umap') is not None:
+        from transformer.umap import UmapTransformer
+
+        umap_params = {key: value for key, value in UMAP_PARAMS.items() if key != 'pca'}
+        found['umap'] = (UmapTransformer, umap_params, umap_params['n_neighbors'] - 1)
+    return found
+
+
+def layout_neighbors(layout: np.ndarray, k: int) -> np.ndarray:
+    indices = NearestNeighbors(n_neighbors=k + 1).fit(layout).kneighbors(return_distance=False)
+    return indices[:, :k]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=5000, help='catalogue size (default: 5000)')
+    parser.add_argument('--dim', type=int, default=384, help='embedding dimension (default: 384)')
+    parser.add_argument(
+        '--components', type=int, nargs='+', default=[50],
+        help='PCA components (default: 50)',
+    )
+    parser.add_argument('-k', type=int, default=10, help='neighbours for the quality metrics (default: 10)')
+    args = parser.parse_args()
+
+    embeddings = synthetic_embeddings(args.rows, args.dim)
+    reference, _ = knn_exact(embeddings, args.k)
+
+    print(
+        f"{'projector':<9}  {'input':<10}  {'prep (s)':>8}  {'project (s)':>11}  "
+        f"{'variance':>8}  {'trust':>6}  {'recall':>6}"
+    )
+    for name, (projector, params, n_neighbors) in projectors().items():
+        runs = []
+        start = perf_counter()
+        neighbors = knn_exact(embeddings, n_neighbors)
+        runs.append(('full', perf_counter() - start, 1.0, embeddings, {**params, 'neighbors': neighbors}))
+        for n_components in args.components:
+            start = perf_counter()
+            reducer = PcaReducer(embeddings, n_components=n_components)
+            reduced = reducer.reduced
+            runs.append((
+                f'pca {n_components}', perf_counter() - start,
+                reducer.explained_variance_ratio.sum(), reduced, {**params, 'metric': 'euclidean'},
+            ))
+
+        for label, prep, variance, vectors, run_params in runs:
+            start = perf_counter()
+            layout = projector(vectors, **run_params).model_embeddings
+            elapsed = perf_counter() - start
+            trust = trustworthiness(embeddings, layout, n_neighbors=args.k, metric='cosine')
+            print(
+                f"{name:<9}  {label:<10}  {prep:>8.2f}  {elapsed:>11.2f}  {variance:>8.1%}  "
+                f"{trust:>6.3f}  {recall(layout_neighbors(layout, args.k), reference):>6.3f}"
+            )
+
+
+if __name__ == '__main__':
+    main()
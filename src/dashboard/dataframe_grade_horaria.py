@@ -1,8 +1,12 @@
+import numpy as np
 import pandas as pd
 import networkx as nx
 from pathlib import Path
-from networkx import Graph
-from utils.config.subjects import obrigatorias
+from transformer.responsaveis import docente_disciplina_graph
+from utils.config.path import dashboard_data_path, grafo_disciplinas_path, grafo_docentes_path
+from utils.config.subjects import institutos_alvo, obrigatorias
+from utils.data.artifacts import write_artifact
+from utils.data.csr_graph import CsrGraph
 
 # TODO: refatorar para seguir a API lazy loading com .to_file()
 class DashboardArtifactGenerator:
@@ -10,8 +14,11 @@ class DashboardArtifactGenerator:
         self,
         df_raw: pd.DataFrame,
         df_comm: pd.DataFrame,
-        knn_graph: Graph,
-        output_dir: Path
+        knn_graph: CsrGraph,
+        output_dir: Path,
+        institutos_alvo: list[str] = institutos_alvo,
+        df_textos: pd.DataFrame | None = None,
+        docentes_graph: CsrGraph | None = None,
     ):
         """
         Classe responsável por gerar os arquivos finais consumidos pelo Dashboard.
@@ -21,18 +28,20 @@ class DashboardArtifactGenerator:
             df_comm: DataFrame com as informações de comunidade extraídas via Louvain.
             knn_graph: Grafo k-NN original das disciplinas.
             output_dir: Diretório onde os artefatos serão salvos.
+            institutos_alvo: Comissões cujas disciplinas entram nos artefatos.
+            df_textos: Textos normalizados da etapa 'textos', incluídos como colunas
+                `<coluna>_normalizado` para as nuvens de palavras.
+            docentes_graph: Grafo Docente-Disciplina de todas as disciplinas (etapa
+                'docentes'), recortado aqui nas disciplinas filtradas. Se None, o grafo
+                é montado a partir do dataset filtrado.
         """
         self._df_raw = df_raw
         self._df_comm = df_comm
         self._knn_graph = knn_graph
+        self._docentes_graph = docentes_graph
         self.output_dir = output_dir
-
-        # Configuração hardcoded dos filtros
-        self.institutos_alvo = [
-            "Instituto de Ciências Matemáticas e de Computação",
-            "Instituto de Matemática, Estatística e Ciência da Computação",
-            "Instituto de Matemática e Estatística"
-        ]
+        self.institutos_alvo = institutos_alvo
+        self._df_textos = df_textos
 
     def run(self):
         """
@@ -47,22 +56,22 @@ class DashboardArtifactGenerator:
         # 1. Gerar DataFrame Unificado
         df_final = self._gerar_dataset_dashboard()
         
-        path_df = self.output_dir / "dados_dashboard_completo.pickle"
-        df_final.to_pickle(path_df)
+        path_df = self.output_dir / dashboard_data_path.name
+        write_artifact(df_final, path_df)
         print(f"✅ [1/3] Dataset salvo em: {path_df}")
 
         # 2. Gerar Grafo Docentes
         G_doc = self._construir_grafo_docentes(df_final)
         
-        path_doc = self.output_dir / "grafo_docentes_enrichido.graphml"
-        nx.write_graphml(G_doc, path_doc)
+        path_doc = self.output_dir / grafo_docentes_path.name
+        G_doc.write(path_doc)
         print(f"✅ [2/3] Grafo Docentes salvo em: {path_doc}")
 
         # 3. Gerar Grafo Disciplinas
         G_disc = self._enriquecer_grafo_disciplinas(df_final)
         
-        path_disc = self.output_dir / "grafo_disciplinas_enrichido.graphml"
-        nx.write_graphml(G_disc, path_disc)
+        path_disc = self.output_dir / grafo_disciplinas_path.name
+        G_disc.write(path_disc)
         print(f"✅ [3/3] Grafo Disciplinas salvo em: {path_disc}")
 
     def _gerar_dataset_dashboard(self) -> pd.DataFrame:
@@ -82,8 +91,18 @@ class DashboardArtifactGenerator:
         if 'disciplina' in df_comm.columns:
             df_comm = df_comm.drop(columns=['disciplina'])
 
-        # Merge (agora seguro)
-        df_merged = pd.merge(df_main, df_comm, on='codigo', how='left')
+        # Merge (agora seguro): uma comunidade por disciplina, o número de linhas não muda
+        df_comm = df_comm.drop_duplicates('codigo')
+        df_merged = pd.merge(df_main, df_comm, on='codigo', how='left', validate='many_to_one')
+
+        if self._df_textos is not None:
+            df_textos = self._df_textos.drop(columns=['texto'], errors='ignore')
+            df_textos = df_textos.set_index('codigo').add_suffix('_normalizado').reset_index()
+            df_textos['codigo'] = df_textos['codigo'].astype(str).str.strip()
+            # os textos têm uma linha por oferta, mas são os mesmos para todas as ofertas
+            # de uma disciplina: sem deduplicar, o merge multiplicaria as linhas
+            df_textos = df_textos.drop_duplicates('codigo')
+            df_merged = pd.merge(df_merged, df_textos, on='codigo', how='left', validate='many_to_one')
 
         # Identificar Obrigatórias
         df_merged['eh_obrigatoria'] = df_merged['codigo'].isin(obrigatorias)
@@ -102,61 +121,64 @@ class DashboardArtifactGenerator:
         print(f"Total de disciplinas filtradas: {len(df_final)}")
         return df_final
 
-    def _construir_grafo_docentes(self, df: pd.DataFrame) -> nx.Graph:
+    def _nos_disciplinas(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Atributos dos nós de disciplina, na ordem das linhas de `df`."""
+        codigos = df['codigo'].astype(str).str.strip()
+        col_comissao = 'commissao' if 'commissao' in df.columns else 'comissao'
+
+        if 'disciplina' in df.columns:
+            labels = df['disciplina'].fillna('Desconhecido').astype(str)
+        else:
+            labels = 'Disciplina ' + codigos
+        if 'comunidade' in df.columns:
+            comunidades = pd.to_numeric(df['comunidade'].astype(object), errors='coerce')
+            comunidades = comunidades.fillna(-1).astype('Int64')
+        else:
+            comunidades = -1
+
+        nodes = pd.DataFrame({
+            'id': codigos,
+            'label': labels,
+            'comunidade': comunidades,
+            'is_mandatory': df['eh_obrigatoria'].astype(bool),
+            'institute': df[col_comissao].astype(str),
+        })
+        return nodes.reset_index(drop=True)
+
+    def _construir_grafo_docentes(self, df: pd.DataFrame) -> CsrGraph:
         """Constrói o grafo bipartido Docente-Disciplina"""
-        G = nx.Graph()
-        for _, row in df.iterrows():
-            node_id = str(row['codigo']).strip()
-            
-            # Adiciona segurança ao acessar colunas
-            disciplina_nome = row['disciplina'] if 'disciplina' in row else f"Disciplina {node_id}"
-            comissao_nome = str(row.get('commissao', row.get('comissao', '')))
-
-            # Nó Disciplina
-            G.add_node(
-                node_id, 
-                label=disciplina_nome, 
-                bipartite=0, 
-                type='disciplina',
-                comunidade=int(row['comunidade']) if pd.notna(row.get('comunidade')) else -1,
-                is_mandatory=bool(row['eh_obrigatoria']),
-                institute=comissao_nome
-            )
-
-            # Nós Docentes
-            raw_doc = row.get('docentes_responsaveis')
-            if pd.notna(raw_doc) and str(raw_doc).strip():
-                doc_list = [d.strip() for d in str(raw_doc).split('|') if d.strip()]
-                for doc_name in doc_list:
-                    G.add_node(doc_name, label=doc_name, bipartite=1, type='docente')
-                    G.add_edge(node_id, doc_name)
-        return G
-
-    def _enriquecer_grafo_disciplinas(self, df: pd.DataFrame) -> nx.Graph:
-        """Enriquece o grafo k-NN existente"""            
-        G = self._knn_graph.copy()
-
-        # Filtra nós
-        codigos_validos = set(df['codigo'])
-        nos_remover = [n for n in G.nodes() if str(n).strip() not in codigos_validos]
-        G.remove_nodes_from(nos_remover)
-
-        # Adiciona Metadados
-        df_indexed = df.set_index('codigo')
-        for node in G.nodes():
-            nid = str(node).strip()
-            if nid in df_indexed.index:
-                row = df_indexed.loc[nid]
-                
-                disciplina_nome = row['disciplina'] if 'disciplina' in row else f"Disciplina {nid}"
-                comissao_nome = str(row.get('commissao', row.get('comissao', '')))
-
-                G.nodes[node].update({
-                    'label': str(disciplina_nome),
-                    'comunidade': int(row['comunidade']) if pd.notna(row.get('comunidade')) else -1,
-                    'is_mandatory': bool(row['eh_obrigatoria']),
-                    'institute': comissao_nome,
-                    'type': 'disciplina'
-                })
-
-        return G
+        if self._docentes_graph is None:
+            docentes = df.get('docentes_responsaveis', pd.Series(index=df.index, dtype=object))
+            return docente_disciplina_graph(self._nos_disciplinas(df), docentes.reset_index(drop=True))
+
+        # recorte do grafo da etapa 'docentes': as disciplinas filtradas e os seus docentes
+        nodes = self._nos_disciplinas(df).drop_duplicates('id')
+        G = self._docentes_graph
+        rows = [G.index[node_id] for node_id in nodes['id'] if node_id in G]
+        docentes = G.ids[np.unique(G.adjacency[rows].indices)]
+        G = G.subgraph([*nodes['id'], *docentes])
+
+        # os atributos do dashboard nas disciplinas, os docentes ficam só com os seus
+        atributos = G.nodes.merge(nodes.drop(columns=['label']), on='id', how='left')
+        colunas = [*nodes.columns, 'type', 'bipartite']
+        return CsrGraph(G.adjacency, atributos[colunas])
+
+    def _enriquecer_grafo_disciplinas(self, df: pd.DataFrame) -> CsrGraph:
+        """
+        Recorta o grafo k-NN nas disciplinas filtradas e adiciona os metadados e a
+        posição (x, y) de cada nó no mapa, calculada aqui uma vez em vez de a cada
+        sessão do dashboard.
+        """
+        nodes = self._nos_disciplinas(df).drop_duplicates('id')
+        G = self._knn_graph.subgraph(nodes['id'])
+
+        # Adiciona Metadados, na ordem dos nós do grafo
+        atributos = G.nodes[['id']].merge(nodes, on='id', how='left')
+        atributos['type'] = 'disciplina'
+
+        # sem pesos, como o layout calculado antes no dashboard
+        pos = nx.spring_layout(G.to_networkx(weighted=False), seed=42, k=0.15, iterations=60)
+        atributos['x'] = [float(pos[node_id][0]) for node_id in atributos['id']]
+        atributos['y'] = [float(pos[node_id][1]) for node_id in atributos['id']]
+
+        return CsrGraph(G.adjacency, atributos)
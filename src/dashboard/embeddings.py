@@ -3,11 +3,16 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 
+from utils import get_embeddings
 from utils.config.path import umap_data_path, tsne_data_path
+from utils.data.artifacts import read_artifact
+
+# só as coordenadas e os campos exibidos no hover
+PLOT_COLUMNS = ['codigo', 'disciplina', 'commissao']
 
 @st.cache_data
-def get_data(path: str) -> pd.DataFrame:
-    return pd.read_pickle(path)
+def get_data(path: str, coordinates: tuple[str, str]) -> pd.DataFrame:
+    return read_artifact(path, PLOT_COLUMNS + list(coordinates))
 
 def embedding_plot(
     title: str,
@@ -31,8 +36,8 @@ def embedding_plot(
         color_discrete_sequence=px.colors.qualitative.Alphabet,
     )
 
-umap_df = get_data(umap_data_path)
-tsne_df = get_data(tsne_data_path)
+umap_df = get_data(umap_data_path, ('umap_x', 'umap_y'))
+tsne_df = get_data(tsne_data_path, ('tsne_x', 'tsne_y'))
 
 all_comissoes = sorted(umap_df['commissao'].unique().tolist())
 comissoes_options = ['All'] + all_comissoes
@@ -68,3 +73,22 @@ st.plotly_chart(
         y_col='tsne_y',
     ),
 )
+
+st.subheader("Disciplinas semelhantes")
+
+# a matriz de embeddings do pipeline, mapeada em memória e compartilhada entre sessões
+matriz = get_embeddings()
+disciplinas = umap_df.drop_duplicates('codigo').set_index('codigo')['disciplina']
+
+codigo = st.selectbox(
+    'Selecione uma disciplina:',
+    options=disciplinas.index.tolist(),
+    format_func=lambda codigo: f"{codigo} - {disciplinas[codigo]}",
+    index=None,
+    placeholder='Busque pelo código ou nome...',
+)
+
+if codigo is not None:
+    semelhantes = pd.DataFrame(matriz.most_similar(codigo, k=10), columns=['codigo', 'similaridade'])
+    semelhantes.insert(1, 'disciplina', semelhantes['codigo'].map(disciplinas))
+    st.dataframe(semelhantes, hide_index=True)
@@ -30,10 +30,14 @@ except ImportError:
     creditos_necessarios = 24
     creditos_obrigatorios = 8
 
+from utils.config.path import dashboard_data_path, grafo_disciplinas_path, grafo_docentes_path
+from utils.data.artifacts import read_artifact
+from utils.data.csr_graph import CsrGraph
+
 # --- CAMINHOS ---
-DATA_PATH = Path('src/data/grade_horaria/dados_dashboard_completo.pickle')
-GRAPH_PATH = Path('src/data/grade_horaria/grafo_docentes_enrichido.graphml')
-GRAPH_DISC_PATH = Path('src/data/grade_horaria/grafo_disciplinas_enrichido.graphml')
+DATA_PATH = dashboard_data_path
+GRAPH_PATH = grafo_docentes_path
+GRAPH_DISC_PATH = grafo_disciplinas_path
 
 # --- CARREGAMENTO DE DADOS ---
 @st.cache_data
@@ -41,20 +45,22 @@ def get_data() -> pd.DataFrame:
     if not DATA_PATH.exists():
         return pd.DataFrame()
     try:
-        return pd.read_pickle(DATA_PATH)
+        return read_artifact(DATA_PATH)
     except Exception:
         return pd.DataFrame()
 
+# Grafos CSR (ver utils/data/csr_graph.py): a adjacência é mapeada em memória e os
+# atributos dos nós são colunas, o NetworkX só entra nos layouts de subgrafos pequenos
 @st.cache_resource
-def get_full_graph() -> nx.Graph:
+def get_full_graph() -> CsrGraph:
     if not GRAPH_PATH.exists(): return None
-    try: return nx.read_graphml(GRAPH_PATH)
+    try: return CsrGraph.read(GRAPH_PATH)
     except Exception: return None
 
 @st.cache_resource
-def get_disc_graph() -> nx.Graph:
+def get_disc_graph() -> CsrGraph:
     if not GRAPH_DISC_PATH.exists(): return None
-    try: return nx.read_graphml(GRAPH_DISC_PATH)
+    try: return CsrGraph.read(GRAPH_DISC_PATH)
     except Exception: return None
 
 # --- HELPERS VISUAIS ---
@@ -95,14 +101,12 @@ def renderizar_mapa_disciplinas_geral(df_referencia):
         return
 
     mapa_nomes = df_referencia.drop_duplicates('codigo').set_index('codigo')['disciplina'].to_dict()
-    pos = nx.spring_layout(G, seed=42, k=0.15, iterations=60)
+    # posições calculadas no pipeline (ver dataframe_grade_horaria.py)
     SCALE = 600
     ag_nodes, ag_edges = [], []
 
-    for node_id in G.nodes():
-        data = G.nodes[node_id]
+    for node_id, comm_id, x, y in G.nodes[['id', 'comunidade', 'x', 'y']].itertuples(index=False):
         is_selected = node_id in st.session_state.selecionadas
-        comm_id = data.get('comunidade', data.get('modularity_class', -1))
         
         if is_selected:
             color, size, b_width, f_size = get_hex_color(comm_id, 1.0), 35, 3, 16
@@ -111,7 +115,7 @@ def renderizar_mapa_disciplinas_geral(df_referencia):
             color, size, b_width, f_size = get_hex_color(comm_id, 0.4), 15, 1, 10
             font_color = "#AAAAAA"
 
-        x_pos, y_pos = pos[node_id][0] * SCALE, pos[node_id][1] * SCALE
+        x_pos, y_pos = x * SCALE, y * SCALE
         nome_real = mapa_nomes.get(node_id, node_id)
 
         ag_nodes.append(Node(
@@ -121,7 +125,8 @@ def renderizar_mapa_disciplinas_geral(df_referencia):
             title=f"{node_id}: {nome_real}"
         ))
 
-    for u, v in G.edges():
+    sources, targets, _ = G.edges()
+    for u, v in zip(sources.tolist(), targets.tolist()):
         ag_edges.append(Edge(source=u, target=v, color="#E0E0E0", width=0.8))
 
     config = Config(width="100%", height=550, directed=False, physics=False, 
@@ -141,18 +146,19 @@ def renderizar_grafo_interativo(df_referencia):
         return
     
     G_full = get_full_graph()
-    if not G_full: return
+    if G_full is None: return
     
     mapa_nomes = df_referencia.drop_duplicates('codigo').set_index('codigo')['disciplina'].to_dict()
     nos_exibir, docentes_viz = set(sel), set()
-    cods_validos = [c for c in sel if c in G_full.nodes]
+    cods_validos = [c for c in sel if c in G_full]
 
     for c in cods_validos:
         viz = list(G_full.neighbors(c))
         docentes_viz.update(viz)
         nos_exibir.update(viz)
 
-    G_sub = G_full.subgraph(nos_exibir)
+    # só o subgrafo exibido vira NetworkX, para o shell_layout
+    G_sub = G_full.subgraph(nos_exibir).to_networkx()
     try: pos = nx.shell_layout(G_sub, nlist=[list(docentes_viz), cods_validos])
     except: pos = nx.circular_layout(G_sub)
     
@@ -345,12 +351,15 @@ with tab_texto:
     df_txt = df[df['codigo'].isin(st.session_state.selecionadas)]
     if not df_txt.empty:
         c1, c2, c3 = st.columns(3)
-        if 'objetivos' in df_txt.columns: 
-            with c1: st.pyplot(gerar_wordcloud(" ".join(df_txt['objetivos'].dropna().astype(str)), "Objetivos"), use_container_width=True)
-        if 'justificativa' in df_txt.columns: 
-            with c2: st.pyplot(gerar_wordcloud(" ".join(df_txt['justificativa'].dropna().astype(str)), "Justificativa", "magma"), use_container_width=True)
-        if 'conteudo' in df_txt.columns: 
-            with c3: st.pyplot(gerar_wordcloud(" ".join(df_txt['conteudo'].dropna().astype(str)), "Conteúdo", "cividis"), use_container_width=True)
+        for coluna_st, col, titulo, colormap in (
+            (c1, 'objetivos', "Objetivos", 'viridis'),
+            (c2, 'justificativa', "Justificativa", 'magma'),
+            (c3, 'conteudo', "Conteúdo", 'cividis'),
+        ):
+            # tokens da etapa de normalização do pipeline, se o artefato os tiver
+            col_texto = f'{col}_normalizado' if f'{col}_normalizado' in df_txt.columns else col
+            if col_texto in df_txt.columns:
+                with coluna_st: st.pyplot(gerar_wordcloud(" ".join(df_txt[col_texto].dropna().astype(str)), titulo, colormap), use_container_width=True)
     else:
         st.info("Selecione disciplinas para gerar a análise.")
 
@@ -373,7 +382,7 @@ else:
     # Enriquecimento com Docentes
     G_full_ref = get_full_graph()
     mapa_docentes = {}
-    if G_full_ref:
+    if G_full_ref is not None:
         for cod in df_final['codigo']:
             if cod in G_full_ref:
                 viz = list(G_full_ref.neighbors(cod))
@@ -1,6 +1,7 @@
 from viz.treemap import treemap
 
 from utils import get_data
+from utils.data.artifacts import CARGA_COLUMNS, HIERARCHY_COLUMNS
 
 import streamlit as st
 
@@ -25,5 +26,5 @@ col_filter = st.selectbox(
 )
 
 st.plotly_chart(
-    treemap(get_data(), col=str(col_filter))
+    treemap(get_data(HIERARCHY_COLUMNS + CARGA_COLUMNS), col=str(col_filter))
 )
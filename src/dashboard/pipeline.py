@@ -1,136 +1,475 @@
+"""
+Pipeline de transformação de dados para o dashboard.
+
+As etapas formam um grafo (ver stages.py) e cada artefato fica em cache, endereçado
+pelo hash dos dados, dos parâmetros e do código de que depende:
+
+    dados -> textos -> embeddings -> vizinhos -> umap, tsne, knn -> louvain -> dashboard
+    dados -> docentes -> dashboard
+
+A etapa 'vizinhos' busca os vizinhos de cosseno uma vez, para o maior k que o UMAP, o
+t-SNE e o grafo k-NN usam; nenhum deles refaz a busca. Com 'pca' em UMAP_PARAMS ou
+TSNE_PARAMS, a projeção usa os vetores da etapa 'pca' (embeddings -> pca -> umap/tsne).
+
+    python src/dashboard/pipeline.py --dry-run
+    python src/dashboard/pipeline.py --force tsne
+    python src/dashboard/pipeline.py --jobs 4
+    python src/dashboard/pipeline.py --force umap --profile umap
+    python src/dashboard/pipeline.py --history
+"""
+
+import argparse
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Collection
+
+import numpy as np
 import pandas as pd
-from typing import Optional
-from transformer.embedding import DataEmbedder
-from transformer.umap import UmapTransformer
-from transformer.tsne import TsneTransformer
-from transformer.graph import KNNGraphBuilder
-from transformer.responsaveis import DocenteDisciplinaGraphBuilder 
-from transformer.community import LouvainCommunityDetector
-from dataframe_grade_horaria import DashboardArtifactGenerator 
-from utils.config.model import TEXT_COL, MODEL_EMBEDDING
+from loguru import logger
+
+from profiling import profile_dict, profiled, read_history, reports_dir, run_id, write_report
+from stages import PlannedStage, Stage, StageGraph, content_key, publish_artifact
+from utils.config.model import (
+    EMBEDDING_DTYPE,
+    ENCODING_BACKEND,
+    ENCODING_BATCH_SIZE,
+    ENCODING_PROCESSES,
+    NORMALIZATION_PROCESSES,
+    KNN_PARAMS,
+    LOUVAIN_PARAMS,
+    MODEL_EMBEDDING,
+    NEIGHBORS_PARAMS,
+    PCA_PARAMS,
+    TEXT_COL,
+    TSNE_PARAMS,
+    UMAP_PARAMS,
+)
 from utils.config.path import (
-    umap_data_path,
-    tsne_data_path,
+    cache_dir,
+    embedding_store_dir,
+    embeddings_dir,
+    grade_horaria_dir,
+    onnx_export_dir,
     preprocessed_data_path,
     scrapper_data_path,
-    BASE_DIR,
+    tsne_data_path,
+    umap_data_path,
 )
+from utils.config.subjects import institutos_alvo
+from utils.data.artifacts import read_artifact, write_artifact
+from utils.data.csr_graph import CsrGraph
+from utils.data.embedding_matrix import open_embedding_matrix, write_embedding_matrix
 from utils.data.reader import DataReader
 
+# As bibliotecas de cada etapa (sentence-transformers, umap, ...) só são importadas no
+# build, assim um --dry-run ou um pipeline todo em cache não as carrega
+
+
+def _extra_cols(df: pd.DataFrame) -> dict[str, pd.Series]:
+    """Colunas exibidas junto das projeções no dashboard."""
+    return {
+        'codigo': df['codigo'],
+        'disciplina': df['disciplina'],
+        'commissao': df['commissao'],
+    }
+
+
+class NormalizeStage(Stage):
+    name = 'textos'
+    inputs = ('dados',)
+    suffix = '.parquet'
+    code = ('transformer/normalize.py',)
+
+    def build(self, inputs: dict[str, Any], path: Path) -> None:
+        from transformer.normalize import TextNormalizer
+
+        df = inputs['dados']
+        normalizer = TextNormalizer(processes=NORMALIZATION_PROCESSES)
+        normalized = normalizer.transform_columns(df, self.params['text_cols'])
+        normalized.insert(0, 'codigo', df['codigo'])
+        write_artifact(normalized, path)
+
+    def load(self, path: Path) -> pd.DataFrame:
+        return read_artifact(path)
+
+
+class EmbeddingStage(Stage):
+    name = 'embeddings'
+    inputs = ('textos',)
+    code = (
+        'transformer/embedding.py',
+        'transformer/encoding.py',
+        'utils/data/embedding_store.py',
+        'utils/data/embedding_matrix.py',
+    )
+
+    def build(self, inputs: dict[str, Any], path: Path) -> None:
+        from transformer.embedding import DataEmbedder
+
+        textos = inputs['textos']
+        to_embbed = textos['texto'].tolist()
+        # o store guarda os embeddings entre builds, só textos novos passam pelo modelo
+        embedder = DataEmbedder(
+            model_name=self.params['model_name'],
+            texts=to_embbed,
+            store_dir=embedding_store_dir,
+            batch_size=ENCODING_BATCH_SIZE,
+            processes=ENCODING_PROCESSES,
+            backend=self.params['backend'],
+            export_dir=onnx_export_dir,
+            normalized=True,
+        )
+        write_embedding_matrix(
+            path,
+            embedder.transform(),
+            codigos=textos['codigo'].astype(str).tolist(),
+            metadata={'model_name': self.params['model_name'], 'backend': self.params['backend']},
+            dtype=self.params['dtype'],
+        )
+
+    def load(self, path: Path) -> np.ndarray:
+        return open_embedding_matrix(path).vectors
+
+    def publish(self, path: Path) -> None:
+        publish_artifact(path, embeddings_dir)
+
+
+def neighbors_k(
+    umap_params: dict[str, Any],
+    tsne_params: dict[str, Any],
+    knn_params: dict[str, Any],
+) -> int:
+    """
+    Maior número de vizinhos (sem o próprio ponto) que o k-NN e as projeções sem PCA
+    usam.
+    """
+    from transformer.knn import tsne_neighbors
+
+    ks = [knn_params['k']]
+    if not umap_params.get('pca'):
+        ks.append(umap_params['n_neighbors'] - 1)
+    if not tsne_params.get('pca'):
+        ks.append(tsne_neighbors(tsne_params['perplexity']))
+    return max(ks)
+
+
+class NeighborsStage(Stage):
+    name = 'vizinhos'
+    inputs = ('embeddings',)
+    code = ('transformer/knn.py',)
+
+    def build(self, inputs: dict[str, Any], path: Path) -> None:
+        from transformer.knn import nearest_neighbors, write_neighbors
+
+        indices, similarities = nearest_neighbors(inputs['embeddings'], **self.params)
+        write_neighbors(path, indices, similarities)
+
+    def load(self, path: Path) -> tuple[np.ndarray, np.ndarray]:
+        from transformer.knn import read_neighbors
+
+        return read_neighbors(path)
+
+
+class PcaStage(Stage):
+    name = 'pca'
+    inputs = ('embeddings',)
+    code = ('transformer/pca.py', 'transformer/knn.py')
+
+    def build(self, inputs: dict[str, Any], path: Path) -> None:
+        from transformer.pca import PcaReducer
+
+        reducer = PcaReducer(inputs['embeddings'], **self.params)
+        reducer.to_file(path)
+        logger.info(
+            "PCA: {n} componentes explicam {variance:.1%} da variância",
+            n=reducer.reduced.shape[1],
+            variance=reducer.explained_variance_ratio.sum(),
+        )
+
+    def summary(self, path: Path) -> dict[str, Any]:
+        from transformer.pca import read_explained_variance
+
+        return {'explained_variance': read_explained_variance(path)}
+
+    def load(self, path: Path) -> np.ndarray:
+        from transformer.pca import read_reduced
+
+        return read_reduced(path)
+
+
+class ProjectionStage(Stage):
+    """
+    Projeção 2D dos embeddings completos, com os vizinhos da etapa 'vizinhos', ou com
+    `pca=True` dos vetores da etapa 'pca', com a própria busca de vizinhos nas poucas
+    dimensões.
+    """
+
+    def __init__(self, pca: bool = False, **params: Any) -> None:
+        super().__init__(**params)
+        # a chave da etapa muda com as entradas, então `pca` não precisa estar em params
+        self.inputs = ('dados', 'pca') if pca else ('dados', 'embeddings', 'vizinhos')
+
+    def _projector_args(self, inputs: dict[str, Any]) -> tuple[np.ndarray, dict[str, Any]]:
+        """Vetores e parâmetros do projetor."""
+        if 'pca' in inputs:
+            # euclidiana nos componentes ~ cosseno nos embeddings (ver transformer/pca.py)
+            return inputs['pca'], {**self.params, 'metric': 'euclidean'}
+        return inputs['embeddings'], {**self.params, 'neighbors': inputs['vizinhos']}
+
+    def load(self, path: Path) -> pd.DataFrame:
+        return read_artifact(path)
+
+
+class UmapStage(ProjectionStage):
+    name = 'umap'
+    suffix = '.parquet'
+    code = ('transformer/umap.py', 'transformer/knn.py')
+
+    def build(self, inputs: dict[str, Any], path: Path) -> None:
+        from transformer.umap import UmapTransformer
+
+        vectors, params = self._projector_args(inputs)
+        umapper = UmapTransformer(vectors, **params)
+        umapper.to_file(path, extra_cols=_extra_cols(inputs['dados']))
+
+    def publish(self, path: Path) -> None:
+        publish_artifact(path, umap_data_path)
+
+
+class TsneStage(ProjectionStage):
+    name = 'tsne'
+    suffix = '.parquet'
+    code = ('transformer/tsne.py', 'transformer/knn.py')
+
+    def build(self, inputs: dict[str, Any], path: Path) -> None:
+        from transformer.tsne import TsneTransformer
+
+        vectors, params = self._projector_args(inputs)
+        tsner = TsneTransformer(vectors, **params)
+        tsner.to_file(path, extra_cols=_extra_cols(inputs['dados']))
+
+    def publish(self, path: Path) -> None:
+        publish_artifact(path, tsne_data_path)
+
+
+class KnnStage(Stage):
+    name = 'knn'
+    inputs = ('dados', 'vizinhos')
+    code = ('transformer/graph.py', 'transformer/knn.py', 'utils/data/csr_graph.py')
+
+    def build(self, inputs: dict[str, Any], path: Path) -> None:
+        from transformer.graph import KNNGraphBuilder
+
+        df = inputs['dados']
+        grapher = KNNGraphBuilder(
+            None,
+            node_ids=df['codigo'].tolist(),
+            node_labels=df['disciplina'].fillna('Desconhecido').tolist(),
+            neighbors=inputs['vizinhos'],
+            **self.params,
+        )
+        grapher.to_file(path)
+
+    def load(self, path: Path) -> CsrGraph:
+        return CsrGraph.read(path)
+
+
+class LouvainStage(Stage):
+    name = 'louvain'
+    inputs = ('knn',)
+    suffix = '.parquet'
+    code = ('transformer/community.py', 'utils/data/csr_graph.py')
+
+    def build(self, inputs: dict[str, Any], path: Path) -> None:
+        from transformer.community import LouvainCommunityDetector
+
+        # o python-louvain só trabalha com grafos NetworkX; sem pesos, como no grafo
+        # k-NN original, para as comunidades não mudarem com a similaridade nas arestas
+        graph = inputs['knn'].to_networkx(weighted=False)
+        LouvainCommunityDetector(graph=graph, **self.params).to_file(path)
+
+    def load(self, path: Path) -> pd.DataFrame:
+        return read_artifact(path)
+
+
+class DocentesStage(Stage):
+    name = 'docentes'
+    inputs = ('dados',)
+    code = ('transformer/responsaveis.py', 'utils/data/csr_graph.py')
+
+    def build(self, inputs: dict[str, Any], path: Path) -> None:
+        from transformer.responsaveis import DocenteDisciplinaGraphBuilder
+
+        df = inputs['dados']
+        # Tratamento para garantir que seja string e lidar com NaNs
+        DocenteDisciplinaGraphBuilder(
+            node_ids=df['codigo'].astype(str).str.strip().tolist(),
+            node_labels=df['disciplina'].fillna('Desconhecido').tolist(),
+            docentes_data=df['docentes_responsaveis'].fillna('').astype(str).tolist(),
+        ).to_file(path)
+
+    def load(self, path: Path) -> CsrGraph:
+        return CsrGraph.read(path)
+
+
+class DashboardStage(Stage):
+    name = 'dashboard'
+    inputs = ('dados', 'textos', 'louvain', 'knn', 'docentes')
+    code = (
+        'dataframe_grade_horaria.py',
+        'transformer/responsaveis.py',
+        'utils/config/subjects.py',
+        'utils/data/csr_graph.py',
+    )
+
+    def build(self, inputs: dict[str, Any], path: Path) -> None:
+        from dataframe_grade_horaria import DashboardArtifactGenerator
+
+        DashboardArtifactGenerator(
+            df_raw=inputs['dados'],
+            df_comm=inputs['louvain'],
+            df_textos=inputs['textos'],
+            knn_graph=inputs['knn'],
+            docentes_graph=inputs['docentes'],
+            output_dir=path,
+            **self.params,
+        ).run()
+
+    def publish(self, path: Path) -> None:
+        publish_artifact(path, grade_horaria_dir)
+
 
 class DataTransformerPipeline:
     def __init__(
         self,
-        df: pd.DataFrame,
+        reader: DataReader,
+        cache_dir: Path = cache_dir,
     ):
         """
         Args:
-            df: Dataframe com preprocessamento mínimo (limpeza dos nan).
-        """
-        self._df = df
-        self._umapper: Optional[UmapTransformer] = None
-        self._grapher: Optional[KNNGraphBuilder] = None
-        self._bipartite_grapher: Optional[DocenteDisciplinaGraphBuilder] = None 
-        self._detector: Optional[LouvainCommunityDetector] = None
-        self._dashboard_gen: Optional[DashboardArtifactGenerator] = None
-
-    def _execute(self) -> None:
+            reader: Leitor do dataframe pré-processado, só lido se alguma etapa
+                precisar ser refeita.
+            cache_dir: Diretório dos artefatos das etapas.
         """
-        Executa as transformações de dados em sequência:
-        1. Gera embeddings.
-        2. Prepara o UMAP e t-SNE.
-        3. Prepara o Grafo Bipartido (Docentes).
-        """
-        # --- Preparação de Texto e IDs ---
-        to_embbed = self._df[TEXT_COL].fillna('').agg(' '.join, axis=1).tolist()
-        node_ids = self._df['codigo'].tolist()
-        node_labels = self._df['disciplina'].fillna('Desconhecido').tolist()
-        
-        # --- 1. Embeddings ---
-        embedder = DataEmbedder(model_name=MODEL_EMBEDDING, texts=to_embbed)
-        embeddings = embedder.transform() 
-
-        # --- 2. UMAP and t-SNE ---
-        self._umapper = UmapTransformer(embeddings)
-        self._tsner = TsneTransformer(embeddings)
-        node_ids = self._df['codigo'].tolist()
-        node_labels = self._df['disciplina'].fillna('Desconhecido').tolist()
-        
-        # --- 3. Grafo Bipartido ---
-        self._grapher = KNNGraphBuilder(
-            embeddings,
-            node_ids=node_ids,
-            node_labels=node_labels,
-        )
-        docentes_data = self._df['docentes_responsaveis'].fillna('').astype(str).tolist()
-        self._bipartite_grapher = DocenteDisciplinaGraphBuilder(
-            node_ids=node_ids,
-            node_labels=node_labels,
-            docentes_data=docentes_data
+        self._reader = reader
+        self._cache_dir = cache_dir
+        fingerprint = reader.source_fingerprint()
+        self._graph = StageGraph(cache_dir)
+        self._graph.add_source(
+            'dados',
+            key=content_key([fingerprint['sha256'], fingerprint['code_version']]),
+            load=reader.load,
         )
+        self._graph.add(NormalizeStage(text_cols=TEXT_COL))
+        self._graph.add(EmbeddingStage(
+            model_name=MODEL_EMBEDDING, backend=ENCODING_BACKEND, dtype=EMBEDDING_DTYPE
+        ))
+        self._graph.add(NeighborsStage(
+            k=neighbors_k(UMAP_PARAMS, TSNE_PARAMS, KNN_PARAMS), **NEIGHBORS_PARAMS
+        ))
+        if UMAP_PARAMS.get('pca') or TSNE_PARAMS.get('pca'):
+            self._graph.add(PcaStage(**PCA_PARAMS))
+        self._graph.add(UmapStage(**UMAP_PARAMS))
+        self._graph.add(TsneStage(**TSNE_PARAMS))
+        self._graph.add(KnnStage(**KNN_PARAMS))
+        self._graph.add(LouvainStage(**LOUVAIN_PARAMS))
+        self._graph.add(DocentesStage())
+        self._graph.add(DashboardStage(institutos_alvo=institutos_alvo))
 
-        # -- 4. Louvain community ---
-        self._detector = LouvainCommunityDetector(
-            graph=self._grapher.graph, 
-            random_state=42
-        )
+    @property
+    def stages(self) -> list[str]:
+        return self._graph.names
 
-        # --- 4. Grafo Bipartido (Novo) ---
-        # Tratamento para garantir que seja string e lidar com NaNs
-        docentes_data = self._df['docentes_responsaveis'].fillna('').astype(str).tolist()
-        
-        self._bipartite_grapher = DocenteDisciplinaGraphBuilder(
-            node_ids=node_ids,
-            node_labels=node_labels,
-            docentes_data=docentes_data
-        )
+    def plan(self, force: Collection[str] = ()) -> list[PlannedStage]:
+        """Etapas que seriam refeitas, sem executar nenhuma."""
+        return self._graph.plan(force)
 
-    def __call__(self) -> None:
+    def __call__(
+        self,
+        force: Collection[str] = (),
+        jobs: int = 1,
+        profile: Collection[str] = (),
+    ) -> tuple[list[PlannedStage], Path]:
         """
-        Executa o pipeline de transformação de dados e salva os artefatos.
+        Refaz as etapas desatualizadas e publica os artefatos lidos pelo dashboard.
+
+        Devolve o plano executado, com as medidas de cada etapa refeita, e o caminho do
+        relatório da execução.
+
+        Args:
+            force: Etapas a refazer mesmo com o artefato em cache ('all' para todas).
+            jobs: Número de processos para as etapas independentes.
+            profile: Etapas cujo build roda sob o cProfile, com as estatísticas gravadas
+                junto do relatório.
         """
-        if (umap_data_path.exists() and
-            tsne_data_path.exists()): # TODO: adicionar artefatos do dashboard
-            # Se os arquivos já existem, não precisa reprocessar tudo
-            return
-
-        self._execute()
-
-        if (self._umapper is None or 
-            self._grapher is None or 
-            self._bipartite_grapher is None):
-            raise RuntimeError("Pipeline incompleto. Transformadores estão Nulos.")
-
-        # Etapa 1: Salvar UMAP
-        self._umapper.to_file(
-            umap_data_path,
-            extra_cols={
-                'codigo': self._df['codigo'],
-                'disciplina': self._df['disciplina'],
-                'commissao': self._df['commissao'],
-            }
-        )
-        self._tsner.to_file(
-            tsne_data_path,
-            extra_cols={
-                'codigo': self._df['codigo'],
-                'disciplina': self._df['disciplina'],
-                'commissao': self._df['commissao'],
-            }
-        )
+        current_run = run_id()
+        profile_paths = {
+            name: reports_dir(self._cache_dir) / f'{current_run}-{name}.prof'
+            for name in profile
+        }
+        started_at = datetime.now()
+        with profiled() as total:
+            # atualiza o dataframe pré-processado uma vez, antes que os workers o leiam
+            with profiled() as dados:
+                self._reader.load(columns=[])
+            plan = self._graph.run(force, jobs=jobs, profile_paths=profile_paths)
 
-        # TODO: adaptar API do DashboardArtifactGenerator
-        DashboardArtifactGenerator(
-            df_raw=self._df,
-            df_comm=self._detector.dataframe,
-            knn_graph=self._grapher.graph,
-            output_dir=BASE_DIR / 'grade_horaria'
-        ).run()
+        report = {
+            'run_id': current_run,
+            'started_at': started_at.isoformat(timespec='seconds'),
+            'jobs': jobs,
+            'force': list(force),
+            'total': profile_dict(total),
+            'dados': profile_dict(dados),
+            'stages': [
+                {
+                    'name': planned.name,
+                    'key': planned.key,
+                    'action': planned.action,
+                    'reason': planned.reason,
+                    'artifact_bytes': planned.size,
+                    **planned.summary,
+                    **profile_dict(planned.profile),
+                }
+                for planned in plan
+            ],
+            'cprofile': {
+                name: str(path) for name, path in profile_paths.items() if path.exists()
+            },
+        }
+        return plan, write_report(self._cache_dir, report)
 
+    def history(self) -> list[dict[str, Any]]:
+        """Relatórios das execuções anteriores do pipeline."""
+        return read_history(self._cache_dir)
 
-        # 3. ADICIONADO (CASO 2): Roda o dashboard ao final do processo
-        self._run_dashboard_gen()
 
+def print_plan(plan: list[PlannedStage]) -> None:
+    labels = {'cached': 'em cache', 'build': 'refazer', 'forced': 'refazer'}
+    for planned in plan:
+        reason = f' ({planned.reason})' if planned.reason else ''
+        print(f"  {planned.name:<12} {planned.key}  {labels[planned.action]}{reason}")
+        if planned.profile is not None:
+            print(
+                f"  {'':<12} {planned.profile.wall_secs:.1f}s, "
+                f"CPU {planned.profile.cpu_secs:.1f}s, "
+                f"pico RSS {planned.profile.peak_rss_bytes / 2**20:.0f} MB, "
+                f"artefato {(planned.size or 0) / 2**20:.1f} MB"
+            )
+        if 'explained_variance' in planned.summary:
+            print(f"  {'':<12} variância explicada {planned.summary['explained_variance']:.1%}")
+
+
+def print_history(history: list[dict[str, Any]]) -> None:
+    """Tempo de relógio de cada etapa refeita nas execuções anteriores."""
+    for report in history:
+        stages = ', '.join(
+            f"{stage['name']} {stage['wall_secs']:.1f}s"
+            for stage in report['stages']
+            if 'wall_secs' in stage
+        )
+        print(f"  {report['run_id']}  {report['total']['wall_secs']:>7.1f}s  {stages or 'tudo em cache'}")
 
 
 if __name__ == "__main__":
@@ -138,5 +477,37 @@ if __name__ == "__main__":
         scrapped_data_path=scrapper_data_path,
         output_dataframe_path=preprocessed_data_path
     )
-    pipeline = DataTransformerPipeline(reader.dataframe)
-    pipeline() # TODO: evitar executar todas as etapas se os arquivos já existirem
+    pipeline = DataTransformerPipeline(reader)
+
+    parser = argparse.ArgumentParser(description="Gera os artefatos do dashboard.")
+    parser.add_argument(
+        '--force', action='append', default=[], choices=pipeline.stages + ['all'],
+        metavar='ETAPA',
+        help=f"refaz a etapa mesmo em cache, pode ser repetido ({', '.join(pipeline.stages)} ou all)",
+    )
+    parser.add_argument(
+        '--jobs', type=int, default=min(4, os.cpu_count() or 1),
+        help="processos para as etapas independentes (padrão: %(default)s, 1 desliga o paralelismo)",
+    )
+    parser.add_argument(
+        '--profile', action='append', default=[], choices=pipeline.stages, metavar='ETAPA',
+        help="grava as estatísticas do cProfile da etapa, se refeita (combine com --force)",
+    )
+    parser.add_argument(
+        '--dry-run', action='store_true',
+        help="só mostra quais etapas seriam refeitas",
+    )
+    parser.add_argument(
+        '--history', action='store_true',
+        help="mostra os tempos das execuções anteriores",
+    )
+    args = parser.parse_args()
+
+    if args.history:
+        print_history(pipeline.history())
+    elif args.dry_run:
+        print_plan(pipeline.plan(args.force))
+    else:
+        plan, report_path = pipeline(args.force, jobs=args.jobs, profile=args.profile)
+        print_plan(plan)
+        print(f"Relatório da execução: {report_path}")
@@ -0,0 +1,140 @@
+"""
+Instrumentação das etapas do pipeline.
+
+Cada etapa refeita é medida com `profiled`: tempo de relógio, tempo de CPU do processo
+(inclui as threads do numba, torch, ...) e pico de memória residente, amostrado por uma
+thread enquanto a etapa roda. `write_report` grava o relatório da execução em
+`<cache_dir>/reports/<timestamp>.json` e acrescenta uma linha em `history.jsonl`, para
+comparar execuções.
+"""
+
+import cProfile
+import json
+import os
+import resource
+import sys
+import threading
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter, process_time
+from typing import Any, Iterator
+
+REPORTS_DIR_NAME = 'reports'
+HISTORY_NAME = 'history.jsonl'
+
+# intervalo entre as amostras de memória residente
+RSS_SAMPLE_SECS = 0.05
+
+
+@dataclass
+class StageProfile:
+    wall_secs: float = 0.0
+    cpu_secs: float = 0.0
+    peak_rss_bytes: int = 0
+
+
+def _current_rss() -> int | None:
+    """Memória residente atual do processo, None fora do Linux."""
+    try:
+        with open('/proc/self/statm', encoding='ascii') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        return None
+
+
+def _max_rss() -> int:
+    """Pico de memória residente desde o início do processo."""
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kB no Linux, bytes no macOS
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+class _RssSampler(threading.Thread):
+    def __init__(self) -> None:
+        super().__init__(daemon=True)
+        self.peak = _current_rss() or 0
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(RSS_SAMPLE_SECS):
+            self.peak = max(self.peak, _current_rss() or 0)
+
+    def stop(self) -> int:
+        self._stop_event.set()
+        self.join()
+        return max(self.peak, _current_rss() or 0)
+
+
+@contextmanager
+def profiled(profile_path: Path | None = None) -> Iterator[StageProfile]:
+    """
+    Mede o bloco, preenchendo o `StageProfile` devolvido ao sair.
+
+    Args:
+        profile_path: Se definido, o bloco roda sob o cProfile e as estatísticas são
+            gravadas nesse arquivo (e.g. para `snakeviz` ou `flameprof`).
+    """
+    profile = StageProfile()
+    sampler = _RssSampler() if _current_rss() is not None else None
+    if sampler is not None:
+        sampler.start()
+    profiler = cProfile.Profile() if profile_path is not None else None
+
+    wall_started, cpu_started = perf_counter(), process_time()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield profile
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        profile.wall_secs = perf_counter() - wall_started
+        profile.cpu_secs = process_time() - cpu_started
+        # sem /proc, o pico desde o início do processo é o melhor disponível
+        profile.peak_rss_bytes = sampler.stop() if sampler is not None else _max_rss()
+        if profiler is not None:
+            profile_path.parent.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(profile_path)
+
+
+def artifact_size(path: Path) -> int | None:
+    """Tamanho em bytes de um artefato (arquivo ou diretório), None se não existir."""
+    if path.is_dir():
+        return sum(file.stat().st_size for file in path.rglob('*') if file.is_file())
+    if path.exists():
+        return path.stat().st_size
+    return None
+
+
+def reports_dir(cache_dir: Path) -> Path:
+    return cache_dir / REPORTS_DIR_NAME
+
+
+def run_id() -> str:
+    return datetime.now().strftime('%Y%m%dT%H%M%S')
+
+
+def write_report(cache_dir: Path, report: dict[str, Any]) -> Path:
+    """Grava o relatório de uma execução e o acrescenta ao histórico."""
+    directory = reports_dir(cache_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{report['run_id']}.json"
+    path.write_text(json.dumps(report, indent=2, default=str), encoding='utf-8')
+    with (directory / HISTORY_NAME).open('a', encoding='utf-8') as f:
+        f.write(json.dumps(report, default=str) + '\n')
+    return path
+
+
+def read_history(cache_dir: Path) -> list[dict[str, Any]]:
+    """Relatórios das execuções anteriores, da mais antiga para a mais recente."""
+    path = reports_dir(cache_dir) / HISTORY_NAME
+    if not path.exists():
+        return []
+    with path.open(encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def profile_dict(profile: StageProfile | None) -> dict[str, Any]:
+    return asdict(profile) if profile is not None else {}
@@ -5,14 +5,14 @@ import sys
 
 
 def check_data_exists():
-    return Path('src/data/output.json').exists()
+    return Path('src/data/shards/manifest.json').exists()
 
 def run_scraper():
     print("Data not found. Running scraper...")
     original_dir = os.getcwd()
     try:
         os.chdir('src/scraper')
-        subprocess.run(['scrapy', 'crawl', 'janus_disciplinas', '-o', '../data/output.json'], check=True)
+        subprocess.run(['scrapy', 'crawl', 'janus_disciplinas'], check=True)
     finally:
         os.chdir(original_dir)
 
@@ -0,0 +1,358 @@
+"""
+Grafo de etapas do pipeline com cache endereçado por conteúdo.
+
+Cada etapa declara as etapas de que depende, seus parâmetros e o código que a
+implementa. A chave de um artefato é o hash desses três itens (com as chaves das
+entradas no lugar das entradas), então um artefato só é refeito quando algo que o
+influencia muda: alterar só a perplexidade do t-SNE refaz só o t-SNE.
+
+Os artefatos ficam em `<cache_dir>/<etapa>/<chave><sufixo>`, e `<cache_dir>/<etapa>/
+latest.json` guarda a descrição do último build, usada para explicar por que uma
+etapa será refeita.
+
+Com `jobs > 1` as etapas independentes rodam em paralelo em um pool de processos: e.g.
+UMAP, t-SNE e k-NN, que só dependem dos embeddings e dos vizinhos, e o grafo de
+docentes, que só depende dos dados e roda junto com as etapas de texto. Os workers
+não recebem os valores das entradas: cada um lê os artefatos das entradas do disco, e
+uma matriz `.npy` carregada com `mmap_mode='r'` é compartilhada pelo cache de páginas
+do sistema em vez de copiada para cada processo.
+
+O build de cada etapa é medido (ver profiling.py) e o resultado fica no `PlannedStage`
+devolvido por `run`, junto do `summary` lido do artefato, que existe também quando a
+etapa vem do cache.
+"""
+
+import hashlib
+import inspect
+import json
+import shutil
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Collection
+
+from profiling import StageProfile, artifact_size, profiled
+
+DASHBOARD_DIR = Path(__file__).resolve().parent
+
+LATEST_NAME = 'latest.json'
+
+
+def content_key(value: Any) -> str:
+    payload = json.dumps(value, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+
+class Stage:
+    """
+    Etapa do pipeline.
+
+    Subclasses definem `name`, `inputs`, `suffix` (vazio para artefatos que são
+    diretórios), `code` (arquivos do dashboard que a implementam, além da própria
+    classe) e os métodos `build` e `load`.
+    """
+
+    name: str = ''
+    inputs: tuple[str, ...] = ()
+    suffix: str = ''
+    code: tuple[str, ...] = ()
+
+    def __init__(self, **params: Any) -> None:
+        self.params = params
+
+    def code_version(self) -> str:
+        digest = hashlib.sha256()
+        # a classe e as bases intermediárias, e.g. uma base comum a várias etapas
+        for cls in type(self).__mro__[:type(self).__mro__.index(Stage)]:
+            digest.update(inspect.getsource(cls).encode('utf-8'))
+        for path in self.code:
+            digest.update((DASHBOARD_DIR / path).read_bytes())
+        return digest.hexdigest()[:16]
+
+    def build(self, inputs: dict[str, Any], path: Path) -> None:
+        """Gera o artefato em `path` a partir dos valores das entradas."""
+        raise NotImplementedError
+
+    def load(self, path: Path) -> Any:
+        """Lê o artefato gerado por `build`."""
+        return path
+
+    def publish(self, path: Path) -> None:
+        """Copia o artefato para onde o dashboard o lê, se for o caso."""
+
+    def summary(self, path: Path) -> dict[str, Any]:
+        """Medidas lidas do artefato para o relatório, e.g. a variância explicada do PCA."""
+        return {}
+
+
+@dataclass
+class PlannedStage:
+    name: str
+    key: str
+    path: Path
+    action: str  # 'cached', 'build' ou 'forced'
+    reason: str
+    profile: StageProfile | None = None  # medidas do build, se a etapa foi refeita
+    size: int | None = None  # bytes do artefato
+    summary: dict[str, Any] = field(default_factory=dict)  # ver Stage.summary
+
+
+def _build_stage(
+    stage: Stage,
+    loaders: dict[str, Callable[[], Any]],
+    path: Path,
+    profile_path: Path | None = None,
+) -> StageProfile:
+    """Executa o build de uma etapa em um worker, lendo as entradas do disco."""
+    with profiled(profile_path) as profile:
+        stage.build({name: load() for name, load in loaders.items()}, path)
+    return profile
+
+
+class StageGraph:
+    def __init__(self, cache_dir: Path) -> None:
+        """
+        Args:
+            cache_dir: Diretório dos artefatos das etapas.
+        """
+        self._cache_dir = cache_dir
+        self._stages: dict[str, Stage] = {}
+        self._sources: dict[str, tuple[str, Callable[[], Any]]] = {}
+        self._keys: dict[str, str] = {}
+        self._values: dict[str, Any] = {}
+
+    def add_source(self, name: str, key: str, load: Callable[[], Any]) -> None:
+        """
+        Registra uma entrada externa ao cache, e.g. o dataframe pré-processado.
+
+        Args:
+            name: Nome usado nas `inputs` das etapas.
+            key: Identifica o conteúdo da entrada (e.g. o hash dos dados).
+            load: Devolve o valor da entrada, chamado só se alguma etapa precisar. Com
+                `jobs > 1` é enviado aos workers, então precisa ser serializável
+                (e.g. uma função do módulo ou um `functools.partial`).
+        """
+        self._sources[name] = (key, load)
+
+    def add(self, stage: Stage) -> None:
+        """Registra uma etapa, depois das etapas de que ela depende."""
+        for name in stage.inputs:
+            if name not in self._stages and name not in self._sources:
+                raise ValueError(f"Etapa '{stage.name}' depende de '{name}', não registrada")
+        self._stages[stage.name] = stage
+
+    @property
+    def names(self) -> list[str]:
+        return list(self._stages)
+
+    def _description(self, name: str) -> dict[str, Any]:
+        stage = self._stages[name]
+        return {
+            'stage': name,
+            'params': stage.params,
+            'code': stage.code_version(),
+            'inputs': {input_name: self.key(input_name) for input_name in stage.inputs},
+        }
+
+    def key(self, name: str) -> str:
+        if name in self._sources:
+            return self._sources[name][0]
+        if name not in self._keys:
+            self._keys[name] = content_key(self._description(name))
+        return self._keys[name]
+
+    def path(self, name: str) -> Path:
+        return self._cache_dir / name / f'{self.key(name)}{self._stages[name].suffix}'
+
+    def value(self, name: str) -> Any:
+        """Valor de uma entrada ou do artefato de uma etapa, lido uma única vez."""
+        if name not in self._values:
+            if name in self._sources:
+                self._values[name] = self._sources[name][1]()
+            else:
+                self._values[name] = self._stages[name].load(self.path(name))
+        return self._values[name]
+
+    def _reason(self, name: str) -> str:
+        """Explica o que mudou desde o último build da etapa."""
+        latest_path = self._cache_dir / name / LATEST_NAME
+        if not latest_path.exists():
+            return 'sem build anterior'
+
+        latest = json.loads(latest_path.read_text(encoding='utf-8'))
+        # ida e volta pelo JSON para comparar tuplas com listas
+        current = json.loads(json.dumps(self._description(name), default=str))
+        changes = [
+            f'{param}: {latest["params"].get(param)!r} -> {value!r}'
+            for param, value in current['params'].items()
+            if latest['params'].get(param) != value
+        ]
+        changes += [
+            f'entrada {input_name} mudou'
+            for input_name, key in current['inputs'].items()
+            if latest['inputs'].get(input_name) != key
+        ]
+        if latest['code'] != current['code']:
+            changes.append('código mudou')
+        return ', '.join(changes) or 'artefato removido do cache'
+
+    def plan(self, force: Collection[str] = ()) -> list[PlannedStage]:
+        """
+        Etapas na ordem de execução, indicando quais serão refeitas e por quê.
+
+        Args:
+            force: Etapas a refazer mesmo com o artefato em cache ('all' para todas).
+        """
+        unknown = set(force) - set(self._stages) - {'all'}
+        if unknown:
+            raise ValueError(f"Etapas desconhecidas: {', '.join(sorted(unknown))}")
+
+        plan = []
+        for name in self._stages:
+            path = self.path(name)
+            if name in force or 'all' in force:
+                action, reason = 'forced', '--force'
+            elif path.exists():
+                action, reason = 'cached', ''
+            else:
+                action, reason = 'build', self._reason(name)
+            plan.append(PlannedStage(name, self.key(name), path, action, reason))
+        return plan
+
+    def _tmp_path(self, name: str) -> Path:
+        path = self.path(name)
+        tmp_path = path.with_name(f'{self.key(name)}.tmp{self._stages[name].suffix}')
+        self._remove(tmp_path)
+        tmp_path.parent.mkdir(parents=True, exist_ok=True)
+        return tmp_path
+
+    def _commit(self, name: str, tmp_path: Path) -> None:
+        path = self.path(name)
+        self._remove(path)
+        tmp_path.rename(path)
+        self._values.pop(name, None)
+        (path.parent / LATEST_NAME).write_text(
+            json.dumps({'key': self.key(name), **self._description(name)}, indent=2),
+            encoding='utf-8',
+        )
+
+    def _loaders(self, name: str) -> dict[str, Callable[[], Any]]:
+        """Funções que leem as entradas de uma etapa do disco, enviadas aos workers."""
+        loaders = {}
+        for input_name in self._stages[name].inputs:
+            if input_name in self._sources:
+                loaders[input_name] = self._sources[input_name][1]
+            else:
+                loaders[input_name] = partial(self._stages[input_name].load, self.path(input_name))
+        return loaders
+
+    def build(self, name: str, profile_path: Path | None = None) -> StageProfile:
+        """
+        Gera o artefato de uma etapa, de forma atômica.
+
+        Args:
+            name: Etapa a refazer.
+            profile_path: Se definido, grava as estatísticas do cProfile do build.
+        """
+        stage = self._stages[name]
+        tmp_path = self._tmp_path(name)
+        try:
+            with profiled(profile_path) as profile:
+                inputs = {input_name: self.value(input_name) for input_name in stage.inputs}
+                stage.build(inputs, tmp_path)
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+
+        self._commit(name, tmp_path)
+        return profile
+
+    def _build_parallel(
+        self,
+        plan: list[PlannedStage],
+        jobs: int,
+        profile_paths: dict[str, Path],
+    ) -> None:
+        """Refaz as etapas do plano em um pool, cada uma assim que suas entradas estão prontas."""
+        pending = {planned.name: planned for planned in plan if planned.action != 'cached'}
+        running: dict[Future, tuple[PlannedStage, Path]] = {}
+
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            try:
+                while pending or running:
+                    blocked = set(pending) | {planned.name for planned, _ in running.values()}
+                    for name, planned in list(pending.items()):
+                        if blocked.intersection(self._stages[name].inputs):
+                            continue
+                        tmp_path = self._tmp_path(name)
+                        future = pool.submit(
+                            _build_stage,
+                            self._stages[name],
+                            self._loaders(name),
+                            tmp_path,
+                            profile_paths.get(name),
+                        )
+                        running[future] = (pending.pop(name), tmp_path)
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        planned, tmp_path = running.pop(future)
+                        planned.profile = future.result()
+                        self._commit(planned.name, tmp_path)
+            except BaseException:
+                # espera os builds em andamento para não deixar arquivos pela metade
+                pool.shutdown(wait=True, cancel_futures=True)
+                for _, tmp_path in running.values():
+                    self._remove(tmp_path)
+                raise
+
+    def run(
+        self,
+        force: Collection[str] = (),
+        jobs: int = 1,
+        profile_paths: dict[str, Path] | None = None,
+    ) -> list[PlannedStage]:
+        """
+        Refaz as etapas desatualizadas e publica os artefatos de todas.
+
+        Args:
+            force: Etapas a refazer mesmo com o artefato em cache ('all' para todas).
+            jobs: Número de processos para as etapas independentes, 1 roda tudo no
+                processo atual.
+            profile_paths: Etapas cujo build roda sob o cProfile, com o arquivo onde
+                gravar as estatísticas.
+        """
+        profile_paths = profile_paths or {}
+        plan = self.plan(force)
+        if jobs > 1:
+            self._build_parallel(plan, jobs, profile_paths)
+        else:
+            for planned in plan:
+                if planned.action != 'cached':
+                    planned.profile = self.build(planned.name, profile_paths.get(planned.name))
+        for planned in plan:
+            planned.size = artifact_size(planned.path)
+            planned.summary = self._stages[planned.name].summary(planned.path)
+            self._stages[planned.name].publish(planned.path)
+        return plan
+
+    @staticmethod
+    def _remove(path: Path) -> None:
+        if path.is_dir():
+            shutil.rmtree(path)
+        else:
+            path.unlink(missing_ok=True)
+
+
+def publish_artifact(path: Path, target: Path) -> None:
+    """Copia um artefato (arquivo ou diretório) do cache para `target`, de forma atômica."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_target = target.with_name(target.name + '.tmp')
+    StageGraph._remove(tmp_target)
+    if path.is_dir():
+        shutil.copytree(path, tmp_target)
+        StageGraph._remove(target)
+    else:
+        shutil.copy2(path, tmp_target)
+    tmp_target.replace(target)
@@ -0,0 +1,43 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from dataframe_grade_horaria import DashboardArtifactGenerator
+from utils.data.csr_graph import CsrGraph
+
+
+def test_dataset_dashboard_keeps_one_row_per_offering(tmp_path):
+    # SCC5001 é oferecida em duas áreas: duas linhas nos dados e nos textos
+    df_raw = pd.DataFrame({
+        'codigo': ['SCC5001', 'SCC5001', 'SCC5002', 'SCC5003'],
+        'disciplina': ['Algoritmos', 'Algoritmos', 'Grafos', 'Redes'],
+        'commissao': ['ICMC'] * 4,
+        'area_concentracao': ['Computação', 'Matemática', 'Computação', 'Computação'],
+    })
+    df_textos = pd.DataFrame({
+        'codigo': df_raw['codigo'],
+        'objetivos': ['ordenacao', 'ordenacao', 'grafos', 'redes'],
+        'texto': ['ordenacao', 'ordenacao', 'grafos', 'redes'],
+    })
+    df_comm = pd.DataFrame({
+        'codigo': ['SCC5001', 'SCC5002', 'SCC5003'],
+        'disciplina': ['Algoritmos', 'Grafos', 'Redes'],
+        'comunidade': [0, 1, 1],
+    })
+    generator = DashboardArtifactGenerator(
+        df_raw=df_raw,
+        df_comm=df_comm,
+        knn_graph=CsrGraph.from_edges(pd.DataFrame({'id': df_comm['codigo']}), [], []),
+        output_dir=tmp_path,
+        institutos_alvo=['ICMC'],
+        df_textos=df_textos,
+    )
+
+    df = generator._gerar_dataset_dashboard()
+
+    assert len(df) == len(df_raw)
+    assert df['area_concentracao'].tolist() == df_raw['area_concentracao'].tolist()
+    assert df['objetivos_normalizado'].tolist() == df_textos['objetivos'].tolist()
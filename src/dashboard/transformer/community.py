@@ -4,10 +4,12 @@ import community as community_louvain
 from typing import Dict, Optional, Any
 from pathlib import Path
 
+from utils.data.artifacts import write_artifact
+
 class LouvainCommunityDetector:
     """
     Carrega um grafo .graphml, detecta comunidades Louvain e salva
-    o resultado (disciplina, codigo, comunidade) em um arquivo .pickle.
+    o resultado (disciplina, codigo, comunidade) em um artefato Parquet.
     """
     
     def __init__(
@@ -85,15 +87,14 @@ class LouvainCommunityDetector:
 
     def to_file(self, path: Path) -> None:
         """
-        Gera o DataFrame de comunidades e o salva em um arquivo pickle.
+        Gera o DataFrame de comunidades e o salva em um artefato Parquet.
 
         O DataFrame conterá as colunas: 'disciplina', 'codigo', 'comunidade'.
         
         Args:
-            path: O caminho do arquivo .pickle de saída.
+            path: O caminho do arquivo .parquet de saída.
         """
         if path.exists():
             return # Sai silenciosamente se o arquivo já existe
 
-        path.parent.mkdir(parents=True, exist_ok=True)
-        self.dataframe.to_pickle(path)
+        write_artifact(self.dataframe, path)
@@ -2,60 +2,62 @@
 Transforma textos em embeddings.
 """
 
+from pathlib import Path
+
 import numpy as np
-import nltk
-from nltk.corpus import stopwords
-from sentence_transformers import SentenceTransformer
-import re
+
+from transformer.encoding import CpuEncoder
+from transformer.normalize import TextNormalizer
+from utils.data.embedding_store import EmbeddingStore
 
 class DataEmbedder:
     def __init__(
         self, 
         model_name: str,
-        texts: list[str] | None = None
+        texts: list[str] | None = None,
+        store_dir: Path | None = None,
+        batch_size: int = 64,
+        processes: int = 1,
+        backend: str = 'torch',
+        export_dir: Path | None = None,
+        normalized: bool = False,
     ) -> None:
         """
         Inicializa o DataEmbedder com o nome do modelo de embedding.
 
-        Configura as stopwords em português e inglês e uma fez chamado, 
-        carrega o modelo de embeddings e retorna os array de embeddings 
-        para os textos fornecidos.        
+        Uma vez chamado, normaliza os textos (ver transformer/normalize.py), a menos
+        que `normalized` indique que já foram normalizados, carrega o modelo de
+        embeddings e retorna os array de embeddings para os textos fornecidos.
+
+        Com `store_dir`, os embeddings ficam guardados em disco por (modelo, hash do
+        texto normalizado) e só os textos novos ou alterados passam pelo modelo.
+
+        `batch_size`, `processes`, `backend` e `export_dir` configuram a codificação
+        (ver transformer/encoding.py).
         """
-        try:
-            nltk.data.find('corpora/stopwords')
-        except LookupError:
-            print("Baixando stopwords (pt e en) do NLTK...")
-            nltk.download('stopwords')
-            
-        stop_words_pt = set(stopwords.words('portuguese'))
-        stop_words_en = set(stopwords.words('english'))
-        self._stop_words: set[str] = stop_words_pt.union(stop_words_en)
         self._texts = texts
+        self._normalized = normalized
         self._model_name = model_name
+        self._encoder = CpuEncoder(
+            model_name,
+            batch_size=batch_size,
+            processes=processes,
+            backend=backend,
+            export_dir=export_dir,
+        )
+        # embeddings de backends diferentes (e.g. int8) não se misturam no store
+        store_key = model_name if backend == 'torch' else f'{model_name}@{backend}'
+        self._store = EmbeddingStore(store_dir, store_key) if store_dir is not None else None
 
     def transform(self) -> np.ndarray:
-        model = SentenceTransformer(self._model_name)
-        return model.encode(
-            [
-                self._filter_stopwords(text, self._stop_words)
-                for text in self._texts
-            ], 
-            show_progress_bar=True
-        )
+        texts = self._texts if self._normalized else TextNormalizer().transform(self._texts)
+        if self._store is None:
+            return self._encode(texts)
 
-    def _filter_stopwords(self, text: str, stop_words: set[str]) -> str:
-        """
-        Remove stopwords de um texto.
-        """
-        if not isinstance(text, str):
-            return "" 
-        
-        text = text.lower()
-        text = re.sub(r'[^a-z\s]', '', text) 
-        
-        palavras = [
-            palavra for palavra in text.split() 
-            if palavra not in stop_words and len(palavra) > 2
-        ]
-
-        return ' '.join(palavras)
+        n_cached = len(self._store)
+        embeddings = self._store.encode(texts, self._encode)
+        print(f"{len(self._store) - n_cached} de {len(texts)} textos codificados, o resto veio do cache")
+        return embeddings
+
+    def _encode(self, texts: list[str]) -> np.ndarray:
+        return self._encoder.encode(texts)
@@ -0,0 +1,136 @@
+"""
+Codificação de textos em CPU com foco em vazão.
+
+Os textos são ordenados pelo comprimento em caracteres, que acompanha o comprimento em
+tokens sem uma tokenização a mais, e agrupados em lotes de tamanho parecido, então cada
+lote tem pouco padding. Opcionalmente os lotes são divididos entre vários processos, e
+o modelo pode rodar pelo ONNX Runtime, em float32 ou quantizado em
+int8 (exportado localmente na primeira execução).
+"""
+
+import os
+from pathlib import Path
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+from tqdm.auto import tqdm
+
+BACKENDS = ('torch', 'onnx', 'onnx-int8')
+
+
+class CpuEncoder:
+    def __init__(
+        self,
+        model_name: str,
+        batch_size: int = 64,
+        processes: int = 1,
+        backend: str = 'torch',
+        quantization: str = 'avx2',
+        export_dir: Path | None = None,
+    ) -> None:
+        """
+        Args:
+            model_name: Nome do modelo do sentence-transformers.
+            batch_size: Textos por lote.
+            processes: Processos de codificação, 1 codifica no processo atual.
+            backend: 'torch', 'onnx' ou 'onnx-int8'. Os backends ONNX precisam de
+                `sentence-transformers[onnx]`.
+            quantization: Conjunto de instruções da quantização int8 ('avx2', 'avx512',
+                'avx512_vnni' ou 'arm64').
+            export_dir: Diretório onde o modelo quantizado é exportado, obrigatório com
+                o backend 'onnx-int8'.
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Backend desconhecido: {backend}, use um de {', '.join(BACKENDS)}")
+        if backend == 'onnx-int8' and export_dir is None:
+            raise ValueError("O backend 'onnx-int8' precisa de um export_dir")
+
+        self._model_name = model_name
+        self._batch_size = batch_size
+        self._processes = processes
+        self._backend = backend
+        self._quantization = quantization
+        self._export_dir = export_dir
+        self._model: SentenceTransformer | None = None
+
+    @property
+    def model(self) -> SentenceTransformer:
+        if self._model is None:
+            self._model = self._load_model()
+        return self._model
+
+    def _load_model(self) -> SentenceTransformer:
+        if self._backend == 'torch':
+            return SentenceTransformer(self._model_name, device='cpu')
+        if self._backend == 'onnx':
+            return SentenceTransformer(self._model_name, device='cpu', backend='onnx')
+
+        from sentence_transformers import export_dynamic_quantized_onnx_model
+
+        model_dir = self._export_dir / self._model_name.replace('/', '__')
+        file_name = f'onnx/model_qint8_{self._quantization}.onnx'
+        if not (model_dir / file_name).exists():
+            print(f"Exportando {self._model_name} para ONNX int8 em {model_dir}...")
+            model = SentenceTransformer(self._model_name, device='cpu', backend='onnx')
+            model.save_pretrained(str(model_dir))
+            export_dynamic_quantized_onnx_model(
+                model,
+                quantization_config=self._quantization,
+                model_name_or_path=str(model_dir),
+            )
+        return SentenceTransformer(
+            str(model_dir),
+            device='cpu',
+            backend='onnx',
+            model_kwargs={'file_name': file_name},
+        )
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        """Embeddings dos textos, na ordem em que foram dados."""
+        if not texts:
+            return np.empty((0, self.model.get_sentence_embedding_dimension()), dtype=np.float32)
+
+        # do maior para o menor, lotes vizinhos têm comprimentos parecidos
+        lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+        order = np.argsort(-lengths, kind='stable')
+        sorted_texts = [texts[i] for i in order]
+
+        if self._processes > 1:
+            embeddings = self._encode_pool(sorted_texts)
+        else:
+            embeddings = np.concatenate([
+                self.model.encode(
+                    sorted_texts[start:start + self._batch_size],
+                    batch_size=self._batch_size,
+                    convert_to_numpy=True,
+                )
+                for start in tqdm(
+                    range(0, len(sorted_texts), self._batch_size), desc='Lotes', unit='lote'
+                )
+            ])
+
+        result = np.empty_like(embeddings, dtype=np.float32)
+        result[order] = embeddings
+        return result
+
+    def _encode_pool(self, sorted_texts: list[str]) -> np.ndarray:
+        # cada processo usa uma fração dos núcleos, em vez de todos disputarem todos
+        os.environ.setdefault(
+            'OMP_NUM_THREADS', str(max(1, (os.cpu_count() or 1) // self._processes))
+        )
+        pool = self.model.start_multi_process_pool(target_devices=['cpu'] * self._processes)
+        try:
+            # chunks contíguos da lista ordenada mantêm os lotes homogêneos
+            chunk_size = max(
+                self._batch_size,
+                -(-len(sorted_texts) // (self._processes * 4)) // self._batch_size * self._batch_size,
+            )
+            return self.model.encode(
+                sorted_texts,
+                pool=pool,
+                batch_size=self._batch_size,
+                chunk_size=chunk_size,
+                convert_to_numpy=True,
+            )
+        finally:
+            self.model.stop_multi_process_pool(pool)
@@ -1,88 +1,126 @@
 """
-Conecta embeddings de nós para construir um grafo k-NN usando NetworkX.
+Conecta embeddings de nós para construir um grafo k-NN.
+
+O grafo é salvo como CSR + atributos dos nós (ver utils/data/csr_graph.py); `graph`
+converte para NetworkX quando um algoritmo precisa dele.
 """
 
 from typing import Self
 from pathlib import Path
 
 import numpy as np
+import scipy.sparse as sp
 
 import networkx as nx
-from sklearn.neighbors import NearestNeighbors
+import pandas as pd
+
+from transformer.knn import BLOCK_SIZE, knn_adjacency, nearest_neighbors
+from utils.data.csr_graph import CsrGraph
 
 
 class KNNGraphBuilder:
     def __init__(
         self, 
-        embeddings: np.ndarray,
+        embeddings: np.ndarray | None,
         node_ids: list[str], 
         node_labels: list[str], 
-        k: int = 5
+        k: int = 5,
+        method: str = 'exact',
+        block_size: int = BLOCK_SIZE,
+        neighbors: tuple[np.ndarray, np.ndarray] | None = None,
     ) -> None:
         """
         Utiliza algoritmos não-supervisionados para construir um grafo k-NN a partir de embeddings.
         
         Args:
-            embeddings: Matriz de embeddings dos nós.
+            embeddings: Matriz de embeddings dos nós. Pode ser None com `neighbors`.
             node_ids: Lista de IDs únicos para cada nó, e.g, códigos de disciplinas.
             node_labels: Lista de labels (nomes) para cada nó, e.g, nomes de disciplinas.
             path: Path para salvar o grafo gerado.
             k: Número de vizinhos mais próximos para conectar no grafo.
+            method: 'exact' (produto escalar em blocos) ou 'approx' (NNDescent), ver
+                transformer/knn.py.
+            block_size: Linhas por bloco do método exato.
+            neighbors: Índices e similaridades já calculados (etapa 'vizinhos'), com
+                pelo menos k colunas; as k primeiras são usadas no lugar da busca.
         """
         self._embeddings = embeddings
         self._node_ids = node_ids
         self._node_labels = node_labels
         self._k = k
+        self._method = method
+        self._block_size = block_size
+        self._neighbors = neighbors
+        self._adjacency: sp.csr_matrix | None = None
         self._graph: nx.Graph | None = None
 
     @property
     def graph(self) -> nx.Graph:
+        """
+        Grafo NetworkX, montado da adjacência só quando pedido, com a similaridade de
+        cosseno como `weight` e `1 - similaridade` como `distance`.
+        """
         if self._graph is None:
-            self.transform()
+            # cada aresta uma vez, do triângulo superior
+            upper = sp.triu(self.adjacency, k=1).tocoo()
+            node_ids = np.asarray(self._node_ids, dtype=object)
+
+            self._graph = nx.Graph()
+            self._graph.add_nodes_from(
+                (node_id, {'label': label})
+                for node_id, label in zip(self._node_ids, self._node_labels)
+            )
+            self._graph.add_edges_from(
+                (source, target, {'weight': weight, 'distance': 1.0 - weight})
+                for source, target, weight in zip(
+                    node_ids[upper.row], node_ids[upper.col], upper.data.astype(float).tolist()
+                )
+            )
 
         return self._graph
 
-    def transform(self) -> None:
+    @property
+    def csr_graph(self) -> CsrGraph:
         """
-        Constrói um grafo NetworkX conectando os k-vizinhos mais próximos.
-        
-        Utiliza o algoritmo de NearestNeighbors do scikit-learn para encontrar os vizinhos
-        mais próximos com base nos embeddings fornecidos.
+        Grafo CSR, com `label` como atributo dos nós. Uma disciplina oferecida em mais de
+        uma área tem uma linha de embeddings por oferta; as linhas com o mesmo ID viram um
+        só nó, com as arestas de todas elas, como no grafo NetworkX.
         """
-        if self._graph is None:
-            self._graph = nx.Graph()
+        return CsrGraph(
+            self.adjacency,
+            pd.DataFrame({'id': self._node_ids, 'label': self._node_labels}),
+        ).merge_duplicates()
 
-        nn = NearestNeighbors(
-            n_neighbors=self._k + 1,  # k+1 pois o primeiro é o próprio ponto
-            metric='cosine', 
-            algorithm='brute'
-        )
-        nn.fit(self._embeddings)
-        
-        # Obtemos os índices dos vizinhos para cada ponto
-        # Não precisamos das distâncias, apenas dos índices
-        indices = nn.kneighbors(self._embeddings, return_distance=False)
-
-        # Adiciona todos os nós e seus metadados
-        for i, node_id in enumerate(self._node_ids):
-            self._graph.add_node(node_id, label=self._node_labels[i])
-
-        for i, neighbors in enumerate(indices):
-            origem_id = self._node_ids[i]
-            
-            # Iteramos de 1 a k (pulamos o 0, que é o self-loop)
-            for j in range(1, self._k + 1): 
-                vizinho_idx = neighbors[j]
-                vizinho_id = self._node_ids[vizinho_idx]
-                
-                # Adicionamos a aresta (o Grafo lida com duplicatas)
-                self._graph.add_edge(origem_id, vizinho_id)
+    @property
+    def adjacency(self) -> sp.csr_matrix:
+        """Adjacência esparsa simétrica, na ordem de `node_ids`, com a similaridade como peso."""
+        if self._adjacency is None:
+            self.transform()
+
+        return self._adjacency
+
+    def transform(self) -> None:
+        """
+        Conecta os k-vizinhos mais próximos, montando a adjacência esparsa de uma vez a
+        partir dos vizinhos.
+        """
+        if self._neighbors is not None:
+            indices, similarities = self._neighbors
+            if indices.shape[1] < min(self._k, len(indices) - 1):
+                raise ValueError(f"{indices.shape[1]} vizinhos calculados, o grafo usa k={self._k}")
+            indices = np.asarray(indices[:, :self._k])
+            similarities = np.asarray(similarities[:, :self._k])
+        else:
+            indices, similarities = nearest_neighbors(
+                self._embeddings, self._k, method=self._method, block_size=self._block_size
+            )
+        self._adjacency = knn_adjacency(indices, similarities)
 
     def to_file(self, path: Path) -> None:
         """
-        Salva o grafo em um arquivo no formato GraphML.
+        Salva o grafo CSR no diretório `path`.
         """
         if path.exists():
             return
 
-        nx.write_graphml(self.graph, path)
+        self.csr_graph.write(path)
@@ -0,0 +1,145 @@
+"""
+Vizinhos mais próximos por similaridade de cosseno.
+
+O caminho exato normaliza as linhas e calcula os produtos escalares em blocos de linhas,
+então a memória usada é `block_size x n` em vez de `n x n`. O aproximado usa o
+NNDescent do pynndescent (dependência do umap-learn). Os dois devolvem, para cada
+linha, os índices dos k vizinhos (sem a própria linha) e as similaridades, que viram os
+pesos da matriz de adjacência esparsa do grafo k-NN.
+
+A etapa 'vizinhos' do pipeline calcula os vizinhos uma vez, para o maior k que o grafo
+k-NN, o UMAP e o t-SNE usam, e salva com `write_neighbors`; cada um deles lê as
+primeiras colunas de que precisa.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import scipy.sparse as sp
+
+METHODS = ('exact', 'approx')
+
+# linhas por bloco do produto escalar: 2048 x 30k similaridades float32 são ~250 MB
+BLOCK_SIZE = 2048
+
+# peso mínimo de uma aresta da adjacência
+MIN_WEIGHT = 1e-6
+
+
+def normalize_rows(embeddings: np.ndarray) -> np.ndarray:
+    """Cópia float32 com as linhas de norma 1 (linhas nulas ficam nulas)."""
+    vectors = np.array(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
+
+
+def knn_exact(
+    embeddings: np.ndarray,
+    k: int,
+    block_size: int = BLOCK_SIZE,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    k vizinhos exatos de cada linha por similaridade de cosseno.
+
+    Returns:
+        Índices (n, k) e similaridades (n, k) dos vizinhos, do mais ao menos similar.
+    """
+    vectors = normalize_rows(embeddings)
+    n = len(vectors)
+    k = min(k, n - 1)
+    indices = np.empty((n, k), dtype=np.int32)
+    similarities = np.empty((n, k), dtype=np.float32)
+
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        block = vectors[start:stop] @ vectors.T
+        # a própria linha não é vizinha dela mesma
+        block[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+
+        top = np.argpartition(block, -k, axis=1)[:, -k:]
+        top_similarities = np.take_along_axis(block, top, axis=1)
+        order = np.argsort(-top_similarities, axis=1, kind='stable')
+        indices[start:stop] = np.take_along_axis(top, order, axis=1)
+        similarities[start:stop] = np.take_along_axis(top_similarities, order, axis=1)
+
+    return indices, similarities
+
+
+def knn_approx(
+    embeddings: np.ndarray,
+    k: int,
+    random_state: int = 42,
+) -> tuple[np.ndarray, np.ndarray]:
+    """k vizinhos aproximados de cada linha (NNDescent), no formato de `knn_exact`."""
+    from pynndescent import NNDescent
+
+    vectors = normalize_rows(embeddings)
+    k = min(k, len(vectors) - 1)
+    index = NNDescent(vectors, metric='cosine', n_neighbors=k + 1, random_state=random_state)
+    neighbors, distances = index.neighbor_graph
+
+    # remove a própria linha, que normalmente é o primeiro vizinho mas pode não ser
+    # quando há vetores repetidos
+    not_self = neighbors != np.arange(len(vectors))[:, None]
+    keep = np.cumsum(not_self, axis=1) <= k
+    mask = not_self & keep
+    indices = neighbors[mask].reshape(len(vectors), k).astype(np.int32)
+    similarities = (1.0 - distances[mask]).reshape(len(vectors), k).astype(np.float32)
+    return indices, similarities
+
+
+def nearest_neighbors(
+    embeddings: np.ndarray,
+    k: int,
+    method: str = 'exact',
+    block_size: int = BLOCK_SIZE,
+    random_state: int = 42,
+) -> tuple[np.ndarray, np.ndarray]:
+    if method == 'exact':
+        return knn_exact(embeddings, k, block_size=block_size)
+    if method == 'approx':
+        return knn_approx(embeddings, k, random_state=random_state)
+    raise ValueError(f"Método desconhecido: {method}, use um de {', '.join(METHODS)}")
+
+
+def knn_adjacency(indices: np.ndarray, similarities: np.ndarray) -> sp.csr_matrix:
+    """
+    Matriz de adjacência simétrica do grafo k-NN, montada de uma vez a partir dos vizinhos.
+
+    Uma aresta existe se um dos nós está entre os k vizinhos do outro, com a similaridade
+    como peso.
+    """
+    n, k = indices.shape
+    rows = np.repeat(np.arange(n, dtype=np.int32), k)
+    # pesos positivos: uma entrada nula sumiria da matriz esparsa, e o Louvain não
+    # lida com pesos negativos
+    weights = np.clip(similarities.ravel(), MIN_WEIGHT, None)
+    adjacency = sp.csr_matrix((weights, (rows, indices.ravel())), shape=(n, n))
+    # A + A.T somaria o peso das arestas mútuas, o máximo mantém a similaridade
+    return adjacency.maximum(adjacency.T).tocsr()
+
+
+def tsne_neighbors(perplexity: float) -> int:
+    """Vizinhos por ponto que o t-SNE do sklearn usa para uma perplexidade."""
+    return int(3.0 * perplexity + 1)
+
+
+def cosine_distances(similarities: np.ndarray) -> np.ndarray:
+    """Distâncias de cosseno float32, sem os negativos que o arredondamento produz."""
+    return np.clip(1.0 - np.asarray(similarities, dtype=np.float32), 0.0, 2.0)
+
+
+def write_neighbors(path: Path, indices: np.ndarray, similarities: np.ndarray) -> None:
+    """Salva os vizinhos no diretório `path` (`indices.npy` e `similarities.npy`)."""
+    path.mkdir(parents=True, exist_ok=True)
+    np.save(path / 'indices.npy', np.ascontiguousarray(indices, dtype=np.int32))
+    np.save(path / 'similarities.npy', np.ascontiguousarray(similarities, dtype=np.float32))
+
+
+def read_neighbors(path: Path) -> tuple[np.ndarray, np.ndarray]:
+    """Índices e similaridades salvos por `write_neighbors`, mapeados em memória."""
+    return (
+        np.load(path / 'indices.npy', mmap_mode='r'),
+        np.load(path / 'similarities.npy', mmap_mode='r'),
+    )
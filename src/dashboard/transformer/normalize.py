@@ -0,0 +1,112 @@
+"""
+Normaliza os textos das ementas para embeddings, nuvens de palavras e buscas.
+
+A normalização preserva os acentos: o texto é levado à forma NFC e minúsculas, e os
+tokens são as sequências de letras Unicode (`análise` continua `análise`), sem dígitos
+nem pontuação. Tokens com até 2 letras e stopwords em português e inglês são removidos.
+"""
+
+import re
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import filterfalse
+from typing import Iterable
+
+import pandas as pd
+
+MIN_TOKEN_LENGTH = 3
+
+# sequências de letras Unicode (\w sem dígitos e sem _) com o tamanho mínimo; sequências
+# mais curtas não casam, então o filtro de tamanho fica no próprio regex
+TOKEN_PATTERN = re.compile(rf'[^\W\d_]{{{MIN_TOKEN_LENGTH},}}')
+
+
+def load_stop_words() -> frozenset[str]:
+    """Stopwords em português e inglês do NLTK, baixadas se necessário."""
+    import nltk
+    from nltk.corpus import stopwords
+
+    try:
+        nltk.data.find('corpora/stopwords')
+    except LookupError:
+        print("Baixando stopwords (pt e en) do NLTK...")
+        nltk.download('stopwords')
+
+    words = stopwords.words('portuguese') + stopwords.words('english')
+    return frozenset(unicodedata.normalize('NFC', word.lower()) for word in words)
+
+
+def normalize_text(text: str | None, stop_words: frozenset[str]) -> str:
+    if not isinstance(text, str):
+        return ''
+
+    if not unicodedata.is_normalized('NFC', text):
+        text = unicodedata.normalize('NFC', text)
+    return ' '.join(filterfalse(stop_words.__contains__, TOKEN_PATTERN.findall(text.lower())))
+
+
+def _normalize_chunk(texts: list[str | None], stop_words: frozenset[str]) -> list[str]:
+    return [normalize_text(text, stop_words) for text in texts]
+
+
+def join_columns(df: pd.DataFrame, columns: Iterable[str]) -> pd.Series:
+    """Concatena as colunas com espaços, ignorando valores ausentes, sem iterar linhas."""
+    columns = list(columns)
+    joined = df[columns[0]].fillna('').astype(str).str.cat(
+        [df[col].fillna('').astype(str) for col in columns[1:]], sep=' '
+    )
+    return joined.str.replace(r'\s{2,}', ' ', regex=True).str.strip()
+
+
+class TextNormalizer:
+    def __init__(
+        self,
+        stop_words: frozenset[str] | None = None,
+        processes: int = 1,
+        chunk_size: int = 2000,
+    ) -> None:
+        """
+        Args:
+            stop_words: Tokens removidos. Usa as stopwords do NLTK se None.
+            processes: Processos para normalizar os chunks, 1 normaliza no processo atual.
+            chunk_size: Textos por chunk enviado a cada processo.
+        """
+        self._stop_words = stop_words if stop_words is not None else load_stop_words()
+        self._processes = processes
+        self._chunk_size = chunk_size
+
+    def transform(self, texts: list[str | None]) -> list[str]:
+        """Textos normalizados, na ordem em que foram dados."""
+        if self._processes <= 1 or len(texts) <= self._chunk_size:
+            return _normalize_chunk(texts, self._stop_words)
+
+        chunks = [
+            texts[start:start + self._chunk_size]
+            for start in range(0, len(texts), self._chunk_size)
+        ]
+        with ProcessPoolExecutor(max_workers=self._processes) as pool:
+            normalized = pool.map(partial(_normalize_chunk, stop_words=self._stop_words), chunks)
+            return [text for chunk in normalized for text in chunk]
+
+    def transform_columns(self, df: pd.DataFrame, columns: list[str]) -> pd.DataFrame:
+        """
+        Normaliza cada coluna e a concatenação delas.
+
+        Returns:
+            Dataframe com as colunas normalizadas e a coluna `texto`, com os tokens de
+            todas as colunas.
+        """
+        # todas as colunas em uma lista só, para dividir os chunks entre os processos
+        texts = self.transform([text for col in columns for text in df[col].tolist()])
+        normalized = pd.DataFrame(
+            {
+                col: texts[i * len(df):(i + 1) * len(df)]
+                for i, col in enumerate(columns)
+            },
+            index=df.index,
+        )
+        # a normalização é por token, então normalizar a concatenação é o mesmo que
+        # concatenar as colunas normalizadas
+        normalized['texto'] = join_columns(normalized, columns)
+        return normalized
@@ -0,0 +1,103 @@
+"""
+Pré-redução dos embeddings com PCA antes das projeções.
+
+Projetar os vetores reduzidos (e.g. 50 dimensões) em vez dos embeddings completos
+torna a busca de vizinhos do UMAP e do t-SNE mais barata, em troca de parte da
+variância, reportada em `explained_variance_ratio`. Com svd_solver='randomized' a
+decomposição é a SVD aleatorizada, que só calcula os componentes pedidos.
+
+As linhas são normalizadas antes do PCA: a distância euclidiana entre vetores de norma
+1 é monotônica na de cosseno, e o PCA preserva a distância euclidiana a menos dos
+componentes descartados, então as projeções usam metric='euclidean' nos componentes.
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+from sklearn.decomposition import PCA
+
+from transformer.knn import normalize_rows
+
+SVD_SOLVERS = ('randomized', 'full')
+
+
+class PcaReducer:
+    def __init__(
+        self,
+        embeddings: np.ndarray,
+        n_components: int = 50,
+        svd_solver: str = 'randomized',
+        random_state: int = 42,
+    ) -> None:
+        """
+        Args:
+            embeddings: Matriz de embeddings.
+            n_components: Dimensões mantidas, limitadas pelo tamanho da matriz.
+            svd_solver: 'randomized' (SVD aleatorizada) ou 'full' (SVD exata).
+            random_state: Seed da SVD aleatorizada.
+        """
+        if svd_solver not in SVD_SOLVERS:
+            raise ValueError(f"svd_solver desconhecido: {svd_solver}, use um de {', '.join(SVD_SOLVERS)}")
+        self._embeddings = embeddings
+        self._n_components = n_components
+        self._svd_solver = svd_solver
+        self._random_state = random_state
+        self._reduced: np.ndarray | None = None
+        self._explained_variance_ratio: np.ndarray | None = None
+
+    @property
+    def reduced(self) -> np.ndarray:
+        if self._reduced is None:
+            self.transform()
+
+        return self._reduced
+
+    @property
+    def explained_variance_ratio(self) -> np.ndarray:
+        """Fração da variância explicada por cada componente."""
+        if self._explained_variance_ratio is None:
+            self.transform()
+
+        return self._explained_variance_ratio
+
+    def transform(self) -> None:
+        n_components = min(self._n_components, *self._embeddings.shape)
+        pca = PCA(
+            n_components=n_components,
+            svd_solver=self._svd_solver,
+            random_state=self._random_state,
+        )
+        pca.set_output(transform='default')
+        self._reduced = np.ascontiguousarray(
+            pca.fit_transform(normalize_rows(self._embeddings)), dtype=np.float32
+        )
+        self._explained_variance_ratio = pca.explained_variance_ratio_
+
+    def to_file(self, path: Path) -> None:
+        """
+        Salva os vetores reduzidos (`vectors.npy`) e a variância explicada (`meta.json`)
+        no diretório `path`.
+        """
+        if path.exists():
+            return
+
+        path.mkdir(parents=True)
+        np.save(path / 'vectors.npy', self.reduced)
+        meta = {
+            'n_components': self.reduced.shape[1],
+            'svd_solver': self._svd_solver,
+            'explained_variance': float(self.explained_variance_ratio.sum()),
+            'explained_variance_ratio': self.explained_variance_ratio.tolist(),
+        }
+        (path / 'meta.json').write_text(json.dumps(meta, indent=2), encoding='utf-8')
+
+
+def read_reduced(path: Path) -> np.ndarray:
+    """Vetores salvos por `PcaReducer.to_file`, mapeados em memória."""
+    return np.load(path / 'vectors.npy', mmap_mode='r')
+
+
+def read_explained_variance(path: Path) -> float:
+    """Fração da variância mantida pelos vetores salvos em `path`."""
+    return json.loads((path / 'meta.json').read_text(encoding='utf-8'))['explained_variance']
@@ -1,89 +1,99 @@
-from typing import Self
 from pathlib import Path
-import re
+
 import networkx as nx
+import pandas as pd
+
+from utils.data.csr_graph import CsrGraph
+
+# Split flexível: aceita "|", " | ", "  |  ", "| ", etc.
+DOCENTES_SEPARATOR = r"\s*\|\s*"
+
+
+def docente_disciplina_graph(
+    disciplinas: pd.DataFrame,
+    docentes: pd.Series,
+    separator: str = DOCENTES_SEPARATOR,
+) -> CsrGraph:
+    """
+    Grafo bipartido Disciplina-Docente montado de uma vez, sem iterar pelas linhas.
+
+    Args:
+        disciplinas: Nós das disciplinas, com a coluna `id` e os atributos (label, ...).
+        docentes: Docentes de cada disciplina, na ordem de `disciplinas` (ex: "Nome A | Nome B").
+        separator: Regex que separa os docentes.
+
+    Returns:
+        Grafo com as disciplinas (type='disciplina', bipartite=0) seguidas dos docentes
+        (type='docente', bipartite=1, label=nome), com uma aresta por par.
+    """
+    pares = pd.DataFrame({
+        'disciplina': disciplinas['id'].to_numpy(),
+        'docente': docentes.fillna('').astype(str).str.split(separator, regex=True).to_numpy(),
+    }).explode('docente')
+    pares['docente'] = pares['docente'].str.strip()
+    pares = pares[pares['docente'].fillna('') != ''].drop_duplicates()
+
+    nomes = pares['docente'].unique()
+    nodes = pd.concat([
+        disciplinas.assign(type='disciplina', bipartite=0),
+        pd.DataFrame({'id': nomes, 'label': nomes, 'type': 'docente', 'bipartite': 1}),
+    ], ignore_index=True)
+    # um docente com o nome de um código continua sendo a disciplina, como no NetworkX
+    nodes = nodes.drop_duplicates('id')
+
+    return CsrGraph.from_edges(nodes, pares['disciplina'], pares['docente'])
 
 
 class DocenteDisciplinaGraphBuilder:
     def __init__(
-        self, 
-        node_ids: list[str], 
-        node_labels: list[str], 
+        self,
+        node_ids: list[str],
+        node_labels: list[str],
         docentes_data: list[str],
-        separator: str = " | "
+        separator: str = DOCENTES_SEPARATOR,
     ) -> None:
         """
         Constrói um grafo bipartido conectando Disciplinas aos seus Docentes Responsáveis.
-        
+
         Args:
             node_ids: Lista de IDs das disciplinas (ex: códigos 'SME0123').
             node_labels: Lista de nomes das disciplinas.
             docentes_data: Lista de strings contendo os docentes (ex: "Nome A | Nome B").
-            separator: O caractere separador usado na string de docentes. Default é " | ".
+            separator: Regex que separa os docentes. Default aceita "|" com ou sem espaços.
         """
         self._node_ids = node_ids
         self._node_labels = node_labels
         self._docentes_data = docentes_data
         self._separator = separator
-        self._graph: nx.Graph | None = None
+        self._csr_graph: CsrGraph | None = None
 
     @property
-    def graph(self) -> nx.Graph:
-        if self._graph is None:
+    def csr_graph(self) -> CsrGraph:
+        if self._csr_graph is None:
             self.transform()
-        return self._graph
+        return self._csr_graph
+
+    @property
+    def graph(self) -> nx.Graph:
+        return self.csr_graph.to_networkx()
 
     def transform(self) -> None:
         """
-        Processa as listas e constrói o grafo NetworkX.
-        Cria arestas entre o ID da disciplina e o nome de cada docente encontrado.
+        Constrói o grafo CSR, com arestas entre o ID da disciplina e o nome de cada
+        docente encontrado.
         """
-        if self._graph is None:
-            self._graph = nx.Graph()
-
-        for i, doc_str in enumerate(self._docentes_data):
-
-            # Dados da disciplina
-            course_id = self._node_ids[i]
-            course_label = self._node_labels[i]
-
-            # Nó da disciplina
-            self._graph.add_node(
-                course_id,
-                label=course_label,
-                type="disciplina",
-                bipartite=0
-            )
-
-            # Se não houver docentes
-            if not doc_str or not isinstance(doc_str, str):
-                continue
-
-            # Split flexível: aceita "|", " | ", "  |  ", "| ", etc.
-            lista_docentes = re.split(r"\s*\|\s*", doc_str)
-
-            for docente in lista_docentes:
-                docente_nome = docente.strip()
-
-                if not docente_nome:
-                    continue
-
-                # Nó do docente
-                self._graph.add_node(
-                    docente_nome,
-                    label=docente_nome,
-                    type="docente",
-                    bipartite=1
-                )
-
-                # Aresta disciplina <-> docente
-                self._graph.add_edge(course_id, docente_nome)
+        disciplinas = pd.DataFrame({'id': self._node_ids, 'label': self._node_labels})
+        self._csr_graph = docente_disciplina_graph(
+            disciplinas,
+            pd.Series(self._docentes_data, dtype=object),
+            separator=self._separator,
+        )
 
     def to_file(self, path: Path) -> None:
         """
-        Salva o grafo em um arquivo no formato GraphML.
+        Salva o grafo CSR no diretório `path`.
         """
         if path.exists():
             return
 
-        nx.write_graphml(self.graph, path)
+        self.csr_graph.write(path)
@@ -1,13 +1,47 @@
 """
 Projeta os embeddings usando t-SNE para visualização de dados.
+
+Com os vizinhos da etapa 'vizinhos', o t-SNE recebe as distâncias de cosseno como uma
+matriz esparsa 'precomputed' em vez de refazer a busca de vizinhos. A inicialização PCA,
+que o sklearn não aceita com 'precomputed', é calculada aqui como o sklearn faz.
 """
 
 from pathlib import Path
 import numpy as np
 import pandas as pd
+import scipy.sparse as sp
 
+from sklearn.decomposition import PCA
 from sklearn.manifold import TSNE
 
+from transformer.knn import cosine_distances, tsne_neighbors
+from utils.data.artifacts import write_artifact
+
+
+def _distance_graph(indices: np.ndarray, similarities: np.ndarray, k: int) -> sp.csr_matrix:
+    """
+    Distâncias de cosseno aos k primeiros vizinhos, uma linha CSR por ponto.
+
+    O próprio ponto entra como o primeiro vizinho, a distância 0: o sklearn o espera na
+    matriz e o descarta ao buscar os vizinhos.
+    """
+    n = len(indices)
+    rows = np.arange(n)[:, None]
+    distances = np.hstack([np.zeros((n, 1), np.float32), cosine_distances(similarities[:, :k])])
+    columns = np.hstack([rows, indices[:, :k]])
+    return sp.csr_matrix(
+        (distances.ravel(), columns.ravel(), np.arange(0, n * (k + 1) + 1, k + 1)),
+        shape=(n, n),
+    )
+
+
+def _pca_init(embeddings: np.ndarray, n_components: int, random_state: int) -> np.ndarray:
+    """A inicialização init='pca' do sklearn.manifold.TSNE."""
+    pca = PCA(n_components=n_components, random_state=np.random.RandomState(random_state))
+    pca.set_output(transform='default')
+    X_embedded = pca.fit_transform(embeddings).astype(np.float32, copy=False)
+    return X_embedded / np.std(X_embedded[:, 0]) * 1e-4
+
 
 class TsneTransformer:
     def __init__(
@@ -18,13 +52,21 @@ class TsneTransformer:
         metric: str = 'cosine',
         random_state: int = 42,
         n_iter: int = 1000,
+        neighbors: tuple[np.ndarray, np.ndarray] | None = None,
     ) -> None:
+        """
+        Args:
+            neighbors: Índices e similaridades de cosseno já calculados (etapa
+                'vizinhos'), com pelo menos `tsne_neighbors(perplexity)` colunas. Só
+                valem para metric='cosine'.
+        """
         self._embeddings = embeddings
         self._perplexity = perplexity
         self._n_components = n_components
         self._metric = metric
         self._random_state = random_state
         self._n_iter = n_iter
+        self._neighbors = neighbors
         self._model_embeddings: np.ndarray | None = None
 
     @property
@@ -35,19 +77,32 @@ class TsneTransformer:
         return self._model_embeddings
 
     def transform(self) -> None:
+        if self._neighbors is None:
+            X, metric, init = self._embeddings, self._metric, 'pca'
+        else:
+            if self._metric != 'cosine':
+                raise ValueError(f"Os vizinhos são de cosseno, mas metric={self._metric}")
+            indices, similarities = self._neighbors
+            k = min(len(indices) - 1, tsne_neighbors(self._perplexity))
+            if indices.shape[1] < k:
+                raise ValueError(f"{indices.shape[1]} vizinhos calculados, o t-SNE usa {k}")
+            X = _distance_graph(indices, similarities, k)
+            metric = 'precomputed'
+            init = _pca_init(self._embeddings, self._n_components, self._random_state)
+
         tsne = TSNE(
             n_components=self._n_components,
             perplexity=self._perplexity,
-            metric=self._metric,
+            metric=metric,
             random_state=self._random_state,
             max_iter=self._n_iter,
-            init='pca'
+            init=init
         )
-        self._model_embeddings = tsne.fit_transform(self._embeddings)
+        self._model_embeddings = tsne.fit_transform(X)
 
     def to_file(self, path: Path, extra_cols: dict) -> None:
         """
-        Salva as projeções t-SNE em um arquivo pickle contendo um DataFrame.
+        Salva as projeções t-SNE em um artefato Parquet contendo um DataFrame.
         """
         if path.exists():
             return
@@ -59,4 +114,4 @@ class TsneTransformer:
             'tsne_y': embedding_2d[:, 1]
         })
 
-        df_tsne.to_pickle(path)
+        write_artifact(df_tsne, path)
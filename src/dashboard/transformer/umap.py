@@ -1,5 +1,8 @@
 """
 Projeta os UMAP para visualização de dados.
+
+Com os vizinhos da etapa 'vizinhos', o UMAP recebe o k-NN pronto (`precomputed_knn`)
+em vez de rodar o NN-descent de novo.
 """
 
 from typing import Self
@@ -10,6 +13,24 @@ import pandas as pd
 
 import umap
 
+from transformer.knn import cosine_distances
+from utils.data.artifacts import write_artifact
+
+
+def _precomputed_knn(
+    indices: np.ndarray,
+    similarities: np.ndarray,
+    n_neighbors: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """k-NN no formato do UMAP: n_neighbors colunas, a primeira o próprio ponto a distância 0."""
+    n = len(indices)
+    knn_indices = np.hstack([np.arange(n, dtype=np.int32)[:, None], indices[:, :n_neighbors - 1]])
+    knn_dists = np.hstack([
+        np.zeros((n, 1), np.float32), cosine_distances(similarities[:, :n_neighbors - 1])
+    ])
+    return knn_indices, knn_dists
+
+
 class UmapTransformer:
     def __init__(
         self, 
@@ -18,14 +39,22 @@ class UmapTransformer:
         min_dist: float = 0.1,
         n_components: int = 2,
         metric: str = 'cosine',
-        random_state: int = 42
+        random_state: int = 42,
+        neighbors: tuple[np.ndarray, np.ndarray] | None = None,
     ) -> None:
+        """
+        Args:
+            neighbors: Índices e similaridades de cosseno já calculados (etapa
+                'vizinhos'), com pelo menos `n_neighbors - 1` colunas. Só valem para
+                metric='cosine'.
+        """
         self._embeddings = embeddings
         self._n_neighbors = n_neighbors
         self._min_dist = min_dist
         self._n_components = n_components
         self._metric = metric
         self._random_state = random_state
+        self._neighbors = neighbors
         self._model_embeddings: np.ndarray | None = None
         
     @property
@@ -36,20 +65,37 @@ class UmapTransformer:
         return self._model_embeddings
 
     def transform(self) -> None:
+        precomputed = {}
+        if self._neighbors is not None:
+            if self._metric != 'cosine':
+                raise ValueError(f"Os vizinhos são de cosseno, mas metric={self._metric}")
+            indices, similarities = self._neighbors
+            if indices.shape[1] < min(self._n_neighbors, len(indices)) - 1:
+                raise ValueError(
+                    f"{indices.shape[1]} vizinhos calculados, o UMAP usa {self._n_neighbors - 1}"
+                )
+            precomputed = {
+                'precomputed_knn': _precomputed_knn(indices, similarities, self._n_neighbors),
+                # abaixo de 4096 pontos o UMAP calcula todas as distâncias e ignoraria
+                # o k-NN pronto
+                'force_approximation_algorithm': True,
+            }
+
         reducer = umap.UMAP(
             n_neighbors=self._n_neighbors, 
             min_dist=self._min_dist, 
             n_components=self._n_components, 
             metric=self._metric, 
-            random_state=self._random_state
+            random_state=self._random_state,
+            **precomputed,
         )
         self._model_embeddings = reducer.fit_transform(self._embeddings)
 
     def to_file(self, path: Path, extra_cols: dict) -> None:
         """
-        Salva o modelo UMAP treinado em um arquivo pickle.
+        Salva as projeções UMAP em um artefato Parquet.
         
-        O arquivo pickle carrega um dataframe.
+        O artefato carrega um dataframe com as colunas extras e as coordenadas.
         """
         if path.exists():
             return
@@ -62,4 +108,4 @@ class UmapTransformer:
         })
         
         # Salvar Artefato 1
-        df_umap.to_pickle(path)
+        write_artifact(df_umap, path)
@@ -3,19 +3,36 @@ Utilidades para o streamlit dashboard.
 """
 
 from pathlib import Path
+from typing import Sequence
 
 import pandas as pd
 import streamlit as st
 
-from utils.config.path import scrapper_data_path, preprocessed_data_path
+from utils.config.path import embeddings_dir, scrapper_data_path, preprocessed_data_path
+from utils.data.embedding_matrix import EmbeddingMatrix, open_embedding_matrix
 from utils.data.reader import DataReader
 
 @st.cache_data
-def get_data() -> pd.DataFrame:
+def get_data(columns: Sequence[str] | None = None) -> pd.DataFrame:
     """
     Read scrapped data and preprocess its values.
+
+    Args:
+        columns: Columns to load, the other columns of the artifact are never read.
+            Loads all columns if None.
+    """
+    reader = DataReader(scrapper_data_path, preprocessed_data_path)
+    return reader.load(tuple(columns) if columns is not None else None)
+
+
+@st.cache_resource
+def get_embeddings() -> EmbeddingMatrix:
+    """
+    Embedding matrix written by the pipeline, memory-mapped.
+
+    Cached as a resource, i.e. shared by all sessions without being copied.
     """
-    return DataReader(scrapper_data_path, preprocessed_data_path).dataframe
+    return open_embedding_matrix(embeddings_dir)
 
 
 def num_docentes(series_docentes: pd.Series) -> int:
@@ -5,5 +5,47 @@ Utility module for model configuration.
 # Modelo de embedding a ser utilizado na geração dos embeddings de texto
 MODEL_EMBEDDING = 'all-MiniLM-L6-v2'
 
+# Backend da codificação: 'torch', 'onnx' ou 'onnx-int8' (ver transformer/encoding.py).
+# Muda os embeddings, então faz parte da chave da etapa
+ENCODING_BACKEND = 'torch'
+
+# Tipo da matriz de embeddings persistida: 'float32' ou 'float16' (metade do tamanho)
+EMBEDDING_DTYPE = 'float32'
+
+# Textos por lote e processos de codificação; só afetam a vazão, não os embeddings
+ENCODING_BATCH_SIZE = 64
+ENCODING_PROCESSES = 1
+
 # Colunas de texto a serem consideradas para geração dos embeddings
 TEXT_COL = ['objetivos', 'justificativa', 'conteudo']
+
+# Processos da normalização dos textos (ver transformer/normalize.py)
+NORMALIZATION_PROCESSES = 1
+
+# Parâmetros das etapas do pipeline (ver pipeline.py); alterar um deles refaz só as
+# etapas que dependem dele
+#
+# 'pca' em UMAP_PARAMS / TSNE_PARAMS: True projeta os vetores da etapa 'pca' (prévias
+# rápidas), False os embeddings completos com os vizinhos compartilhados (figuras finais)
+PCA_PARAMS = {'n_components': 50, 'svd_solver': 'randomized', 'random_state': 42}
+UMAP_PARAMS = {
+    'pca': False,
+    'n_neighbors': 15,
+    'min_dist': 0.1,
+    'n_components': 2,
+    'metric': 'cosine',
+    'random_state': 42,
+}
+TSNE_PARAMS = {
+    'pca': False,
+    'perplexity': 30.0,
+    'n_components': 2,
+    'metric': 'cosine',
+    'random_state': 42,
+    'n_iter': 1000,
+}
+# Vizinhos de cosseno calculados uma vez, na etapa 'vizinhos', para o grafo k-NN, o UMAP
+# e o t-SNE; method: 'exact' ou 'approx' (ver transformer/knn.py)
+NEIGHBORS_PARAMS = {'method': 'exact'}
+KNN_PARAMS = {'k': 5}
+LOUVAIN_PARAMS = {'random_state': 42}
@@ -6,14 +6,33 @@ from pathlib import Path
 
 BASE_DIR = Path("src/data")
 
-# path with scrapped data
-scrapper_data_path = BASE_DIR / "output.json"
+# path with scrapped data, JSONL shards written by the scraper pipeline
+scrapper_data_path = BASE_DIR / "shards"
 
 # path to store the preprocessed dataframe with correct typing and nan handling
-preprocessed_data_path = BASE_DIR / "output.pickle"
+preprocessed_data_path = BASE_DIR / "output.parquet"
 
-# umap pickled data path
-umap_data_path = BASE_DIR / "umap.pickle"
+# umap projection artifact path
+umap_data_path = BASE_DIR / "umap.parquet"
 
-# tsne pickled data path
-tsne_data_path = BASE_DIR / "tsne.pickle"
+# tsne projection artifact path
+tsne_data_path = BASE_DIR / "tsne.parquet"
+
+# memory-mapped embedding matrix, with the codigo of each row and the model metadata
+embeddings_dir = BASE_DIR / "embeddings"
+
+# artifacts consumed by the grade curricular page
+grade_horaria_dir = BASE_DIR / "grade_horaria"
+dashboard_data_path = grade_horaria_dir / "dados_dashboard_completo.parquet"
+# CSR graphs (see utils/data/csr_graph.py) of disciplinas and docentes
+grafo_docentes_path = grade_horaria_dir / "grafo_docentes"
+grafo_disciplinas_path = grade_horaria_dir / "grafo_disciplinas"
+
+# content-addressed artifacts of the pipeline stages
+cache_dir = BASE_DIR / "cache"
+
+# embeddings by (model, text hash), reused across pipeline runs
+embedding_store_dir = cache_dir / "embedding_store"
+
+# models exported to ONNX (quantized) by the encoder
+onnx_export_dir = cache_dir / "onnx"
@@ -8,3 +8,10 @@ creditos_necessarios = 48
 
 # créditos de disciplinas obrigatorias necessários para a conclusão do mestrado, créditos de metodologia já descontado
 creditos_obrigatorios = 12 
+
+# comissões cujas disciplinas entram na grade curricular
+institutos_alvo = [
+    "Instituto de Ciências Matemáticas e de Computação",
+    "Instituto de Matemática, Estatística e Ciência da Computação",
+    "Instituto de Matemática e Estatística"
+]
@@ -0,0 +1,86 @@
+"""
+Columnar artifact store for the dataframes consumed by the dashboard.
+
+Artifacts are Parquet files: the schema travels with the data, a reader can ask for a
+subset of the columns and only those column chunks are decoded, and the file is
+memory-mapped instead of read into a buffer. A page that only plots the hierarchy
+never touches the heavy text columns (objetivos, conteudo, bibliografia, ...).
+"""
+
+import os
+from pathlib import Path
+from typing import Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# column groups read by the dashboard pages
+HIERARCHY_COLUMNS = ['codigo', 'disciplina', 'commissao', 'nome_programa', 'area_concentracao']
+CARGA_COLUMNS = [
+    'n_creditos', 'carga_teorica', 'carga_pratica', 'carga_estudo', 'duracao', 'carga_total'
+]
+TEXT_COLUMNS = [
+    'objetivos', 'justificativa', 'conteudo', 'avaliacao', 'bibliografia', 'oferecimento'
+]
+
+
+def write_artifact(
+    df: pd.DataFrame,
+    path: Path,
+    schema: pa.Schema | None = None,
+    metadata: dict[str, str] | None = None,
+) -> None:
+    """
+    Atomically write a dataframe as a Parquet artifact.
+
+    Args:
+        df: Dataframe to store, its index is dropped.
+        path: Artifact path.
+        schema: Explicit Arrow schema. Inferred from the dataframe dtypes if None.
+        metadata: Key-value pairs stored in the file footer, read back with
+            `artifact_metadata` without reading any column.
+    """
+    table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+    if metadata:
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            **{key.encode(): value.encode() for key, value in metadata.items()},
+        })
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    pq.write_table(table, tmp_path, compression='zstd')
+    os.replace(tmp_path, path)
+
+
+def read_artifact(path: Path, columns: Sequence[str] | None = None) -> pd.DataFrame:
+    """
+    Read a Parquet artifact, decoding only the requested columns.
+
+    Args:
+        path: Artifact path.
+        columns: Columns to read. Columns missing from the artifact are ignored, all
+            columns are read if None.
+    """
+    if columns is not None:
+        available = set(artifact_schema(path).names)
+        columns = [col for col in columns if col in available]
+
+    table = pq.read_table(path, columns=columns, memory_map=True)
+    return table.to_pandas()
+
+
+def artifact_schema(path: Path) -> pa.Schema:
+    """Arrow schema of an artifact, read from the file footer only."""
+    return pq.read_schema(path, memory_map=True)
+
+
+def artifact_metadata(path: Path) -> dict[str, str]:
+    """Key-value metadata stored with `write_artifact`, read from the file footer only."""
+    metadata = artifact_schema(path).metadata or {}
+    return {
+        key.decode(): value.decode()
+        for key, value in metadata.items()
+        if key != b'pandas'
+    }
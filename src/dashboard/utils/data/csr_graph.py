@@ -0,0 +1,204 @@
+"""
+Array-backed undirected graph: CSR adjacency plus columnar node attributes.
+
+The graph is stored as a directory artifact:
+
+- `indptr.npy`, `indices.npy`, `weights.npy`: symmetric CSR adjacency, memory-mapped
+  on read.
+- `nodes.parquet`: one row per node, in adjacency order, with the node `id` and one
+  column per attribute (label, comunidade, ...).
+
+Reading it costs a few array headers and one Parquet footer instead of parsing XML
+node by node, and the graph takes a few bytes per edge instead of a dict per node and
+per edge. `to_networkx` converts it for the algorithms that need NetworkX (Louvain,
+layouts).
+"""
+
+import json
+import shutil
+from pathlib import Path
+from typing import Iterable, Sequence
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from utils.data.artifacts import read_artifact, write_artifact
+
+ID_COLUMN = 'id'
+NODES_NAME = 'nodes.parquet'
+META_NAME = 'meta.json'
+
+
+class CsrGraph:
+    def __init__(self, adjacency: sp.csr_matrix, nodes: pd.DataFrame) -> None:
+        """
+        Args:
+            adjacency: Symmetric (n, n) adjacency, the edge weights as values.
+            nodes: n rows in adjacency order, with an `id` column and the attributes.
+        """
+        if adjacency.shape != (len(nodes), len(nodes)):
+            raise ValueError(f"Adjacency of shape {adjacency.shape} for {len(nodes)} nodes")
+        self.adjacency = adjacency
+        self.nodes = nodes.reset_index(drop=True)
+        self._ids: np.ndarray | None = None
+        self._index: dict[str, int] | None = None
+
+    @classmethod
+    def from_edges(
+        cls,
+        nodes: pd.DataFrame,
+        sources: Sequence[str],
+        targets: Sequence[str],
+        weights: Sequence[float] | None = None,
+    ) -> 'CsrGraph':
+        """Graph with the given nodes and the undirected edges between their ids."""
+        index = pd.Index(nodes[ID_COLUMN])
+        rows, cols = index.get_indexer(sources), index.get_indexer(targets)
+        if (rows < 0).any() or (cols < 0).any():
+            raise KeyError("Edge endpoint missing from the nodes")
+        data = np.ones(len(rows), np.float32) if weights is None else np.asarray(weights, np.float32)
+        adjacency = sp.csr_matrix((data, (rows, cols)), shape=(len(nodes), len(nodes)))
+        if weights is None:
+            # repeated edges are summed by the constructor
+            adjacency.data[:] = 1.0
+        return cls(adjacency.maximum(adjacency.T).tocsr(), nodes)
+
+    @classmethod
+    def from_networkx(cls, graph: nx.Graph, weight: str = 'weight') -> 'CsrGraph':
+        ids = list(graph.nodes())
+        nodes = pd.DataFrame.from_records([attrs for _, attrs in graph.nodes(data=True)])
+        nodes.insert(0, ID_COLUMN, [str(node_id) for node_id in ids])
+        adjacency = nx.to_scipy_sparse_array(graph, nodelist=ids, weight=weight, dtype=np.float32)
+        return cls(sp.csr_matrix(adjacency), nodes)
+
+    @property
+    def ids(self) -> np.ndarray:
+        # converting the Arrow-backed column costs O(n), keep the array
+        if self._ids is None:
+            self._ids = self.nodes[ID_COLUMN].to_numpy()
+        return self._ids
+
+    @property
+    def index(self) -> dict[str, int]:
+        """Adjacency row of each node id (ids are unique, see `merge_duplicates`)."""
+        if self._index is None:
+            self._index = {node_id: row for row, node_id in enumerate(self.ids.tolist())}
+        return self._index
+
+    @property
+    def n_nodes(self) -> int:
+        return self.adjacency.shape[0]
+
+    @property
+    def n_edges(self) -> int:
+        return int(sp.triu(self.adjacency).nnz)
+
+    def __contains__(self, node_id: str) -> bool:
+        return node_id in self.index
+
+    def neighbors(self, node_id: str) -> list[str]:
+        row = self.index[node_id]
+        start, stop = self.adjacency.indptr[row], self.adjacency.indptr[row + 1]
+        return self.ids[self.adjacency.indices[start:stop]].tolist()
+
+    def edges(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Source ids, target ids and weights of each edge, once per edge."""
+        upper = sp.triu(self.adjacency, k=1).tocoo()
+        return self.ids[upper.row], self.ids[upper.col], upper.data
+
+    def subgraph(self, node_ids: Iterable[str]) -> 'CsrGraph':
+        """Graph induced by the given nodes (ids missing from the graph are ignored), in graph order."""
+        rows = np.sort([self.index[node_id] for node_id in set(node_ids) if node_id in self.index])
+        rows = rows.astype(np.int64)
+        return CsrGraph(self.adjacency[rows][:, rows].tocsr(), self.nodes.iloc[rows])
+
+    def merge_duplicates(self) -> 'CsrGraph':
+        """
+        Graph with one node per id: the rows of a repeated id are merged into its first
+        row, which keeps its attributes and the edges of all of them (the largest weight
+        of a repeated edge). Edges between rows of the same id are dropped.
+        """
+        codes, uniques = pd.factorize(self.ids)
+        n = len(uniques)
+        if n == self.n_nodes:
+            return self
+
+        coo = self.adjacency.tocoo()
+        rows, cols = codes[coo.row], codes[coo.col]
+        # heaviest first, so the first occurrence of each (row, col) pair has the max weight
+        order = np.argsort(-coo.data, kind='stable')
+        order = order[rows[order] != cols[order]]
+        _, first = np.unique(rows[order].astype(np.int64) * n + cols[order], return_index=True)
+        edges = order[first]
+        adjacency = sp.csr_matrix((coo.data[edges], (rows[edges], cols[edges])), shape=(n, n))
+
+        # factorize numbers the ids by first appearance
+        _, first_rows = np.unique(codes, return_index=True)
+        return CsrGraph(adjacency, self.nodes.iloc[first_rows])
+
+    def to_networkx(self, weighted: bool = True) -> nx.Graph:
+        """
+        Args:
+            weighted: Store the edge weights as the `weight` attribute. Without them,
+                algorithms that read `weight` (e.g. Louvain) count every edge as 1.
+        """
+        graph = nx.Graph()
+        records = self.nodes.drop(columns=[ID_COLUMN]).to_dict('records')
+        # attributes missing for some kinds of node (e.g. docentes) stay missing
+        attributes = [{key: value for key, value in record.items() if not pd.isna(value)} for record in records]
+        graph.add_nodes_from(zip(self.ids.tolist(), attributes))
+        sources, targets, weights = self.edges()
+        if weighted:
+            graph.add_weighted_edges_from(zip(sources.tolist(), targets.tolist(), weights.tolist()))
+        else:
+            graph.add_edges_from(zip(sources.tolist(), targets.tolist()))
+        return graph
+
+    def write(self, path: Path) -> None:
+        """Write the graph artifact to the directory `path`, replacing it."""
+        if path.exists():
+            shutil.rmtree(path)
+        path.mkdir(parents=True)
+        adjacency = self.adjacency
+        # scipy casts indptr and indices to a common dtype, which would copy the
+        # memory-mapped arrays on read if they differed
+        index_dtype = np.int32 if adjacency.nnz < 2**31 else np.int64
+        np.save(path / 'indptr.npy', adjacency.indptr.astype(index_dtype))
+        np.save(path / 'indices.npy', adjacency.indices.astype(index_dtype))
+        np.save(path / 'weights.npy', adjacency.data.astype(np.float32))
+        write_artifact(self.nodes, path / NODES_NAME)
+        (path / META_NAME).write_text(
+            json.dumps({'nodes': self.n_nodes, 'edges': self.n_edges}), encoding='utf-8'
+        )
+
+    @classmethod
+    def read(cls, path: Path, columns: Sequence[str] | None = None) -> 'CsrGraph':
+        """
+        Read a graph artifact, memory-mapping the adjacency.
+
+        Args:
+            path: Artifact directory.
+            columns: Node attributes to read, besides the id. Reads all if None.
+        """
+        n = json.loads((path / META_NAME).read_text(encoding='utf-8'))['nodes']
+        adjacency = sp.csr_matrix(
+            (
+                np.load(path / 'weights.npy', mmap_mode='r'),
+                np.load(path / 'indices.npy', mmap_mode='r'),
+                np.load(path / 'indptr.npy', mmap_mode='r'),
+            ),
+            shape=(n, n),
+        )
+        if columns is not None:
+            columns = [ID_COLUMN, *columns]
+        return cls(adjacency, read_artifact(path / NODES_NAME, columns))
+
+    def memory_usage(self) -> int:
+        """Bytes of the adjacency arrays and node attributes."""
+        adjacency = self.adjacency
+        return (
+            adjacency.indptr.nbytes + adjacency.indices.nbytes + adjacency.data.nbytes
+            + int(self.nodes.memory_usage(deep=True).sum())
+        )
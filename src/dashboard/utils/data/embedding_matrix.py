@@ -0,0 +1,129 @@
+"""
+Embedding matrix artifact shared by the pipeline and the dashboard.
+
+The artifact is a directory with:
+
+- `vectors.npy`: C-contiguous float32 (or float16) matrix, one row per dataset row. The
+  `.npy` header is padded to 64 bytes, so the rows are aligned and the file can be
+  memory-mapped as is.
+- `codigos.npy`: `codigo` of each row.
+- `meta.json`: model, backend, dtype, shape and whether the rows are L2-normalized.
+
+Opening it memory-maps the matrix instead of reading it: any number of processes
+(pipeline workers, Streamlit sessions) share the same pages of the OS page cache, and
+opening takes about as long as reading the small metadata files.
+"""
+
+import json
+import shutil
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Sequence
+
+import numpy as np
+
+VECTORS_NAME = 'vectors.npy'
+CODIGOS_NAME = 'codigos.npy'
+META_NAME = 'meta.json'
+
+DTYPES = ('float32', 'float16')
+
+
+def write_embedding_matrix(
+    path: Path,
+    vectors: np.ndarray,
+    codigos: Sequence[str],
+    metadata: dict[str, Any] | None = None,
+    dtype: str = 'float32',
+) -> None:
+    """
+    Write the embedding matrix artifact to the directory `path`.
+
+    Args:
+        path: Artifact directory, replaced if it exists.
+        vectors: Matrix with one row per codigo.
+        codigos: `codigo` of each row.
+        metadata: Extra metadata, e.g. the model name.
+        dtype: 'float32' or 'float16'.
+    """
+    if dtype not in DTYPES:
+        raise ValueError(f"Unsupported dtype {dtype}, use one of {', '.join(DTYPES)}")
+    if len(vectors) != len(codigos):
+        raise ValueError(f"{len(vectors)} vectors for {len(codigos)} codigos")
+
+    vectors = np.ascontiguousarray(vectors, dtype=dtype)
+    norms = np.linalg.norm(vectors.astype(np.float32), axis=1)
+    meta = {
+        **(metadata or {}),
+        'dtype': dtype,
+        'rows': vectors.shape[0],
+        'dim': vectors.shape[1],
+        'normalized': bool(len(norms) and np.allclose(norms, 1.0, atol=1e-2)),
+    }
+
+    if path.exists():
+        shutil.rmtree(path)
+    path.mkdir(parents=True)
+    np.save(path / VECTORS_NAME, vectors)
+    np.save(path / CODIGOS_NAME, np.asarray(codigos, dtype=str))
+    (path / META_NAME).write_text(json.dumps(meta, indent=2), encoding='utf-8')
+
+
+@dataclass
+class EmbeddingMatrix:
+    vectors: np.ndarray
+    codigos: np.ndarray
+    metadata: dict[str, Any]
+    _rows: dict[str, list[int]] | None = field(default=None, repr=False)
+
+    @property
+    def rows(self) -> dict[str, list[int]]:
+        """
+        Rows of each codigo, in matrix order. The matrix is aligned with the dataset, so a
+        disciplina offered in several areas has one row per offering.
+        """
+        if self._rows is None:
+            rows: dict[str, list[int]] = {}
+            for row, codigo in enumerate(self.codigos.tolist()):
+                rows.setdefault(codigo, []).append(row)
+            self._rows = rows
+        return self._rows
+
+    def __len__(self) -> int:
+        return len(self.codigos)
+
+    def lookup(self, codigos: Sequence[str]) -> np.ndarray:
+        """
+        Vectors of the given codigos, as float32, one per codigo. Raises KeyError for
+        unknown codigos. The rows of a codigo embed the same ementa, the first one is used.
+        """
+        return np.asarray(self.vectors[[self.rows[codigo][0] for codigo in codigos]], dtype=np.float32)
+
+    def most_similar(self, codigo: str, k: int = 10) -> list[tuple[str, float]]:
+        """
+        The k codigos most cosine-similar to `codigo`, most similar first, each once and
+        without `codigo` itself. Raises KeyError for unknown codigos.
+        """
+        query = self.lookup([codigo])[0]
+        # reads the mapped matrix once, from the page cache shared by every process
+        similarities = np.asarray(self.vectors @ query, dtype=np.float32)
+        if not self.metadata.get('normalized'):
+            norms = np.linalg.norm(np.asarray(self.vectors, dtype=np.float32), axis=1)
+            similarities /= np.maximum(norms * np.linalg.norm(query), 1e-12)
+
+        similar: dict[str, float] = {}
+        for row in np.argsort(-similarities, kind='stable'):
+            other = str(self.codigos[row])
+            if other != codigo and other not in similar:
+                similar[other] = float(similarities[row])
+                if len(similar) == k:
+                    break
+        return list(similar.items())
+
+def open_embedding_matrix(path: Path) -> EmbeddingMatrix:
+    """Memory-map an embedding matrix artifact, read-only."""
+    return EmbeddingMatrix(
+        vectors=np.load(path / VECTORS_NAME, mmap_mode='r'),
+        codigos=np.load(path / CODIGOS_NAME),
+        metadata=json.loads((path / META_NAME).read_text(encoding='utf-8')),
+    )
@@ -0,0 +1,123 @@
+"""
+On-disk store of text embeddings, keyed by model and text hash.
+
+Each model has its own directory with the sha256 of every encoded text (`hashes.npy`)
+and the matching rows of the embedding matrix (`vectors.npy`). Encoding a list of texts
+only runs the model on the texts whose hash isn't stored yet, the full matrix is
+assembled from the store, so a catalogue where a handful of ementas changed costs a
+handful of encodings.
+"""
+
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Callable, Sequence
+
+import numpy as np
+
+META_NAME = 'meta.json'
+HASHES_NAME = 'hashes.npy'
+VECTORS_NAME = 'vectors.npy'
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:32]
+
+
+def _save(path: Path, array: np.ndarray) -> None:
+    tmp_path = path.with_name(path.name + '.tmp')
+    with tmp_path.open('wb') as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+class EmbeddingStore:
+    """Embeddings of a single model, stored in `<directory>/<model>`."""
+
+    def __init__(self, directory: Path, model_name: str) -> None:
+        """
+        Args:
+            directory: Root directory of the store, shared by all models.
+            model_name: Name of the model, e.g. 'all-MiniLM-L6-v2'.
+        """
+        self._model_name = model_name
+        self._directory = directory / re.sub(r'[^\w.-]', '__', model_name)
+        self._hashes: np.ndarray | None = None
+        self._vectors: np.ndarray | None = None
+        self._rows: dict[str, int] | None = None
+
+    def __len__(self) -> int:
+        self._load()
+        return len(self._hashes)
+
+    def _load(self) -> None:
+        if self._rows is not None:
+            return
+
+        hashes_path = self._directory / HASHES_NAME
+        vectors_path = self._directory / VECTORS_NAME
+        hashes, vectors = np.array([], dtype='U32'), None
+        if hashes_path.exists() and vectors_path.exists():
+            hashes = np.load(hashes_path)
+            vectors = np.load(vectors_path, mmap_mode='r')
+            if len(hashes) != len(vectors):
+                # interrupted between the two writes, the store is rebuilt
+                hashes, vectors = np.array([], dtype='U32'), None
+
+        self._hashes, self._vectors = hashes, vectors
+        self._rows = {key: row for row, key in enumerate(hashes.tolist())}
+
+    def _append(self, hashes: list[str], vectors: np.ndarray) -> None:
+        self._load()
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self._vectors is not None:
+            if self._vectors.shape[1] != vectors.shape[1]:
+                raise ValueError(
+                    f"Embedding dimension {vectors.shape[1]} doesn't match the "
+                    f"{self._vectors.shape[1]} stored for {self._model_name}"
+                )
+            vectors = np.concatenate([self._vectors, vectors])
+        all_hashes = np.concatenate([self._hashes, np.array(hashes, dtype='U32')])
+
+        self._directory.mkdir(parents=True, exist_ok=True)
+        # vectors first: a crash in between leaves a length mismatch, caught by _load
+        _save(self._directory / VECTORS_NAME, vectors)
+        _save(self._directory / HASHES_NAME, all_hashes)
+        (self._directory / META_NAME).write_text(
+            json.dumps({'model_name': self._model_name, 'dim': vectors.shape[1]}),
+            encoding='utf-8',
+        )
+        self._rows = None
+        self._load()
+
+    def encode(
+        self,
+        texts: Sequence[str],
+        encode: Callable[[list[str]], np.ndarray],
+    ) -> np.ndarray:
+        """
+        Embeddings of the texts, running `encode` only on the texts not stored yet.
+
+        Args:
+            texts: Texts exactly as given to the model.
+            encode: Encodes a list of texts with the store's model, called at most
+                once, with each missing text once.
+
+        Returns:
+            float32 matrix with one row per text.
+        """
+        self._load()
+        hashes = [text_hash(text) for text in texts]
+        missing: dict[str, str] = {}
+        for key, text in zip(hashes, texts):
+            if key not in self._rows and key not in missing:
+                missing[key] = text
+
+        if missing:
+            self._append(list(missing), encode(list(missing.values())))
+
+        if self._vectors is None:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.asarray(self._vectors[[self._rows[key] for key in hashes]], dtype=np.float32)
@@ -2,19 +2,69 @@
 Read the scrapped data and preprocess its values.
 
 If the scrapped data is available:
-1. reads the JSON file
-2. preprocess the data by adding filtering and data transformation
-3. store the content in a pandas dataframe and return it
+1. reads the JSONL shards written by the scraper (or a single JSON file)
+2. preprocess the data by adding filtering and data transformation, unless the
+   shards were already normalized by the scraper (their manifest declares a schema),
+   and coerce every column to a compact dtype
+3. store the content in a Parquet artifact (see `utils/data/artifacts.py`) and
+   return it as a pandas dataframe, optionally with only some of its columns
+
+The artifact records the size, mtime and content hash of the scrapped data and the
+version of this module. It is rebuilt only when one of them changes: an unchanged
+size and mtime skip the hashing, so the check costs a few `stat` calls.
 """
 
+import hashlib
+import json
 from pathlib import Path
+from typing import Iterator, Sequence
 
+import numpy as np
 import pandas as pd
 
+from utils.data.artifacts import artifact_metadata, read_artifact, write_artifact
+
+# number of lines parsed at once when reading a shard
+SHARD_CHUNK_SIZE = 1000
+
+# compact dtypes of the preprocessed dataframe
+CATEGORY_COLUMNS = ('commissao', 'nome_programa', 'area_concentracao')
+# identifiers, not measures: kept as strings (as typed by the scraper schema) so codes
+# with leading zeros or letters survive, and categorical since they repeat on every row
+CODE_COLUMNS = ('codigo_commissao', 'codigo_programa', 'codigo_area_concentracao')
+INT_DTYPES = {
+    'n_creditos': 'Int8',
+    'carga_teorica': 'Int16',
+    'carga_pratica': 'Int16',
+    'carga_estudo': 'Int16',
+    'carga_total': 'Int32',
+    'duracao': 'Int32',
+}
+
+# units of carga_total and duracao, in hours
+HOURS_PER_UNIT = {'horas': 1, 'semanas': 7 * 24}
+
+# artifact metadata key with the fingerprint of the scrapped data
+SOURCE_METADATA_KEY = 'source'
+
+# any change to the preprocessing code invalidates the artifacts built by older versions
+CODE_VERSION = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:16]
+
 class DataReader:
     """Data scrapper reader and preprocessor."""
 
-    def __init__(self, scrapped_data_path: Path, output_dataframe_path: Path):
+    def __init__(
+        self,
+        scrapped_data_path: Path,
+        output_dataframe_path: Path,
+    ):
+        """
+        Args:
+            scrapped_data_path: Shards directory (with a `manifest.json`) written by
+                the scraper, or a single JSON array file.
+            output_dataframe_path: Path of the preprocessed dataframe artifact. It
+                always holds every column; `load(columns)` projects on read.
+        """
         self._scrapped_data_path = scrapped_data_path
         self._output_dataframe_path = output_dataframe_path
         self._scrapped_data: pd.DataFrame | None = None
@@ -25,12 +75,117 @@ class DataReader:
                 f"Scrapped data file not found: {scrapped_data_path}"
             )
 
+    def __getstate__(self) -> dict:
+        # a reader sent to another process reads the artifact again instead of
+        # pickling the loaded dataframes
+        return {**self.__dict__, '_scrapped_data': None, '_output_dataframe': None}
+
     @property
     def scrapped_data(self) -> pd.DataFrame:
         if self._scrapped_data is None:
-            self._scrapped_data = pd.read_json(self._scrapped_data_path)
+            if self._scrapped_data_path.is_dir():
+                self._scrapped_data = pd.concat(
+                    self.iter_shards(), ignore_index=True
+                )
+            else:
+                self._scrapped_data = pd.read_json(self._scrapped_data_path)
 
         return self._scrapped_data
+
+    @property
+    def manifest(self) -> dict:
+        with (self._scrapped_data_path / 'manifest.json').open(encoding='utf-8') as f:
+            return json.load(f)
+
+    @property
+    def schema(self) -> dict[str, str] | None:
+        """Field types of the scrapped data, if it was normalized while crawling."""
+        if not self._scrapped_data_path.is_dir():
+            return None
+
+        schema = self.manifest.get('schema')
+        return schema['fields'] if schema else None
+
+    def _source_files(self) -> list[Path]:
+        if not self._scrapped_data_path.is_dir():
+            return [self._scrapped_data_path]
+
+        return [self._scrapped_data_path / 'manifest.json'] + [
+            self._scrapped_data_path / shard['path'] for shard in self.manifest['shards']
+        ]
+
+    def _content_hash(self) -> str:
+        """
+        Hash of the scrapped data.
+
+        For shards, the manifest is hashed: every publish writes a new one, listing each
+        shard with its size.
+        """
+        if self._scrapped_data_path.is_dir():
+            path = self._scrapped_data_path / 'manifest.json'
+        else:
+            path = self._scrapped_data_path
+
+        digest = hashlib.sha256()
+        with path.open('rb') as f:
+            while chunk := f.read(1 << 20):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def source_fingerprint(self, content_hash: bool = True) -> dict:
+        """Size, mtime and (optionally) content hash of the scrapped data."""
+        stats = [path.stat() for path in self._source_files()]
+        fingerprint = {
+            'size': sum(stat.st_size for stat in stats),
+            'mtime_ns': max(stat.st_mtime_ns for stat in stats),
+            'code_version': CODE_VERSION,
+        }
+        if content_hash:
+            fingerprint['sha256'] = self._content_hash()
+        return fingerprint
+
+    def is_fresh(self) -> bool:
+        """Whether the preprocessed artifact was built from the current scrapped data."""
+        if not self._output_dataframe_path.exists():
+            return False
+
+        stored = artifact_metadata(self._output_dataframe_path).get(SOURCE_METADATA_KEY)
+        if stored is None:
+            return False
+        stored = json.loads(stored)
+
+        current = self.source_fingerprint(content_hash=False)
+        if (stored['code_version'] != current['code_version']
+                or stored['size'] != current['size']):
+            return False
+        if stored['mtime_ns'] == current['mtime_ns']:
+            return True
+        # touched but maybe not changed, e.g. copied or re-downloaded
+        return stored['sha256'] == self._content_hash()
+
+    def iter_shards(self) -> Iterator[pd.DataFrame]:
+        """
+        Lazily read the shards, one chunk of lines at a time, so peak memory while
+        parsing is bounded by the chunk size rather than by the whole catalogue.
+        """
+        manifest = self.manifest
+        columns = manifest['columns']
+        schema = (manifest.get('schema') or {}).get('fields', {})
+        date_columns = [
+            col for col, col_type in schema.items()
+            if col_type == 'date' and col in columns
+        ]
+        for shard in manifest['shards']:
+            chunks = pd.read_json(
+                self._scrapped_data_path / shard['path'],
+                lines=True,
+                compression='gzip',
+                chunksize=SHARD_CHUNK_SIZE,
+                convert_dates=date_columns,
+            )
+            with chunks:
+                for chunk in chunks:
+                    yield chunk.reindex(columns=columns)
     
     @property
     def dataframe(self) -> pd.DataFrame:
@@ -43,48 +198,83 @@ class DataReader:
         # already cached
         if self._output_dataframe is not None:
             return self._output_dataframe
-        
-        if self._output_dataframe_path.exists():
-            self._output_dataframe = pd.read_pickle(self._output_dataframe_path)
-        else:
-            df_preprocessed = self._preprocess(self.scrapped_data)
-            df_preprocessed.to_pickle(self._output_dataframe_path)
-            self._output_dataframe = df_preprocessed
 
+        self._output_dataframe = self.load()
         return self._output_dataframe
 
-    def _extrair_carga_horaria(self, valor_texto: str | None) -> int:
+    def load(self, columns: Sequence[str] | None = None) -> pd.DataFrame:
         """
-        Converte string de carga horária para número inteiro de horas.
-        
-        Recebe uma string como '120 horas' ou '15 semanas' e valor inteiro (em horas).
+        Read only the given columns of the preprocessed dataframe.
+
+        The artifact is built first if it doesn't exist yet or is stale.
         """
-        numero_str, tipo = str(valor_texto).split(' ')
-        if tipo == 'horas':
-            return int(numero_str)
-        elif tipo == 'semanas':
-            return 7 * 24 * int(numero_str)
-        else:
-            raise ValueError(f"Tipo desconhecido: {tipo}")
+        if not self.is_fresh():
+            fingerprint = self.source_fingerprint()
+            df_preprocessed = self.scrapped_data
+            if self.schema is None:
+                # raw scrapped values, typing wasn't done while crawling
+                df_preprocessed = self._preprocess(df_preprocessed)
+            else:
+                df_preprocessed = self._compact(df_preprocessed)
+            write_artifact(
+                df_preprocessed,
+                self._output_dataframe_path,
+                metadata={SOURCE_METADATA_KEY: json.dumps(fingerprint)},
+            )
+            if columns is None:
+                return df_preprocessed
+
+        return read_artifact(self._output_dataframe_path, columns)
+
+    def _extrair_carga_horaria(self, valores: pd.Series) -> pd.Series:
+        """
+        Converte strings de carga horária para números inteiros de horas.
+
+        Recebe strings como '120 horas' ou '15 semanas'. Só os valores distintos são
+        separados em número e unidade, e o resultado é espalhado de volta pelos códigos.
+        """
+        codes, uniques = pd.factorize(valores)
+        parts = pd.Series(uniques, dtype=object).astype(str).str.split(' ', n=1, expand=True)
+        parts = parts.reindex(columns=[0, 1])
+        unknown = ~parts[1].isin(list(HOURS_PER_UNIT))
+        if unknown.any():
+            raise ValueError(f"Tipo desconhecido: {parts[1][unknown].iloc[0]}")
+
+        horas = pd.array(
+            parts[0].astype(np.int32).to_numpy() * parts[1].map(HOURS_PER_UNIT).to_numpy(),
+            dtype='Int32',
+        )
+        return pd.Series(horas.take(codes, allow_fill=True), index=valores.index)
+
+    def _converter_datas(self, valores: pd.Series) -> pd.Series:
+        """Converte datas 'dd/mm/aaaa', interpretando cada data distinta uma única vez."""
+        codes, uniques = pd.factorize(valores)
+        datas = pd.DatetimeIndex(pd.to_datetime(
+            pd.Series(uniques, dtype=object), format='%d/%m/%Y', errors='coerce'
+        ))
+        return pd.Series(datas.take(codes, allow_fill=True), index=valores.index)
+
+    def _compact(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Coerce the columns to compact dtypes (categoricals and nullable small ints)."""
+        columns = {}
+        for col in df.columns:
+            if col in CATEGORY_COLUMNS:
+                columns[col] = df[col].astype('category')
+            elif col in CODE_COLUMNS:
+                columns[col] = df[col].astype('string').astype('category')
+            elif col in INT_DTYPES:
+                columns[col] = pd.to_numeric(df[col]).astype(INT_DTYPES[col])
+        return df.assign(**columns)
 
     def _preprocess(self, df: pd.DataFrame) -> pd.DataFrame:
         """Read the scrapped data and preprocess its values."""
         # filtra disciplinas sem créditos atribuídos
-        # use .loc[...] and .copy() to avoid SettingWithCopyWarning
-        df = df.loc[~df['n_creditos'].isnull()].copy()
+        df = df.loc[df['n_creditos'].notna()]
 
         # converte tipos de dados
-        df.loc[:, 'criacao'] = pd.to_datetime(
-            df['criacao'],
-            format='%d/%m/%Y',
-            errors='coerce'
+        df = df.assign(
+            criacao=self._converter_datas(df['criacao']),
+            carga_total=self._extrair_carga_horaria(df['carga_total']),
+            duracao=self._extrair_carga_horaria(df['duracao']),
         )
-        for col in ('carga_teorica', 'carga_pratica', 'carga_estudo', 'n_creditos'):
-            df.loc[:, col] = df[col].astype(int)
-
-        df.loc[:, 'carga_total'] = df['carga_total'].apply(self._extrair_carga_horaria)
-        df.loc[:, 'duracao'] = df['duracao'].apply(self._extrair_carga_horaria)
-        df.loc[:, 'carga_total'] = df['carga_total'].astype(int)
-        df.loc[:, 'duracao'] = df['duracao'].astype(int)
-
-        return df
+        return self._compact(df)
@@ -0,0 +1,198 @@
+"""
+Retomada de crawls interrompidos e registro das páginas que falharam.
+
+Checkpoints: com o setting `JOBDIR` o Scrapy persiste a fila de requisições e as
+requisições já vistas, e o spider guarda em `spider.state` as ofertas já processadas e
+no `EmentaStore` do `JOBDIR` as ementas já buscadas. Interrompido com Ctrl+C (uma vez)
+ou SIGTERM, o mesmo comando com o mesmo `JOBDIR` continua de onde parou, e os shards e a
+quarentena já gravados são mantidos.
+
+Ledger: as páginas cuja requisição falhou (erro de rede, HTTP 5xx depois dos retries,
+...) ou que vieram incompletas (ementa sem carga horária ou créditos) são registradas
+em `FAILED_LEDGER`, um JSON por linha. `scrapy retry_failed` busca novamente só essas
+páginas, com backoff exponencial entre tentativas, e mescla os itens no dataset.
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from scrapy import Request
+from scrapy.settings import BaseSettings
+
+
+def is_resuming(settings: BaseSettings) -> bool:
+    """Indica se o crawl retoma um `JOBDIR` de uma execução interrompida."""
+    jobdir = settings.get('JOBDIR')
+    return bool(jobdir) and Path(jobdir, 'requests.seen').exists()
+
+
+def finish_job(settings: BaseSettings) -> None:
+    """
+    Descarta a fila e as requisições vistas de um `JOBDIR` cujo crawl terminou.
+
+    Sem isso, rodar de novo com o mesmo `JOBDIR` filtraria todas as requisições como
+    repetidas e publicaria um dataset vazio.
+    """
+    jobdir = settings.get('JOBDIR')
+    if not jobdir:
+        return
+    Path(jobdir, 'requests.seen').unlink(missing_ok=True)
+    shutil.rmtree(Path(jobdir, 'requests.queue'), ignore_errors=True)
+    for path in Path(jobdir).glob(f'{EMENTAS_NAME}*'):
+        path.unlink()
+
+
+EMENTAS_NAME = 'ementas.sqlite'
+
+
+class EmentaStore:
+    def __init__(self, path: Path | None) -> None:
+        """
+        Ementas já buscadas, em disco, indexadas pelo código da disciplina.
+
+        O spider precisa da ementa para emitir as ofertas de uma disciplina descobertas
+        depois de a ementa ter sido processada. Guardá-las em memória (e no pickle do
+        `spider.state`) custaria o catálogo inteiro; aqui fica só um arquivo SQLite, lido
+        uma ementa por vez.
+
+        Args:
+            path: Arquivo do store, no `JOBDIR` para sobreviver à retomada, ou None para
+                um arquivo temporário apagado ao fechar.
+        """
+        self._path = path
+        self._tmp_dir: str | None = None
+        self._connection: sqlite3.Connection | None = None
+
+    @classmethod
+    def from_settings(cls, settings: BaseSettings) -> 'EmentaStore':
+        jobdir = settings.get('JOBDIR')
+        return cls(Path(jobdir, EMENTAS_NAME) if jobdir else None)
+
+    def open(self, resume: bool = False) -> None:
+        """
+        Args:
+            resume: Mantém as ementas de uma execução interrompida em vez de começar
+                do zero.
+        """
+        path = self._path
+        if path is None:
+            self._tmp_dir = tempfile.mkdtemp(prefix='ementas-')
+            path = Path(self._tmp_dir, EMENTAS_NAME)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if not resume:
+                path.unlink(missing_ok=True)
+
+        self._connection = sqlite3.connect(path)
+        # WAL sem fsync a cada commit: um crash perde no máximo as últimas ementas
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS ementas (codigo TEXT PRIMARY KEY, ementa TEXT NOT NULL)'
+        )
+
+    def get(self, codigo: str) -> dict[str, Any] | None:
+        row = self._connection.execute(
+            'SELECT ementa FROM ementas WHERE codigo = ?', (codigo,)
+        ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def __setitem__(self, codigo: str, ementa: dict[str, Any]) -> None:
+        with self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO ementas VALUES (?, ?)',
+                (codigo, json.dumps(ementa, ensure_ascii=False, default=str)),
+            )
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+        if self._tmp_dir is not None:
+            shutil.rmtree(self._tmp_dir, ignore_errors=True)
+            self._tmp_dir = None
+
+
+class FailureLedger:
+    def __init__(
+        self,
+        path: Path,
+        backoff_secs: float,
+        max_attempts: int,
+    ) -> None:
+        """
+        Registro das páginas que falharam ou vieram incompletas, indexado pela url.
+
+        Args:
+            path: Arquivo JSONL do ledger.
+            backoff_secs: Espera base antes de tentar de novo, dobrada a cada tentativa.
+            max_attempts: Tentativas depois das quais a página deixa de ser buscada.
+        """
+        self._path = path
+        self._backoff_secs = backoff_secs
+        self._max_attempts = max_attempts
+        self.entries: dict[str, dict[str, Any]] = {}
+
+    @classmethod
+    def from_settings(cls, settings: BaseSettings) -> 'FailureLedger':
+        return cls(
+            path=Path(settings.get('FAILED_LEDGER')),
+            backoff_secs=settings.getfloat('RETRY_FAILED_BACKOFF_SECS'),
+            max_attempts=settings.getint('RETRY_FAILED_MAX_ATTEMPTS'),
+        )
+
+    def load(self) -> None:
+        if not self._path.exists():
+            return
+        with self._path.open(encoding='utf-8') as f:
+            for line in f:
+                entry = json.loads(line)
+                self.entries[entry['url']] = entry
+
+    def record(self, request: Request, kind: str, reason: str) -> None:
+        """
+        Registra uma página que falhou (`kind='failed'`) ou veio incompleta ('partial').
+        """
+        self.entries[request.url] = {
+            'url': request.url,
+            'method': request.method,
+            'body': request.body.decode('utf-8'),
+            'callback': request.callback.__name__,
+            'cb_kwargs': request.cb_kwargs,
+            'kind': kind,
+            'reason': reason,
+            'attempts': request.meta.get('ledger_attempts', 0) + 1,
+            'last_attempt': time.time(),
+        }
+
+    def due(self, force: bool = False) -> list[dict[str, Any]]:
+        """
+        Páginas a buscar novamente: já passado o backoff e abaixo do limite de tentativas.
+
+        Args:
+            force: Ignora o backoff (o limite de tentativas continua valendo).
+        """
+        now = time.time()
+        due = []
+        for entry in self.entries.values():
+            if entry['attempts'] >= self._max_attempts:
+                continue
+            wait = self._backoff_secs * 2 ** (entry['attempts'] - 1)
+            if force or now - entry['last_attempt'] >= wait:
+                due.append(entry)
+        return due
+
+    def write(self) -> None:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._path.with_name(self._path.name + '.tmp')
+        with tmp_path.open('w', encoding='utf-8') as f:
+            for entry in self.entries.values():
+                f.write(json.dumps(entry, ensure_ascii=False))
+                f.write('\n')
+        os.replace(tmp_path, self._path)
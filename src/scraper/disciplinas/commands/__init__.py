@@ -0,0 +1,3 @@
+"""
+Comandos do Scrapy específicos do projeto (ver COMMANDS_MODULE em settings.py).
+"""
@@ -0,0 +1,139 @@
+"""
+Micro-benchmark do processamento das páginas de ementa.
+
+Compara, sobre páginas salvas, as consultas XPath por rótulo usadas anteriormente no
+`parse_ementa` com o extrator de passada única de `disciplinas.extractors`, e confere
+se os dois produzem o mesmo resultado. Cada página é reconstruída a cada repetição,
+então o parse do HTML entra na conta dos dois lados.
+
+    scrapy bench_ementa                    # páginas Disciplina?sgldis= do cache HTTP
+    scrapy bench_ementa paginas/*.html     # ou arquivos HTML salvos
+"""
+
+import time
+from pathlib import Path
+from typing import Callable
+
+from scrapy.commands import ScrapyCommand
+from scrapy.exceptions import UsageError
+from scrapy.http import Response
+
+from disciplinas.extractors import DOCENTES_LABEL, IDIOMAS_LABEL, extract_sections
+from disciplinas.saved_pages import iter_cached_pages, iter_html_files, to_response
+
+SECTION_LABELS = (
+    'Conteúdo:',
+    'Objetivos:',
+    'Justificativa:',
+    'Forma de Avaliação:',
+    'Bibliografia:',
+    'Tipo de oferecimento da disciplina:',
+)
+
+
+def legacy_extract(response: Response) -> dict:
+    """Extração com uma consulta no documento inteiro por rótulo (implementação antiga)."""
+    info = {}
+    for p_element in response.css("p.info.infopt"):
+        topico = p_element.css("strong::text").get(default='').strip()
+        info[topico] = p_element.xpath(
+            "./strong/following-sibling::text()"
+        ).get(default='').strip()
+
+    docentes_nodes = response.xpath(
+        f"//strong[text() = '{DOCENTES_LABEL}']/parent::p/following-sibling"
+        "::p[@class='info' and not(strong)]"
+    )
+    texts = {
+        label: "".join(response.xpath(
+            f"//strong[text() = '{label}']/parent::p/following-sibling::p"
+            "[contains(@class, 'campoTextoMantendoLinhas')][1]//text()"
+        ).getall()).strip()
+        for label in SECTION_LABELS
+    }
+    return {
+        'cargas': response.css("table.dataTable.selecionavel > tr td::text").getall(),
+        'info': info,
+        'docentes': [
+            node.css('::text').get(default='').strip() for node in docentes_nodes
+        ],
+        'idiomas': response.xpath(
+            f"//strong[text() = '{IDIOMAS_LABEL}']/parent::p/"
+            "following-sibling::div/text()"
+        ).getall(),
+        'texts': texts,
+    }
+
+
+def single_pass_extract(response: Response) -> dict:
+    sections = extract_sections(response.selector.root)
+    return {
+        'cargas': sections.cargas,
+        'info': sections.info,
+        'docentes': sections.docentes,
+        'idiomas': sections.idiomas,
+        'texts': {label: sections.texts.get(label, '') for label in SECTION_LABELS},
+    }
+
+
+def _pages_per_second(
+    extract: Callable[[Response], dict],
+    pages: list[tuple[str, bytes]],
+    repeat: int,
+) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for url, body in pages:
+            extract(to_response(url, body))
+    return repeat * len(pages) / (time.perf_counter() - start)
+
+
+class Command(ScrapyCommand):
+    requires_project = True
+    requires_crawler_process = False
+    default_settings = {'LOG_ENABLED': False}
+
+    def syntax(self) -> str:
+        return "[options] [arquivo.html ...]"
+
+    def short_desc(self) -> str:
+        return "Mede páginas de ementa processadas por segundo, antes e depois"
+
+    def add_options(self, parser) -> None:
+        super().add_options(parser)
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help="quantidade de passadas sobre as páginas (padrão: 5)",
+        )
+        parser.add_argument(
+            '--spider', default='janus_disciplinas',
+            help="spider dono do cache HTTP (padrão: janus_disciplinas)",
+        )
+
+    def run(self, args: list[str], opts) -> None:
+        if args:
+            pages = list(iter_html_files(Path(arg) for arg in args))
+        else:
+            pages = list(iter_cached_pages(
+                self.settings, opts.spider, url_pattern='Disciplina?sgldis='
+            ))
+        if not pages:
+            raise UsageError("Nenhuma página de ementa encontrada.")
+
+        mismatches = [
+            url for url, body in pages
+            if legacy_extract(to_response(url, body))
+            != single_pass_extract(to_response(url, body))
+        ]
+
+        legacy = _pages_per_second(legacy_extract, pages, opts.repeat)
+        single_pass = _pages_per_second(single_pass_extract, pages, opts.repeat)
+
+        print(f"Páginas: {len(pages)} x {opts.repeat} repetições")
+        print(f"XPath por rótulo (antes): {legacy:10.1f} páginas/s")
+        print(f"Passada única (depois):   {single_pass:10.1f} páginas/s")
+        print(f"Speed-up:                 {single_pass / legacy:10.2f}x")
+        if mismatches:
+            print(f"Resultados divergentes em {len(mismatches)} páginas:")
+            for url in mismatches[:10]:
+                print(f"  {url}")
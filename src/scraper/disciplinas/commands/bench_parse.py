@@ -0,0 +1,90 @@
+"""
+Benchmark dos callbacks do spider sobre páginas salvas, sem acessar a rede.
+
+Executa todos os callbacks de forma síncrona sobre o corpus de replay (ver
+`disciplinas/replay.py`) e reporta os percentis de latência por callback e a vazão de
+itens, considerando apenas o tempo gasto nos callbacks.
+
+    scrapy bench_parse --repeat 50
+"""
+
+from pathlib import Path
+
+from loguru import logger
+from scrapy.commands import ScrapyCommand
+from scrapy.exceptions import UsageError
+from scrapy.utils.test import get_crawler
+
+from disciplinas.replay import FixtureIndex, replay_callbacks
+from disciplinas.spiders.janus_disciplinas_spider import JanusDisciplinasSpider
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Percentil `q` (entre 0 e 100) pelo método do vizinho mais próximo."""
+    ordered = sorted(values)
+    rank = round(q / 100 * (len(ordered) - 1))
+    return ordered[rank]
+
+
+class Command(ScrapyCommand):
+    requires_project = True
+    default_settings = {'LOG_ENABLED': False}
+
+    def syntax(self) -> str:
+        return "[options]"
+
+    def short_desc(self) -> str:
+        return "Mede a latência de cada callback do spider sobre páginas salvas"
+
+    def add_options(self, parser) -> None:
+        super().add_options(parser)
+        parser.add_argument(
+            '--fixtures', default='fixtures/janus',
+            help="diretório com as páginas salvas e o index.json (padrão: fixtures/janus)",
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help="quantidade de replays completos do corpus (padrão: 20)",
+        )
+
+    def run(self, args: list[str], opts) -> None:
+        index = FixtureIndex(Path(opts.fixtures))
+        # os logs dos callbacks poluiriam o relatório
+        logger.remove()
+        settings = self.settings.copy_to_dict()
+        settings['LOG_ENABLED'] = False
+
+        latencies: dict[str, list[float]] = {}
+        items = 0
+        missing: set[str] = set()
+        for _ in range(opts.repeat):
+            # spider novo a cada replay, para não reaproveitar as ementas já vistas
+            crawler = get_crawler(JanusDisciplinasSpider, settings)
+            spider = JanusDisciplinasSpider.from_crawler(crawler)
+            result = replay_callbacks(spider, index)
+            for callback, values in result['latencies'].items():
+                latencies.setdefault(callback, []).extend(values)
+            items += result['items']
+            missing.update(result['missing'])
+
+        if not latencies:
+            raise UsageError(f"Nenhuma página de {opts.fixtures} foi processada.")
+
+        print(f"Páginas no corpus: {len(index)}, replays: {opts.repeat}")
+        print(
+            f"{'callback':<32}{'chamadas':>9}{'p50 ms':>9}{'p90 ms':>9}"
+            f"{'p99 ms':>9}{'max ms':>9}"
+        )
+        for callback, values in latencies.items():
+            print(
+                f"{callback:<32}{len(values):>9}"
+                f"{percentile(values, 50) * 1e3:>9.3f}"
+                f"{percentile(values, 90) * 1e3:>9.3f}"
+                f"{percentile(values, 99) * 1e3:>9.3f}"
+                f"{max(values) * 1e3:>9.3f}"
+            )
+
+        total = sum(sum(values) for values in latencies.values())
+        print(f"Itens: {items} em {total:.3f}s de callbacks ({items / total:.1f} itens/s)")
+        if missing:
+            print(f"Urls fora do corpus ({len(missing)}): {sorted(missing)[:5]}")
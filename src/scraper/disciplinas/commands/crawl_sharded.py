@@ -0,0 +1,171 @@
+"""
+Crawl particionado por comissão, com um processo do spider por parte.
+
+    scrapy crawl_sharded --shards 4
+    scrapy crawl_sharded --shards 3 \\
+        --comissao 'Instituto de Ciências Matemáticas e de Computação' \\
+        --comissao 'Instituto de Matemática e Estatística'
+
+Cada parte `k` grava shards, quarentena, ledger de falhas, log, telemetria, cache
+HTTP e checkpoint (`JOBDIR`) em `<work-dir>/shard-k`. Se todas as partes terminarem com
+sucesso, os shards são mesclados em `SHARDS_DIR` (ver `disciplinas/sharding.py`); com
+`--comissao`, só os itens dessas comissões são substituídos no dataset existente. Se
+alguma parte for interrompida, rodar o mesmo comando retoma a parte do checkpoint.
+
+O orçamento de cortesia com o Janus é dividido entre os processos: cada um usa
+`CONCURRENT_REQUESTS_PER_DOMAIN / N` requisições simultâneas e `DOWNLOAD_DELAY * N` de
+intervalo, então a taxa total de requisições é a mesma de um crawl único. Os `-s`
+passados ao comando são repassados a todos os processos.
+"""
+
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from scrapy.commands import ScrapyCommand
+from scrapy.exceptions import UsageError
+
+from disciplinas.sharding import COMISSOES_SEPARATOR, merge_datasets
+from disciplinas.shards import MANIFEST_NAME
+
+
+class Command(ScrapyCommand):
+    requires_project = True
+    requires_crawler_process = False
+
+    def syntax(self) -> str:
+        return "[options]"
+
+    def short_desc(self) -> str:
+        return "Coleta as comissões em paralelo, um processo por parte, e mescla o resultado"
+
+    def add_options(self, parser) -> None:
+        super().add_options(parser)
+        parser.add_argument(
+            '--shards', type=int, default=4,
+            help="quantidade de processos (padrão: 4)",
+        )
+        parser.add_argument(
+            '--comissao', action='append', default=None,
+            help="código ou nome de uma comissão a coletar (pode ser repetido)",
+        )
+        parser.add_argument(
+            '--work-dir', default='../data/sharded',
+            help="diretório de trabalho das partes (padrão: ../data/sharded)",
+        )
+        parser.add_argument(
+            '--spider', default='janus_disciplinas',
+            help="spider a ser executado (padrão: janus_disciplinas)",
+        )
+
+    def _shard_command(self, index: int, shard_dir: Path, opts) -> list[str]:
+        n_shards = opts.shards
+        concurrency = self.settings.getint('CONCURRENT_REQUESTS_PER_DOMAIN')
+        delay = self.settings.getfloat('DOWNLOAD_DELAY')
+
+        command = [
+            sys.executable, '-m', 'scrapy', 'crawl', opts.spider,
+            '-a', f'shard={index}/{n_shards}',
+        ]
+        if opts.comissao:
+            command += ['-a', f'comissoes={COMISSOES_SEPARATOR.join(opts.comissao)}']
+        for setting in opts.set:
+            command += ['-s', setting]
+
+        shard_settings = {
+            'SHARDS_DIR': shard_dir / 'shards',
+            'NORMALIZATION_QUARANTINE': shard_dir / 'quarantine.jsonl',
+            'HTTPCACHE_DIR': (shard_dir / 'httpcache').resolve(),
+            'JOBDIR': shard_dir / 'job',
+            'FAILED_LEDGER': shard_dir / 'failed.jsonl',
+            'TELEMETRY_DIR': shard_dir / 'telemetry',
+            'CONCURRENT_REQUESTS_PER_DOMAIN': max(1, concurrency // n_shards),
+            'DOWNLOAD_DELAY': delay * n_shards,
+        }
+        for name, value in shard_settings.items():
+            command += ['-s', f'{name}={value}']
+        return command
+
+    def run(self, args: list[str], opts) -> None:
+        if opts.shards < 1:
+            raise UsageError("--shards deve ser maior que zero")
+        if opts.shards > self.settings.getint('CONCURRENT_REQUESTS_PER_DOMAIN'):
+            print(
+                f"Aviso: {opts.shards} processos com ao menos 1 requisição simultânea "
+                "cada excedem CONCURRENT_REQUESTS_PER_DOMAIN"
+            )
+
+        work_dir = Path(opts.work_dir)
+        started_at = time.time()
+        processes = []
+        for index in range(opts.shards):
+            shard_dir = work_dir / f'shard-{index}'
+            shard_dir.mkdir(parents=True, exist_ok=True)
+            command = self._shard_command(index, shard_dir, opts)
+            # Os logs do Scrapy e do loguru vão para stderr
+            with (shard_dir / 'crawl.log').open('w', encoding='utf-8') as log:
+                process = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT)
+            processes.append((index, shard_dir, process))
+        print(f"{opts.shards} processos iniciados, logs em {work_dir}/shard-*/crawl.log")
+
+        failed = []
+        for index, shard_dir, process in processes:
+            process.wait()
+            manifest_path = shard_dir / 'shards' / MANIFEST_NAME
+            finished = (
+                process.returncode == 0
+                and manifest_path.exists()
+                and manifest_path.stat().st_mtime >= started_at
+            )
+            print(f"  shard {index}: {'ok' if finished else 'falhou'}")
+            if not finished:
+                failed.append(index)
+
+        if failed:
+            self.exitcode = 1
+            print(f"Partes {failed} falharam, o dataset em SHARDS_DIR foi mantido.")
+            return
+
+        output = Path(self.settings.get('SHARDS_DIR'))
+        n_items = merge_datasets(
+            sources=[shard_dir / 'shards' for _, shard_dir, _ in processes],
+            output=output,
+            items_per_shard=self.settings.getint('SHARDS_ITEMS_PER_SHARD'),
+            comissoes=set(opts.comissao) if opts.comissao else None,
+        )
+
+        quarantine_path = Path(self.settings.get('NORMALIZATION_QUARANTINE'))
+        quarantine_path.parent.mkdir(parents=True, exist_ok=True)
+        with quarantine_path.open('w', encoding='utf-8') as quarantine:
+            for _, shard_dir, _ in processes:
+                shard_quarantine = shard_dir / 'quarantine.jsonl'
+                if shard_quarantine.exists():
+                    quarantine.write(shard_quarantine.read_text(encoding='utf-8'))
+
+        self._merge_ledgers([shard_dir for _, shard_dir, _ in processes], opts)
+
+        elapsed = time.time() - started_at
+        print(f"{n_items} itens mesclados em {output} ({elapsed:.1f}s)")
+
+    def _merge_ledgers(self, shard_dirs: list[Path], opts) -> None:
+        """Junta os ledgers de falhas das partes no `FAILED_LEDGER` do projeto."""
+        ledger_path = Path(self.settings.get('FAILED_LEDGER'))
+        entries: dict[str, str] = {}
+        # Numa atualização parcial as falhas das demais comissões continuam valendo
+        if opts.comissao and ledger_path.exists():
+            for line in ledger_path.read_text(encoding='utf-8').splitlines():
+                entries[json.loads(line)['url']] = line
+        for shard_dir in shard_dirs:
+            shard_ledger = shard_dir / 'failed.jsonl'
+            if shard_ledger.exists():
+                for line in shard_ledger.read_text(encoding='utf-8').splitlines():
+                    entries[json.loads(line)['url']] = line
+
+        ledger_path.parent.mkdir(parents=True, exist_ok=True)
+        ledger_path.write_text(
+            ''.join(line + '\n' for line in entries.values()), encoding='utf-8'
+        )
+        if entries:
+            print(f"{len(entries)} páginas no ledger de falhas, veja `scrapy retry_failed`")
@@ -0,0 +1,142 @@
+"""
+Teste de carga do spider contra o servidor local que imita o Janus.
+
+Sobe o servidor (`disciplinas/standin.py`) em outro processo, roda o spider apontado
+para ele e mostra a vazão do crawl. As opções do catálogo e do servidor são as mesmas
+de `scrapy standin`, e os settings de concorrência podem ser ajustados com `-s`:
+
+    scrapy loadtest                                          # ~2k disciplinas (hoje)
+    scrapy loadtest --disciplinas 20000 -s DOWNLOAD_DELAY=0  # 10x
+    scrapy loadtest --disciplinas 200000 --latency 0.2 --error-rate 0.01 \\
+        -s DOWNLOAD_DELAY=0 -s CONCURRENT_REQUESTS_PER_DOMAIN=32 \\
+        -s AUTOTHROTTLE_ENABLED=1                            # 100x
+
+Os shards, a quarentena e o ledger de falhas são escritos em `--data-dir`, sem tocar no
+dataset real.
+"""
+
+import multiprocessing
+import socket
+import time
+from pathlib import Path
+
+from scrapy.commands import BaseRunSpiderCommand
+from scrapy.exceptions import UsageError
+
+from disciplinas.commands.standin import add_standin_options, server_from_options
+
+# Settings que influenciam a vazão, repetidos no relatório
+TUNING_SETTINGS = (
+    'CONCURRENT_REQUESTS',
+    'CONCURRENT_REQUESTS_PER_DOMAIN',
+    'DOWNLOAD_DELAY',
+    'AUTOTHROTTLE_ENABLED',
+    'AUTOTHROTTLE_TARGET_CONCURRENCY',
+)
+
+
+def _serve(opts) -> None:
+    server = server_from_options(opts)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def _wait_for_port(port: int, process: multiprocessing.Process, timeout: float) -> None:
+    """Espera o servidor aceitar conexões (o catálogo pode demorar a ser gerado)."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if not process.is_alive():
+            raise UsageError(f"O servidor local terminou com código {process.exitcode}")
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise UsageError(f"O servidor local não respondeu na porta {port} em {timeout:.0f}s")
+
+
+class Command(BaseRunSpiderCommand):
+    requires_project = True
+
+    def syntax(self) -> str:
+        return "[options]"
+
+    def short_desc(self) -> str:
+        return "Mede a vazão do spider contra um Janus local sintético"
+
+    def add_options(self, parser) -> None:
+        super().add_options(parser)
+        add_standin_options(parser)
+        parser.add_argument(
+            '--data-dir', default='../data/loadtest',
+            help="diretório de saída dos shards e da quarentena (padrão: ../data/loadtest)",
+        )
+        parser.add_argument(
+            '--spider', default='janus_disciplinas',
+            help="spider a ser executado (padrão: janus_disciplinas)",
+        )
+        parser.add_argument(
+            '--startup-timeout', type=float, default=120,
+            help="tempo máximo para o servidor subir, em segundos (padrão: 120)",
+        )
+
+    def process_options(self, args: list[str], opts) -> None:
+        super().process_options(args, opts)
+        output = Path(opts.data_dir)
+        self.settings.set(
+            'JANUS_URL', f'http://127.0.0.1:{opts.port}/janus', priority='cmdline'
+        )
+        self.settings.set('HTTPCACHE_ENABLED', False, priority='cmdline')
+        self.settings.set('SHARDS_DIR', str(output / 'shards'), priority='cmdline')
+        self.settings.set(
+            'NORMALIZATION_QUARANTINE', str(output / 'quarantine.jsonl'),
+            priority='cmdline',
+        )
+        self.settings.set(
+            'FAILED_LEDGER', str(output / 'failed.jsonl'), priority='cmdline'
+        )
+        self.settings.set('TELEMETRY_DIR', str(output / 'telemetry'), priority='cmdline')
+
+    def run(self, args: list[str], opts) -> None:
+        server = multiprocessing.Process(target=_serve, args=(opts,), daemon=True)
+        server.start()
+        try:
+            _wait_for_port(opts.port, server, opts.startup_timeout)
+            crawler = self.crawler_process.create_crawler(opts.spider)
+            self.crawler_process.crawl(crawler, **opts.spargs)
+            self.crawler_process.start()
+        finally:
+            server.terminate()
+            server.join()
+
+        self._report(crawler.stats.get_stats(), opts)
+
+    def _report(self, stats: dict, opts) -> None:
+        elapsed = stats.get('elapsed_time_seconds') or float('nan')
+        pages = stats.get('response_received_count', 0)
+        items = stats.get('item_scraped_count', 0)
+        errors = sum(
+            value for key, value in stats.items()
+            if key.startswith('downloader/response_status_count/5')
+        )
+
+        print()
+        print(
+            f"Catálogo: {opts.disciplinas} disciplinas, latência "
+            f"{opts.latency * 1000:.0f}±{opts.jitter * 1000:.0f}ms, "
+            f"erros {opts.error_rate:.1%}"
+        )
+        for name in TUNING_SETTINGS:
+            print(f"  {name} = {self.settings.get(name)}")
+        print(f"{'tempo':>14}  {elapsed:10.1f} s")
+        print(f"{'páginas':>14}  {pages:10d}  ({pages / elapsed:.1f}/s)")
+        print(f"{'itens':>14}  {items:10d}  ({items / elapsed:.1f}/s)")
+        print(f"{'quarentena':>14}  {stats.get('normalization/quarantined', 0):10d}")
+        print(f"{'respostas 5xx':>14}  {errors:10d}")
+        print(f"{'retries':>14}  {stats.get('retry/count', 0):10d}")
+        print(f"{'retries esg.':>14}  {stats.get('retry/max_reached', 0):10d}")
+        print(f"{'motivo':>14}  {stats.get('finish_reason')}")
+        if stats.get('telemetry/report'):
+            print(f"{'telemetria':>14}  {stats['telemetry/report']}")
@@ -0,0 +1,88 @@
+"""
+Converte o cache HTTP em diretórios (`FilesystemCacheStorage`) para o cache SQLite.
+
+    scrapy pack_httpcache
+    scrapy pack_httpcache --compression zstd
+
+Cada resposta do diretório `<HTTPCACHE_DIR>/<spider>/` é gravada, com o mesmo
+fingerprint, em `<HTTPCACHE_DIR>/<spider>.sqlite3` (ver `disciplinas/httpcache.py`).
+O diretório original não é removido.
+"""
+
+import gzip
+import pickle
+from pathlib import Path
+
+from scrapy.commands import ScrapyCommand
+from scrapy.exceptions import UsageError
+from scrapy.utils.project import data_path
+
+from disciplinas.httpcache import INSERT_RESPONSE, cache_path, compress, open_cache
+
+
+class Command(ScrapyCommand):
+    requires_project = True
+    requires_crawler_process = False
+    default_settings = {'LOG_ENABLED': False}
+
+    def syntax(self) -> str:
+        return "[options]"
+
+    def short_desc(self) -> str:
+        return "Converte o cache HTTP em diretórios para o cache SQLite"
+
+    def add_options(self, parser) -> None:
+        super().add_options(parser)
+        parser.add_argument(
+            '--spider', default='janus_disciplinas',
+            help="spider dono do cache HTTP (padrão: janus_disciplinas)",
+        )
+        parser.add_argument(
+            '--compression', default=None, choices=('zlib', 'zstd', 'none'),
+            help="compressão dos corpos (padrão: HTTPCACHE_COMPRESSION)",
+        )
+
+    def run(self, args: list[str], opts) -> None:
+        cache_dir = Path(data_path(self.settings['HTTPCACHE_DIR'])) / opts.spider
+        if not cache_dir.is_dir():
+            raise UsageError(f"Cache em diretórios não encontrado em {cache_dir}")
+
+        codec = opts.compression or self.settings.get('HTTPCACHE_COMPRESSION', 'zlib')
+        open_file = gzip.open if self.settings.getbool('HTTPCACHE_GZIP') else open
+        path = cache_path(self.settings, opts.spider)
+        db = open_cache(path)
+
+        size_before = 0
+        count = 0
+        for meta_path in sorted(cache_dir.glob('*/*/pickled_meta')):
+            request_dir = meta_path.parent
+            with open_file(meta_path, 'rb') as f:
+                metadata = pickle.load(f)
+            with open_file(request_dir / 'response_headers', 'rb') as f:
+                headers = f.read()
+            with open_file(request_dir / 'response_body', 'rb') as f:
+                body = f.read()
+
+            size_before += sum(p.stat().st_size for p in request_dir.iterdir())
+            db.execute(INSERT_RESPONSE, (
+                request_dir.name,
+                metadata['url'],
+                metadata['method'],
+                metadata['status'],
+                metadata['response_url'],
+                headers,
+                compress(body, codec),
+                codec,
+                metadata['timestamp'],
+            ))
+            count += 1
+
+        db.commit()
+        db.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        db.execute('VACUUM')
+        db.close()
+
+        print(
+            f"{count} respostas gravadas em {path}: "
+            f"{size_before / 2**20:.1f} MiB -> {path.stat().st_size / 2**20:.1f} MiB"
+        )
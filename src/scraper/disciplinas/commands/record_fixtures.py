@@ -0,0 +1,65 @@
+"""
+Grava um corpus de replay a partir do cache HTTP de um crawl anterior.
+
+    scrapy record_fixtures ../data/fixtures --limit 200
+
+Copia as respostas do cache para arquivos HTML e escreve o `index.json` usado pelo
+replay (ver `disciplinas/replay.py`). `--limit` restringe a quantidade de ementas
+(páginas Disciplina), que são a maior parte do cache.
+"""
+
+import json
+from pathlib import Path
+
+from scrapy.commands import ScrapyCommand
+from scrapy.exceptions import UsageError
+
+from disciplinas.replay import INDEX_NAME
+from disciplinas.saved_pages import iter_cached_pages
+
+
+class Command(ScrapyCommand):
+    requires_project = True
+    requires_crawler_process = False
+    default_settings = {'LOG_ENABLED': False}
+
+    def syntax(self) -> str:
+        return "[options] <diretório>"
+
+    def short_desc(self) -> str:
+        return "Grava um corpus de replay a partir do cache HTTP"
+
+    def add_options(self, parser) -> None:
+        super().add_options(parser)
+        parser.add_argument(
+            '--limit', type=int, default=None,
+            help="quantidade máxima de páginas de ementa gravadas",
+        )
+        parser.add_argument(
+            '--spider', default='janus_disciplinas',
+            help="spider dono do cache HTTP (padrão: janus_disciplinas)",
+        )
+
+    def run(self, args: list[str], opts) -> None:
+        if len(args) != 1:
+            raise UsageError("Informe o diretório de destino.")
+
+        output = Path(args[0])
+        output.mkdir(parents=True, exist_ok=True)
+
+        index: dict[str, str] = {}
+        ementas = 0
+        for url, body in iter_cached_pages(self.settings, opts.spider):
+            if 'Disciplina?sgldis=' in url:
+                if opts.limit is not None and ementas >= opts.limit:
+                    continue
+                ementas += 1
+
+            file_name = f'{len(index):05d}.html'
+            (output / file_name).write_bytes(body)
+            index[url] = file_name
+
+        with (output / INDEX_NAME).open('w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, indent=2)
+
+        print(f"{len(index)} páginas gravadas em {output}")
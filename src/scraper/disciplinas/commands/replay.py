@@ -0,0 +1,57 @@
+"""
+Executa o spider de ponta a ponta sobre páginas salvas, sem acessar a rede.
+
+    scrapy replay                                  # corpus em fixtures/janus
+    scrapy replay --fixtures outro/corpus --data-dir ../data/replay
+
+Os shards, a quarentena e o ledger de falhas são escritos em `--data-dir`, sem tocar no
+dataset real.
+"""
+
+from pathlib import Path
+
+from scrapy.commands import BaseRunSpiderCommand
+
+
+class Command(BaseRunSpiderCommand):
+    requires_project = True
+
+    def syntax(self) -> str:
+        return "[options]"
+
+    def short_desc(self) -> str:
+        return "Executa o spider offline sobre as páginas salvas"
+
+    def add_options(self, parser) -> None:
+        super().add_options(parser)
+        parser.add_argument(
+            '--fixtures', default='fixtures/janus',
+            help="diretório com as páginas salvas e o index.json (padrão: fixtures/janus)",
+        )
+        parser.add_argument(
+            '--data-dir', default='../data/replay',
+            help="diretório de saída dos shards e da quarentena (padrão: ../data/replay)",
+        )
+        parser.add_argument(
+            '--spider', default='janus_disciplinas',
+            help="spider a ser executado (padrão: janus_disciplinas)",
+        )
+
+    def process_options(self, args: list[str], opts) -> None:
+        super().process_options(args, opts)
+        output = Path(opts.data_dir)
+        self.settings.set('REPLAY_DIR', opts.fixtures, priority='cmdline')
+        self.settings.set('HTTPCACHE_ENABLED', False, priority='cmdline')
+        self.settings.set('SHARDS_DIR', str(output / 'shards'), priority='cmdline')
+        self.settings.set(
+            'NORMALIZATION_QUARANTINE', str(output / 'quarantine.jsonl'),
+            priority='cmdline',
+        )
+        self.settings.set(
+            'FAILED_LEDGER', str(output / 'failed.jsonl'), priority='cmdline'
+        )
+        self.settings.set('TELEMETRY_DIR', str(output / 'telemetry'), priority='cmdline')
+
+    def run(self, args: list[str], opts) -> None:
+        self.crawler_process.crawl(opts.spider, **opts.spargs)
+        self.crawler_process.start()
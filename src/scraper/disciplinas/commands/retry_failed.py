@@ -0,0 +1,90 @@
+"""
+Busca novamente as páginas do ledger de falhas e corrige o dataset.
+
+    scrapy retry_failed             # páginas cujo backoff já passou
+    scrapy retry_failed --force     # todas, ignorando o backoff
+
+Só as urls registradas em `FAILED_LEDGER` (requisições que falharam ou ementas
+incompletas) são buscadas, sem o cache HTTP e com autothrottle. Os itens coletados
+substituem os de mesma chave no dataset em `SHARDS_DIR`, e as páginas que falharam de
+novo continuam no ledger com o backoff dobrado (ver `disciplinas/checkpoints.py`).
+"""
+
+from pathlib import Path
+
+from scrapy.commands import BaseRunSpiderCommand
+
+from disciplinas.sharding import merge_datasets
+from disciplinas.shards import MANIFEST_NAME, read_manifest
+
+
+class Command(BaseRunSpiderCommand):
+    requires_project = True
+    default_settings = {
+        'AUTOTHROTTLE_ENABLED': True,
+        'RETRY_TIMES': 5,
+    }
+
+    def syntax(self) -> str:
+        return "[options]"
+
+    def short_desc(self) -> str:
+        return "Busca novamente as páginas que falharam e corrige o dataset"
+
+    def add_options(self, parser) -> None:
+        super().add_options(parser)
+        parser.add_argument(
+            '--force', action='store_true',
+            help="ignora o backoff entre tentativas",
+        )
+        parser.add_argument(
+            '--data-dir', default='../data/retry',
+            help="diretório de trabalho da nova tentativa (padrão: ../data/retry)",
+        )
+        parser.add_argument(
+            '--spider', default='janus_disciplinas',
+            help="spider a ser executado (padrão: janus_disciplinas)",
+        )
+
+    def process_options(self, args: list[str], opts) -> None:
+        super().process_options(args, opts)
+        self._dataset_dir = Path(self.settings.get('SHARDS_DIR'))
+        output = Path(opts.data_dir)
+        # Uma resposta com erro ou incompleta pode estar no cache
+        self.settings.set('HTTPCACHE_ENABLED', False, priority='cmdline')
+        self.settings.set('SHARDS_DIR', str(output / 'shards'), priority='cmdline')
+        self.settings.set(
+            'NORMALIZATION_QUARANTINE', str(output / 'quarantine.jsonl'),
+            priority='cmdline',
+        )
+        if opts.force:
+            self.settings.set('RETRY_FAILED_BACKOFF_SECS', 0, priority='cmdline')
+
+    def run(self, args: list[str], opts) -> None:
+        crawler = self.crawler_process.create_crawler(opts.spider)
+        self.crawler_process.crawl(crawler, retry_failed=True, **opts.spargs)
+        self.crawler_process.start()
+
+        stats = crawler.stats.get_stats()
+        retry_dir = Path(self.settings.get('SHARDS_DIR'))
+        if stats.get('finish_reason') != 'finished' or not (retry_dir / MANIFEST_NAME).exists():
+            self.exitcode = 1
+            print("Nova tentativa interrompida, o dataset não foi alterado.")
+            return
+
+        if read_manifest(retry_dir)['items'] == 0:
+            print("Nenhum item novo, o dataset não foi alterado.")
+        else:
+            n_items = merge_datasets(
+                sources=[retry_dir],
+                output=self._dataset_dir,
+                items_per_shard=self.settings.getint('SHARDS_ITEMS_PER_SHARD'),
+                patch=True,
+            )
+            print(
+                f"{stats.get('item_scraped_count', 0)} itens corrigidos, "
+                f"{n_items} itens em {self._dataset_dir}"
+            )
+
+        failed = stats.get('ledger/failed', 0) + stats.get('ledger/partial', 0)
+        print(f"{failed} páginas continuam no ledger de falhas")
@@ -0,0 +1,101 @@
+"""
+Sobe o servidor local que imita o Janus (ver `disciplinas/standin.py`).
+
+    scrapy standin                                   # ~2k disciplinas, porta 8765
+    scrapy standin --disciplinas 200000 --latency 0.2 --error-rate 0.01
+
+Com o servidor no ar, o spider pode ser apontado para ele com
+`scrapy crawl janus_disciplinas -s JANUS_URL=http://127.0.0.1:8765/janus`.
+"""
+
+from scrapy.commands import ScrapyCommand
+
+from disciplinas.standin import DEFAULT_DISCIPLINAS, StandinServer, SyntheticCatalogue
+
+
+def add_standin_options(parser) -> None:
+    """Opções do catálogo sintético e do servidor, compartilhadas com `loadtest`."""
+    parser.add_argument(
+        '--disciplinas', type=int, default=DEFAULT_DISCIPLINAS,
+        help=f"quantidade de disciplinas do catálogo (padrão: {DEFAULT_DISCIPLINAS})",
+    )
+    parser.add_argument(
+        '--comissoes', type=int, default=40,
+        help="quantidade de comissões de pós-graduação (padrão: 40)",
+    )
+    parser.add_argument(
+        '--shared-fraction', type=float, default=0.2,
+        help="fração das disciplinas oferecidas em uma segunda área (padrão: 0.2)",
+    )
+    parser.add_argument(
+        '--malformed-rate', type=float, default=0.01,
+        help="fração das ementas malformadas (padrão: 0.01)",
+    )
+    parser.add_argument(
+        '--seed', type=int, default=0,
+        help="semente do catálogo e dos atrasos (padrão: 0)",
+    )
+    parser.add_argument(
+        '--port', type=int, default=8765,
+        help="porta do servidor (padrão: 8765)",
+    )
+    parser.add_argument(
+        '--latency', type=float, default=0.05,
+        help="atraso médio de cada resposta em segundos (padrão: 0.05)",
+    )
+    parser.add_argument(
+        '--jitter', type=float, default=0.02,
+        help="desvio padrão do atraso em segundos (padrão: 0.02)",
+    )
+    parser.add_argument(
+        '--error-rate', type=float, default=0.0,
+        help="fração das respostas que falham com 500/503 (padrão: 0)",
+    )
+
+
+def server_from_options(opts) -> StandinServer:
+    catalogue = SyntheticCatalogue(
+        n_disciplinas=opts.disciplinas,
+        n_comissoes=opts.comissoes,
+        shared_fraction=opts.shared_fraction,
+        malformed_rate=opts.malformed_rate,
+        seed=opts.seed,
+    )
+    return StandinServer(
+        catalogue,
+        port=opts.port,
+        latency=opts.latency,
+        jitter=opts.jitter,
+        error_rate=opts.error_rate,
+    )
+
+
+class Command(ScrapyCommand):
+    requires_project = True
+    requires_crawler_process = False
+
+    def syntax(self) -> str:
+        return "[options]"
+
+    def short_desc(self) -> str:
+        return "Sobe um servidor local que imita o Janus com um catálogo sintético"
+
+    def add_options(self, parser) -> None:
+        super().add_options(parser)
+        add_standin_options(parser)
+
+    def run(self, args: list[str], opts) -> None:
+        server = server_from_options(opts)
+        catalogue = server.catalogue
+        print(
+            f"Catálogo: {len(catalogue.siglas)} disciplinas, "
+            f"{catalogue.n_memberships} ofertas, {catalogue.n_pages} páginas"
+        )
+        print(f"Servindo em {server.janus_url} (Ctrl+C para encerrar)")
+        print(f"  scrapy crawl janus_disciplinas -s JANUS_URL={server.janus_url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
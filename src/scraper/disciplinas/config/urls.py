@@ -14,10 +14,24 @@ Exemplo de fluxo de URLs acessadas:
 3. Páginas das disciplinas oferecidas (DCV5842 - Aspectos Fundamentais de Direito Civil)
 """
 
-BASE_URL = "https://uspdigital.usp.br/janus/componente/disciplinasOferecidasInicial.jsf"
+# Raiz do Janus, pode ser trocada pelo setting JANUS_URL (e.g. servidor local de testes)
+JANUS_URL = "https://uspdigital.usp.br/janus"
+
+BASE_URL_TEMPLATE = "{janus_url}/componente/disciplinasOferecidasInicial.jsf"
+BASE_URL = BASE_URL_TEMPLATE.format(janus_url=JANUS_URL)
 
 # Url depois de submeter o form que retorna a lista de comissões de pós-graduação
-COMISSAO_POS_GRADUACAO_URL = "https://uspdigital.usp.br/janus/CPGLista"
+COMISSAO_POS_GRADUACAO_URL_TEMPLATE = "{janus_url}/CPGLista"
+COMISSAO_POS_GRADUACAO_URL = COMISSAO_POS_GRADUACAO_URL_TEMPLATE.format(janus_url=JANUS_URL)
+
+# Urls públicas efetivamente acessadas pelo spider para cada comissão, área e disciplina
+AREA_LISTA_URL_TEMPLATE = "{janus_url}/AreaListaPublico?codcpg={codigo_comissao}&tipo=T&"
+
+TURMA_LISTA_URL_TEMPLATE = (
+    "{janus_url}/TurmaLista?codcpg={codigo_comissao}&codare={codigo_area_concentracao}&"
+)
+
+DISCIPLINA_URL_TEMPLATE = "{janus_url}/Disciplina?sgldis={codigo_disciplina}&"
 
 AREAS_DE_CONCENTRACAO_URL_TEMPLATE = (
     "https://uspdigital.usp.br/janus/componente/disciplinasOferecidas.jsf"
@@ -0,0 +1,107 @@
+"""
+Extração em uma única passada das seções da página de ementa (`Disciplina?sgldis=`).
+
+Na página de ementa cada seção é um `<p>` com um `<strong>` de rótulo ('Objetivos:',
+'Conteúdo:', ...) seguido, entre os irmãos, do `<p class="campoTextoMantendoLinhas">`
+com o texto. Em vez de uma consulta XPath no documento inteiro para cada rótulo, os
+parágrafos rotulados são localizados uma vez e os irmãos de cada container são
+percorridos uma única vez, montando um mapa rótulo -> texto.
+
+As regras replicam as consultas XPath usadas anteriormente pelo spider:
+
+- texto da seção: primeiro `p` irmão seguinte cuja classe contém
+  'campoTextoMantendoLinhas';
+- docentes: todos os `p` irmãos seguintes com classe 'info' e sem `<strong>`;
+- idiomas: os nós de texto de todos os `div` irmãos seguintes;
+- `p.info.infopt`: o texto logo após o `<strong>` (criação, créditos).
+"""
+
+from dataclasses import dataclass, field
+
+from lxml import etree
+from parsel.csstranslator import css2xpath
+
+DOCENTES_LABEL = 'Docentes Responsáveis:'
+IDIOMAS_LABEL = 'Idiomas ministrados:'
+
+_LABELLED_PARAGRAPHS = etree.XPath('//p[strong]')
+_CARGA_CELLS = etree.XPath(css2xpath('table.dataTable.selecionavel > tr td::text'))
+
+
+@dataclass
+class EmentaSections:
+    """Conteúdo rotulado de uma página de ementa."""
+
+    # rótulo -> texto do campoTextoMantendoLinhas que o segue
+    texts: dict[str, str] = field(default_factory=dict)
+    # rótulo (sem espaços nas pontas) -> valor dos p.info.infopt
+    info: dict[str, str] = field(default_factory=dict)
+    docentes: list[str] = field(default_factory=list)
+    idiomas: list[str] = field(default_factory=list)
+    # células da tabela de cargas horárias
+    cargas: list[str] = field(default_factory=list)
+
+
+def _text_after_strong(paragraph: etree._Element) -> str:
+    """Primeiro nó de texto irmão de um `<strong>` dentro do parágrafo."""
+    after_strong = False
+    for child in paragraph:
+        after_strong = after_strong or child.tag == 'strong'
+        if after_strong and child.tail:
+            return child.tail
+    return ''
+
+
+def _sweep(container: etree._Element, sections: EmentaSections) -> None:
+    """Percorre uma única vez os filhos de um container com parágrafos rotulados."""
+    pending: list[str] = []
+    in_docentes = False
+    in_idiomas = False
+
+    for child in container.iterchildren('p', 'div'):
+        if child.tag == 'div':
+            if in_idiomas:
+                if child.text:
+                    sections.idiomas.append(child.text)
+                sections.idiomas.extend(
+                    grandchild.tail for grandchild in child if grandchild.tail
+                )
+            continue
+
+        css_class = child.get('class', '')
+        strong = child.find('strong')
+
+        if strong is not None:
+            label = strong.text or ''
+            pending.append(label)
+            in_docentes = in_docentes or label == DOCENTES_LABEL
+            in_idiomas = in_idiomas or label == IDIOMAS_LABEL
+
+            if {'info', 'infopt'} <= set(css_class.split()):
+                sections.info[label.strip()] = _text_after_strong(child).strip()
+        elif in_docentes and css_class == 'info':
+            sections.docentes.append(next(child.itertext(), '').strip())
+
+        if 'campoTextoMantendoLinhas' in css_class and pending:
+            text = ''.join(child.itertext()).strip()
+            for label in pending:
+                sections.texts.setdefault(label, text)
+            pending.clear()
+
+
+def extract_sections(root: etree._Element) -> EmentaSections:
+    """
+    Extrai todas as seções rotuladas de uma página de ementa.
+
+    Args:
+        root: Raiz lxml do documento, e.g, `response.selector.root`.
+    """
+    sections = EmentaSections()
+    containers = dict.fromkeys(
+        paragraph.getparent() for paragraph in _LABELLED_PARAGRAPHS(root)
+    )
+    for container in containers:
+        _sweep(container, sections)
+
+    sections.cargas = [str(cell) for cell in _CARGA_CELLS(root)]
+    return sections
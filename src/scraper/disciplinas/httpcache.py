@@ -0,0 +1,242 @@
+"""
+Cache HTTP do Scrapy em um único arquivo SQLite, com os corpos comprimidos.
+
+O `FilesystemCacheStorage` padrão cria um diretório por requisição com sete arquivos
+pequenos e sem compressão (metadados, headers e corpo). Aqui cada resposta é uma linha
+da tabela `responses`, indexada pelo fingerprint da requisição, com o corpo comprimido
+(zlib por padrão, zstd se o pacote `zstandard` estiver instalado). O cache inteiro de
+um spider fica em `<HTTPCACHE_DIR>/<spider>.sqlite3` e pode ser copiado como um único
+artefato.
+
+Settings:
+
+- `HTTPCACHE_COMPRESSION`: 'zlib' (padrão), 'zstd' ou 'none';
+- `HTTPCACHE_EXPIRATION_PATTERNS`: regex da url -> validade em segundos. A primeira
+  regex que casar com a url vale; as demais urls usam `HTTPCACHE_EXPIRATION_SECS`
+  (0 = nunca expira). Assim as listas (CPGLista, áreas, turmas) são renovadas enquanto
+  as ementas continuam em cache;
+- `HTTPCACHE_FRAGMENTS`: regex da url -> XPath. Só os nós selecionados são guardados,
+  dentro de um documento mínimo em utf-8. Se o XPath não selecionar nada a página é
+  guardada inteira.
+"""
+
+import re
+import sqlite3
+import zlib
+from collections.abc import Iterator
+from pathlib import Path
+from time import time
+
+from lxml import etree, html
+from scrapy import Request, Spider
+from scrapy.http import Headers, Response
+from scrapy.responsetypes import responsetypes
+from scrapy.settings import BaseSettings
+from scrapy.utils.project import data_path
+from w3lib.http import headers_dict_to_raw, headers_raw_to_dict
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    fingerprint TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    method TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    response_url TEXT NOT NULL,
+    headers BLOB NOT NULL,
+    body BLOB NOT NULL,
+    codec TEXT NOT NULL,
+    timestamp REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_url ON responses (url);
+"""
+
+INSERT_RESPONSE = 'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)'
+
+# Respostas gravadas entre dois commits
+_COMMIT_EVERY = 100
+
+
+def cache_path(settings: BaseSettings, spider_name: str) -> Path:
+    return Path(data_path(settings['HTTPCACHE_DIR'])) / f'{spider_name}.sqlite3'
+
+
+def open_cache(path: Path) -> sqlite3.Connection:
+    """Abre (criando se preciso) o arquivo de cache SQLite."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(path)
+    db.execute('PRAGMA journal_mode=WAL')
+    db.execute('PRAGMA synchronous=NORMAL')
+    db.executescript(_SCHEMA)
+    return db
+
+
+def compress(body: bytes, codec: str) -> bytes:
+    if codec == 'zlib':
+        return zlib.compress(body, 6)
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=10).compress(body)
+    return body
+
+
+def decompress(body: bytes, codec: str) -> bytes:
+    if codec == 'zlib':
+        return zlib.decompress(body)
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("O cache foi comprimido com zstd, instale `zstandard`.")
+        return zstandard.ZstdDecompressor().decompress(body)
+    return body
+
+
+def _decoded_body(headers: Headers, body: bytes) -> bytes | None:
+    """Corpo sem o Content-Encoding do servidor, ou None se a codificação não for gzip/deflate."""
+    encoding = headers.get(b'Content-Encoding', b'').lower()
+    if not encoding or encoding == b'identity':
+        return body
+    if encoding in (b'gzip', b'x-gzip'):
+        return zlib.decompress(body, 16 + zlib.MAX_WBITS)
+    if encoding == b'deflate':
+        try:
+            return zlib.decompress(body)
+        except zlib.error:
+            return zlib.decompress(body, -zlib.MAX_WBITS)
+    return None
+
+
+def extract_fragment(body: bytes, xpath: str) -> bytes | None:
+    """Documento mínimo com os nós selecionados por `xpath`, ou None se não houver nenhum."""
+    root = html.fromstring(body)
+    nodes = root.xpath(xpath)
+    if not nodes:
+        return None
+
+    fragment = b''.join(etree.tostring(node, encoding='utf-8', method='html') for node in nodes)
+    return (
+        b'<html><head><meta charset="utf-8"></head><body>\n'
+        + fragment
+        + b'\n</body></html>\n'
+    )
+
+
+class SqliteCacheStorage:
+    def __init__(self, settings: BaseSettings) -> None:
+        self._settings = settings
+        self._expiration_secs = settings.getint('HTTPCACHE_EXPIRATION_SECS')
+        self._expiration_patterns = [
+            (re.compile(pattern), float(secs))
+            for pattern, secs in settings.getdict('HTTPCACHE_EXPIRATION_PATTERNS').items()
+        ]
+        self._fragments = [
+            (re.compile(pattern), xpath)
+            for pattern, xpath in settings.getdict('HTTPCACHE_FRAGMENTS').items()
+        ]
+        self._codec = settings.get('HTTPCACHE_COMPRESSION', 'zlib')
+        if self._codec not in ('zlib', 'zstd', 'none'):
+            raise ValueError(f"HTTPCACHE_COMPRESSION desconhecida: {self._codec}")
+        if self._codec == 'zstd' and zstandard is None:
+            raise ValueError("HTTPCACHE_COMPRESSION = 'zstd' requer o pacote `zstandard`.")
+
+        self._db: sqlite3.Connection | None = None
+        self._pending = 0
+
+    def open_spider(self, spider: Spider) -> None:
+        path = cache_path(self._settings, spider.name)
+        self._db = open_cache(path)
+        self._fingerprinter = spider.crawler.request_fingerprinter
+        spider.logger.debug(f"Cache HTTP em {path}")
+
+    def close_spider(self, spider: Spider) -> None:
+        self._db.commit()
+        self._db.close()
+        self._db = None
+
+    def _expiration(self, url: str) -> float:
+        for pattern, secs in self._expiration_patterns:
+            if pattern.search(url):
+                return secs
+        return self._expiration_secs
+
+    def retrieve_response(self, spider: Spider, request: Request) -> Response | None:
+        row = self._db.execute(
+            'SELECT status, response_url, headers, body, codec, timestamp '
+            'FROM responses WHERE fingerprint = ?',
+            (self._fingerprinter.fingerprint(request).hex(),),
+        ).fetchone()
+        if row is None:
+            return None
+
+        status, url, raw_headers, body, codec, timestamp = row
+        expiration = self._expiration(request.url)
+        if 0 < expiration < time() - timestamp:
+            return None
+
+        headers = Headers(headers_raw_to_dict(raw_headers))
+        body = decompress(body, codec)
+        request.meta['cache_timestamp'] = timestamp
+        response_cls = responsetypes.from_args(headers=headers, url=url, body=body)
+        return response_cls(url=url, headers=headers, status=status, body=body)
+
+    def store_response(self, spider: Spider, request: Request, response: Response) -> None:
+        headers = response.headers.copy()
+        body = response.body
+
+        # Um corpo já comprimido pelo servidor comprimiria mal, então é guardado
+        # decodificado (o HttpCacheMiddleware recebe a resposta antes do
+        # HttpCompressionMiddleware)
+        decoded = _decoded_body(headers, body)
+        if decoded is not None and decoded is not body:
+            body = decoded
+            headers.pop(b'Content-Encoding', None)
+            headers[b'Content-Length'] = str(len(body)).encode()
+
+        for pattern, xpath in self._fragments:
+            if not pattern.search(request.url):
+                continue
+            fragment = extract_fragment(body, xpath) if decoded else None
+            if fragment is not None:
+                body = fragment
+                headers[b'Content-Type'] = b'text/html; charset=utf-8'
+                headers[b'Content-Length'] = str(len(body)).encode()
+            break
+
+        self._db.execute(
+            INSERT_RESPONSE,
+            (
+                self._fingerprinter.fingerprint(request).hex(),
+                request.url,
+                request.method,
+                response.status,
+                response.url,
+                headers_dict_to_raw(headers),
+                compress(body, self._codec),
+                self._codec,
+                time(),
+            ),
+        )
+        self._pending += 1
+        if self._pending >= _COMMIT_EVERY:
+            self._db.commit()
+            self._pending = 0
+
+
+def iter_sqlite_pages(path: Path, url_pattern: str = '') -> Iterator[tuple[str, bytes]]:
+    """Itera sobre (url, corpo) das respostas de um cache SQLite, na ordem das urls."""
+    db = sqlite3.connect(f'{path.resolve().as_uri()}?mode=ro', uri=True)
+    try:
+        rows = db.execute(
+            'SELECT url, body, codec, headers FROM responses '
+            "WHERE instr(url, ?) > 0 ORDER BY url",
+            (url_pattern,),
+        )
+        for url, body, codec, raw_headers in rows:
+            body = decompress(body, codec)
+            headers = Headers(headers_raw_to_dict(raw_headers))
+            decoded = _decoded_body(headers, body)
+            yield url, body if decoded is None else decoded
+    finally:
+        db.close()
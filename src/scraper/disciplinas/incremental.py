@@ -0,0 +1,229 @@
+"""
+Recrawl incremental das ementas das disciplinas.
+
+A cada execução o spider percorre a árvore CPG -> área -> TurmaLista normalmente (são
+poucas páginas), mas só busca a página `Disciplina?sgldis=` de uma disciplina quando
+ela é nova ou quando a última visita é mais antiga que `INCREMENTAL_MAX_AGE_SECS`.
+As disciplinas ainda frescas são reaproveitadas dos shards do crawl anterior.
+
+Para isso é mantido um arquivo de fingerprints com, para cada código de disciplina, o
+hash do conteúdo da ementa e o instante da última visita. O dataset completo (mesclado)
+é escrito normalmente pelo `ShardedJsonlPipeline`, e ao final do crawl é escrito um
+arquivo delta com as disciplinas novas, alteradas e removidas.
+
+Uma falha transitória nunca apaga dados: se a nova busca de uma ementa falha ou vem
+incompleta, a ementa anterior é mantida (e buscada de novo no próximo crawl), e se
+alguma listagem de disciplinas falha, nenhuma disciplina é considerada removida.
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+from disciplinas.schema import normalize_item
+from disciplinas.shards import MANIFEST_NAME, iter_items
+
+# Campos que descrevem onde a disciplina é oferecida e não o conteúdo da ementa
+MEMBERSHIP_FIELDS = (
+    'codigo_area_concentracao',
+    'area_concentracao',
+    'codigo_commissao',
+    'commissao',
+    'codigo_programa',
+    'nome_programa',
+)
+
+
+def ementa_fields(item: dict[str, Any]) -> dict[str, Any]:
+    """Remove de um item os campos de pertencimento (comissão, programa e área)."""
+    return {
+        key: value for key, value in item.items() if key not in MEMBERSHIP_FIELDS
+    }
+
+
+def content_hash(item: dict[str, Any]) -> str:
+    """
+    Hash estável do conteúdo da ementa de um item.
+
+    O hash é calculado sobre a ementa normalizada, para que um item recém extraído e
+    o mesmo item lido dos shards (já normalizado) tenham o mesmo hash.
+    """
+    try:
+        item = normalize_item(item)
+    except ValueError:
+        pass
+    payload = json.dumps(
+        ementa_fields(item), sort_keys=True, ensure_ascii=False, default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _write_json(path: Path, data: Any) -> None:
+    """Escreve um JSON de forma atômica, para não corromper o arquivo anterior."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with tmp_path.open('w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+class FingerprintStore:
+    def __init__(
+        self,
+        shards_dir: Path,
+        fingerprints_path: Path,
+        delta_path: Path,
+        max_age_secs: float,
+    ) -> None:
+        """
+        Guarda os fingerprints (hash + última visita) das ementas já coletadas.
+
+        Args:
+            shards_dir: Diretório com os shards do crawl anterior.
+            fingerprints_path: Arquivo JSON com os fingerprints por código.
+            delta_path: Arquivo JSON com as disciplinas novas, alteradas e removidas.
+            max_age_secs: Idade máxima de uma ementa antes de ser buscada novamente.
+        """
+        self._shards_dir = shards_dir
+        self._fingerprints_path = fingerprints_path
+        self._delta_path = delta_path
+        self._max_age_secs = max_age_secs
+        self._now = time.time()
+
+        self._previous: dict[str, dict[str, Any]] = {}
+        self._fingerprints: dict[str, dict[str, Any]] = {}
+        self._seen: set[str] = set()
+        self._listing_complete = True
+        self._delta: dict[str, list] = {'new': [], 'changed': [], 'removed': []}
+
+        self._load()
+
+    @classmethod
+    def from_settings(cls, settings) -> 'FingerprintStore':
+        return cls(
+            shards_dir=Path(settings.get('SHARDS_DIR')),
+            fingerprints_path=Path(settings.get('INCREMENTAL_FINGERPRINTS')),
+            delta_path=Path(settings.get('INCREMENTAL_DELTA')),
+            max_age_secs=settings.getfloat('INCREMENTAL_MAX_AGE_SECS'),
+        )
+
+    def _load(self) -> None:
+        manifest_path = self._shards_dir / MANIFEST_NAME
+        if not manifest_path.exists():
+            logger.info(
+                f"Dataset anterior não encontrado em {self._shards_dir}, "
+                "todas as ementas serão buscadas."
+            )
+            return
+
+        for item in iter_items(self._shards_dir):
+            self._previous.setdefault(item['codigo'], ementa_fields(item))
+
+        if self._fingerprints_path.exists():
+            with self._fingerprints_path.open(encoding='utf-8') as f:
+                self._fingerprints = json.load(f)
+        else:
+            # Primeiro crawl incremental: a data do dataset anterior é a última visita
+            last_seen = manifest_path.stat().st_mtime
+            self._fingerprints = {
+                codigo: {'hash': content_hash(ementa), 'last_seen': last_seen}
+                for codigo, ementa in self._previous.items()
+            }
+
+        logger.info(
+            f"Recrawl incremental: {len(self._previous)} disciplinas no dataset anterior"
+        )
+
+    def is_fresh(self, codigo: str) -> bool:
+        """Indica se a ementa de `codigo` pode ser reaproveitada sem nova requisição."""
+        fingerprint = self._fingerprints.get(codigo)
+        if fingerprint is None or codigo not in self._previous:
+            return False
+
+        return self._now - fingerprint['last_seen'] < self._max_age_secs
+
+    def reuse(self, codigo: str) -> dict[str, Any]:
+        """Retorna a ementa de uma disciplina fresca a partir do dataset anterior."""
+        self._seen.add(codigo)
+        return self._previous[codigo]
+
+    def fallback(self, codigo: str) -> dict[str, Any] | None:
+        """
+        Ementa anterior de uma disciplina cuja nova busca falhou ou veio incompleta.
+
+        O fingerprint anterior é mantido, então a disciplina continua vencida e é
+        buscada de novo no próximo crawl. Retorna None para disciplinas novas.
+        """
+        if codigo not in self._previous:
+            return None
+        return self.reuse(codigo)
+
+    def listing_failed(self) -> None:
+        """
+        Registra que uma página da árvore CPG -> área -> TurmaLista falhou: as
+        disciplinas listadas nela não foram vistas, mas não foram removidas.
+        """
+        self._listing_complete = False
+
+    def observe(self, ementa: dict[str, Any]) -> str:
+        """
+        Registra uma ementa recém buscada.
+
+        Returns:
+            'new', 'changed' ou 'unchanged', conforme o fingerprint anterior.
+        """
+        codigo = ementa['codigo']
+        digest = content_hash(ementa)
+        previous = self._fingerprints.get(codigo)
+
+        if previous is None:
+            status = 'new'
+        elif previous['hash'] != digest:
+            status = 'changed'
+        else:
+            status = 'unchanged'
+
+        if status != 'unchanged':
+            self._delta[status].append(ementa)
+
+        self._seen.add(codigo)
+        self._fingerprints[codigo] = {'hash': digest, 'last_seen': self._now}
+        return status
+
+    def write(self) -> None:
+        """
+        Escreve o delta e os fingerprints atualizados.
+
+        Só são removidas as disciplinas ausentes de uma listagem completa; se alguma
+        listagem falhou, os fingerprints das disciplinas não vistas são mantidos.
+        """
+        if self._listing_complete:
+            self._delta['removed'] = sorted(set(self._previous) - self._seen)
+            kept = self._seen
+        else:
+            logger.warning(
+                "Alguma listagem de disciplinas falhou: nenhuma disciplina foi "
+                "considerada removida neste crawl."
+            )
+            self._delta['removed'] = []
+            kept = self._seen | set(self._fingerprints)
+
+        fingerprints = {
+            codigo: fingerprint
+            for codigo, fingerprint in self._fingerprints.items()
+            if codigo in kept
+        }
+
+        _write_json(self._delta_path, {'generated_at': self._now, **self._delta})
+        _write_json(self._fingerprints_path, fingerprints)
+
+        logger.info(
+            f"Recrawl incremental finalizado: {len(self._delta['new'])} novas, "
+            f"{len(self._delta['changed'])} alteradas, "
+            f"{len(self._delta['removed'])} removidas"
+        )
@@ -0,0 +1,117 @@
+"""
+Pipelines de itens do scraper de disciplinas.
+"""
+
+import json
+from pathlib import Path
+from typing import TextIO
+
+from loguru import logger
+from scrapy import Spider, signals
+from scrapy.exceptions import DropItem, NotConfigured
+from scrapy.statscollectors import StatsCollector
+
+from disciplinas.checkpoints import is_resuming
+from disciplinas.schema import SCHEMA, SCHEMA_VERSION, normalize_item
+from disciplinas.shards import ShardWriter
+
+
+class NormalizationPipeline:
+    """
+    Valida os itens e converte seus campos para os tipos declarados no schema.
+
+    Itens malformados (sem créditos, com cargas horárias ausentes ou ilegíveis) são
+    descartados e registrados no arquivo de quarentena, junto com o motivo.
+    """
+
+    def __init__(
+        self,
+        quarantine_path: Path,
+        stats: StatsCollector,
+        resume: bool = False,
+    ) -> None:
+        self._quarantine_path = quarantine_path
+        self._quarantine: TextIO | None = None
+        self._stats = stats
+        self._resume = resume
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('NORMALIZATION_ENABLED'):
+            raise NotConfigured
+        return cls(
+            quarantine_path=Path(crawler.settings.get('NORMALIZATION_QUARANTINE')),
+            stats=crawler.stats,
+            resume=is_resuming(crawler.settings),
+        )
+
+    def open_spider(self, spider: Spider) -> None:
+        self._quarantine_path.parent.mkdir(parents=True, exist_ok=True)
+        mode = 'a' if self._resume else 'w'
+        self._quarantine = self._quarantine_path.open(mode, encoding='utf-8')
+
+    def process_item(self, item: dict, spider: Spider) -> dict:
+        try:
+            return normalize_item(item)
+        except ValueError as e:
+            self._quarantine.write(
+                json.dumps({'reason': str(e), 'item': item}, ensure_ascii=False)
+            )
+            self._quarantine.write('\n')
+            self._stats.inc_value('normalization/quarantined')
+            raise DropItem(f"Item {item.get('codigo')} em quarentena: {e}")
+
+    def close_spider(self, spider: Spider) -> None:
+        self._quarantine.close()
+
+
+class ShardedJsonlPipeline:
+    """
+    Escreve os itens em shards JSONL comprimidos à medida que são coletados.
+
+    Os shards só substituem o dataset anterior se o crawl terminar com sucesso.
+    """
+
+    def __init__(
+        self,
+        shards_dir: Path,
+        items_per_shard: int,
+        schema: dict | None = None,
+        resume: bool = False,
+    ) -> None:
+        self._writer = ShardWriter(shards_dir, items_per_shard, schema)
+        self._resume = resume
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        schema = None
+        if crawler.settings.getbool('NORMALIZATION_ENABLED'):
+            schema = {'version': SCHEMA_VERSION, 'fields': SCHEMA}
+
+        pipeline = cls(
+            shards_dir=Path(crawler.settings.get('SHARDS_DIR')),
+            items_per_shard=crawler.settings.getint('SHARDS_ITEMS_PER_SHARD'),
+            schema=schema,
+            resume=is_resuming(crawler.settings),
+        )
+        crawler.signals.connect(pipeline.spider_closed, signal=signals.spider_closed)
+        return pipeline
+
+    def open_spider(self, spider: Spider) -> None:
+        self._writer.open(resume=self._resume)
+
+    def process_item(self, item: dict, spider: Spider) -> dict:
+        self._writer.write(item)
+        return item
+
+    def close_spider(self, spider: Spider) -> None:
+        self._writer.close()
+
+    def spider_closed(self, spider: Spider, reason: str) -> None:
+        if reason != 'finished':
+            logger.warning(
+                f"Crawl interrompido ({reason}), os shards anteriores foram mantidos."
+            )
+            return
+
+        self._writer.publish()
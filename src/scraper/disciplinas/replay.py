@@ -0,0 +1,125 @@
+"""
+Replay offline das páginas do Janus.
+
+Um diretório de replay contém páginas HTML salvas e um `index.json` que mapeia a url de
+cada requisição para o arquivo com a resposta, e.g.:
+
+    {"https://uspdigital.usp.br/janus/CPGLista": "cpg_lista.html", ...}
+
+O corpus versionado em `fixtures/janus` cobre todos os callbacks do spider (página
+inicial, CPGLista, AreaListaPublico, TurmaLista e Disciplina). Novos corpus podem ser
+gravados a partir do cache HTTP com `scrapy record_fixtures`.
+
+Com `REPLAY_DIR` definido, o `ReplayDownloaderMiddleware` responde às requisições com
+as páginas salvas, e o spider roda de ponta a ponta sem acessar a rede.
+"""
+
+import json
+from collections import defaultdict, deque
+from pathlib import Path
+from time import perf_counter
+from typing import Any
+
+from scrapy import Request, Spider
+from scrapy.exceptions import IgnoreRequest, NotConfigured
+from scrapy.http import HtmlResponse
+from scrapy.statscollectors import StatsCollector
+
+INDEX_NAME = 'index.json'
+
+
+class FixtureIndex:
+    def __init__(self, replay_dir: Path) -> None:
+        """
+        Páginas salvas indexadas pela url da requisição.
+
+        Args:
+            replay_dir: Diretório com as páginas e o `index.json`.
+        """
+        self._replay_dir = replay_dir
+        with (replay_dir / INDEX_NAME).open(encoding='utf-8') as f:
+            self._index: dict[str, str] = json.load(f)
+        self._bodies: dict[str, bytes] = {}
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def response_for(self, request: Request) -> HtmlResponse | None:
+        """Resposta salva para a requisição, ou None se a url não está no índice."""
+        file_name = self._index.get(request.url)
+        if file_name is None:
+            return None
+
+        if file_name not in self._bodies:
+            self._bodies[file_name] = (self._replay_dir / file_name).read_bytes()
+
+        return HtmlResponse(
+            url=request.url,
+            body=self._bodies[file_name],
+            encoding='utf-8',
+            request=request,
+        )
+
+
+class ReplayDownloaderMiddleware:
+    """Responde às requisições com as páginas de REPLAY_DIR, sem acessar a rede."""
+
+    def __init__(self, index: FixtureIndex, stats: StatsCollector) -> None:
+        self._index = index
+        self._stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        replay_dir = crawler.settings.get('REPLAY_DIR')
+        if not replay_dir:
+            raise NotConfigured
+        return cls(FixtureIndex(Path(replay_dir)), crawler.stats)
+
+    def process_request(self, request: Request, spider: Spider) -> HtmlResponse:
+        response = self._index.response_for(request)
+        if response is None:
+            self._stats.inc_value('replay/missing')
+            raise IgnoreRequest(f"Página não encontrada no replay: {request.url}")
+
+        # não grava as páginas do replay no cache HTTP
+        request.meta['dont_cache'] = True
+        self._stats.inc_value('replay/hit')
+        return response
+
+
+def replay_callbacks(spider: Spider, index: FixtureIndex) -> dict[str, Any]:
+    """
+    Executa os callbacks do spider de forma síncrona sobre as páginas salvas.
+
+    Começa pelas `start_urls` e segue as requisições geradas por cada callback, como
+    o engine do Scrapy faria, mas sem downloader, middlewares e pipelines, medindo só o
+    tempo de processamento de cada callback.
+
+    Returns:
+        Dicionário com as latências (em segundos) por callback, a quantidade de itens
+        gerados e as urls que não estavam no índice.
+    """
+    latencies: dict[str, list[float]] = defaultdict(list)
+    items = 0
+    missing: list[str] = []
+
+    queue = deque(Request(url, dont_filter=True) for url in spider.start_urls)
+    while queue:
+        request = queue.popleft()
+        response = index.response_for(request)
+        if response is None:
+            missing.append(request.url)
+            continue
+
+        callback = request.callback or spider.parse
+        start = perf_counter()
+        outputs = list(callback(response, **request.cb_kwargs))
+        latencies[callback.__name__].append(perf_counter() - start)
+
+        for output in outputs:
+            if isinstance(output, Request):
+                queue.append(output)
+            else:
+                items += 1
+
+    return {'latencies': dict(latencies), 'items': items, 'missing': missing}
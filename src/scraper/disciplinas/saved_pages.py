@@ -0,0 +1,69 @@
+"""
+Leitura de páginas do Janus salvas localmente, para processá-las sem acessar a rede.
+
+As páginas podem vir de arquivos HTML avulsos ou do cache HTTP do Scrapy, preenchido
+por qualquer crawl anterior (`HTTPCACHE_ENABLED = True`), seja o cache SQLite do
+projeto (`disciplinas/httpcache.py`) ou o `FilesystemCacheStorage` padrão.
+"""
+
+import gzip
+import pickle
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from scrapy.http import HtmlResponse
+from scrapy.settings import BaseSettings
+from scrapy.utils.project import data_path
+
+from disciplinas.httpcache import cache_path, iter_sqlite_pages
+
+
+def iter_html_files(paths: Iterable[Path]) -> Iterator[tuple[str, bytes]]:
+    """Itera sobre (url, corpo) de arquivos HTML, usando a URI do arquivo como url."""
+    for path in paths:
+        yield path.resolve().as_uri(), path.read_bytes()
+
+
+def iter_cached_pages(
+    settings: BaseSettings,
+    spider_name: str,
+    url_pattern: str = '',
+) -> Iterator[tuple[str, bytes]]:
+    """
+    Itera sobre (url, corpo) das respostas guardadas no cache HTTP do Scrapy.
+
+    O cache SQLite é usado se existir, senão o diretório do `FilesystemCacheStorage`.
+
+    Args:
+        settings: Settings do projeto, de onde vêm HTTPCACHE_DIR e HTTPCACHE_GZIP.
+        spider_name: Nome do spider dono do cache.
+        url_pattern: Trecho que a url deve conter, e.g, 'Disciplina?sgldis='.
+    """
+    sqlite_path = cache_path(settings, spider_name)
+    if sqlite_path.exists():
+        yield from iter_sqlite_pages(sqlite_path, url_pattern)
+        return
+
+    yield from iter_filesystem_pages(settings, spider_name, url_pattern)
+
+
+def iter_filesystem_pages(
+    settings: BaseSettings,
+    spider_name: str,
+    url_pattern: str = '',
+) -> Iterator[tuple[str, bytes]]:
+    """Itera sobre (url, corpo) das respostas de um cache `FilesystemCacheStorage`."""
+    cache_dir = Path(data_path(settings['HTTPCACHE_DIR'])) / spider_name
+    open_file = gzip.open if settings.getbool('HTTPCACHE_GZIP') else open
+
+    for meta_path in sorted(cache_dir.glob('*/*/pickled_meta')):
+        with open_file(meta_path, 'rb') as f:
+            metadata = pickle.load(f)
+        if url_pattern not in metadata['url']:
+            continue
+        with open_file(meta_path.parent / 'response_body', 'rb') as f:
+            yield metadata['url'], f.read()
+
+
+def to_response(url: str, body: bytes) -> HtmlResponse:
+    return HtmlResponse(url=url, body=body)
@@ -0,0 +1,112 @@
+"""
+Schema dos itens emitidos pelo spider de disciplinas.
+
+O spider extrai os valores como aparecem no Janus (textos como '01/02/2020' ou
+'15 semanas'). A normalização converte cada campo para o tipo declarado em `SCHEMA`,
+para que os consumidores do dataset não precisem repetir essa conversão:
+
+- `string`: texto, mantido como está;
+- `int`: número inteiro obrigatório;
+- `date`: data no formato ISO 'AAAA-MM-DD' (criação inválida vira nula);
+- `hours`: quantidade de horas a partir de 'N horas' ou 'N semanas'.
+
+A normalização é idempotente: aplicá-la a um item já normalizado não o altera.
+"""
+
+from datetime import datetime
+from typing import Any
+
+# Incrementar quando o formato dos campos mudar
+SCHEMA_VERSION = 1
+
+SCHEMA: dict[str, str] = {
+    'codigo': 'string',
+    'disciplina': 'string',
+    'criacao': 'date',
+    'n_creditos': 'int',
+    'carga_teorica': 'int',
+    'carga_pratica': 'int',
+    'carga_estudo': 'int',
+    'duracao': 'hours',
+    'carga_total': 'hours',
+    'docentes_responsaveis': 'string',
+    'objetivos': 'string',
+    'justificativa': 'string',
+    'avaliacao': 'string',
+    'conteudo': 'string',
+    'bibliografia': 'string',
+    'idioma': 'string',
+    'oferecimento': 'string',
+    'codigo_area_concentracao': 'string',
+    'area_concentracao': 'string',
+    'codigo_commissao': 'string',
+    'commissao': 'string',
+    'codigo_programa': 'string',
+    'nome_programa': 'string',
+}
+
+HOURS_PER_UNIT = {
+    'horas': 1,
+    'semanas': 7 * 24,
+}
+
+
+def to_int(value: Any) -> int:
+    if isinstance(value, int):
+        return value
+    if value is None:
+        raise ValueError("valor ausente")
+    return int(str(value).strip())
+
+
+def to_hours(value: Any) -> int:
+    """Converte '120 horas' ou '15 semanas' para um número inteiro de horas."""
+    if isinstance(value, int):
+        return value
+    if value is None:
+        raise ValueError("valor ausente")
+
+    numero, _, unidade = str(value).strip().partition(' ')
+    if unidade not in HOURS_PER_UNIT:
+        raise ValueError(f"unidade desconhecida: '{value}'")
+    return HOURS_PER_UNIT[unidade] * int(numero)
+
+
+def to_date(value: Any) -> str | None:
+    """Converte '01/02/2020' para '2020-02-01'. Datas inválidas viram None."""
+    if not value:
+        return None
+
+    for date_format in ('%d/%m/%Y', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(str(value).strip(), date_format).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+CONVERTERS = {
+    'string': lambda value: value,
+    'int': to_int,
+    'date': to_date,
+    'hours': to_hours,
+}
+
+
+def normalize_item(item: dict[str, Any]) -> dict[str, Any]:
+    """
+    Converte os campos de um item para os tipos do `SCHEMA`.
+
+    Raises:
+        ValueError: Se algum campo obrigatório estiver ausente ou malformado.
+    """
+    normalized = dict(item)
+    for field, field_type in SCHEMA.items():
+        if field not in item:
+            continue
+        try:
+            normalized[field] = CONVERTERS[field_type](item[field])
+        except ValueError as e:
+            raise ValueError(f"{field}: {e}") from e
+
+    return normalized
@@ -2,10 +2,15 @@ BOT_NAME = 'disciplinas'
 
 SPIDER_MODULES = ['disciplinas.spiders']
 NEWSPIDER_MODULE = 'disciplinas.spiders'
+COMMANDS_MODULE = 'disciplinas.commands'
 
 ROBOTSTXT_OBEY = False
 
 USER_AGENT = 'Mozilla/5.0'
+
+# Raiz do Janus. Aponte para o servidor local (`scrapy standin`) para testes de carga
+JANUS_URL = 'https://uspdigital.usp.br/janus'
+
 DEFAULT_REQUEST_HEADERS = {
     'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
     'Accept-Language': 'pt-BR,pt;q=0.9,en;q=0.8',
@@ -24,10 +29,66 @@ DOWNLOAD_DELAY = 1
 
 CONCURRENT_REQUESTS_PER_DOMAIN = 4
 
-ITEM_PIPELINES = {}
+ITEM_PIPELINES = {
+    'disciplinas.pipelines.NormalizationPipeline': 300,
+    'disciplinas.pipelines.ShardedJsonlPipeline': 900,
+}
+
+# Converte os itens para os tipos de disciplinas/schema.py, itens malformados vão para
+# o arquivo de quarentena
+NORMALIZATION_ENABLED = True
+NORMALIZATION_QUARANTINE = '../data/quarantine.jsonl'
+
+# Shards JSONL comprimidos com os itens coletados, relativos ao diretório src/scraper
+SHARDS_DIR = '../data/shards'
+SHARDS_ITEMS_PER_SHARD = 5000
 
 HTTPCACHE_ENABLED = True
 HTTPCACHE_EXPIRATION_SECS = 0
 HTTPCACHE_DIR = 'httpcache'
 HTTPCACHE_IGNORE_HTTP_CODES = []
-HTTPCACHE_STORAGE = 'scrapy.extensions.httpcache.FilesystemCacheStorage'
+# Cache em um único arquivo SQLite com os corpos comprimidos (ver disciplinas/httpcache.py)
+HTTPCACHE_STORAGE = 'disciplinas.httpcache.SqliteCacheStorage'
+HTTPCACHE_COMPRESSION = 'zlib'
+# As listas de comissões, áreas e turmas são renovadas diariamente, as ementas não expiram
+HTTPCACHE_EXPIRATION_PATTERNS = {
+    r'/CPGLista': 24 * 60 * 60,
+    r'/AreaListaPublico\?': 24 * 60 * 60,
+    r'/TurmaLista\?': 24 * 60 * 60,
+}
+# Regex da url -> XPath do trecho da página guardado no cache, e.g.
+# {r'/Disciplina\?sgldis=': '//body'}
+HTTPCACHE_FRAGMENTS = {}
+
+# Recrawl incremental (`scrapy crawl janus_disciplinas -a incremental=1`), caminhos
+# relativos ao diretório src/scraper. O dataset anterior é lido de SHARDS_DIR
+INCREMENTAL_FINGERPRINTS = '../data/fingerprints.json'
+INCREMENTAL_DELTA = '../data/delta.json'
+INCREMENTAL_MAX_AGE_SECS = 7 * 24 * 60 * 60
+
+# Checkpoints: rode com `-s JOBDIR=../data/jobs/<nome>` para poder interromper (Ctrl+C uma
+# vez) e retomar o crawl. Páginas que falharam ou vieram incompletas ficam no ledger e
+# podem ser buscadas de novo com `scrapy retry_failed` (ver disciplinas/checkpoints.py)
+FAILED_LEDGER = '../data/failed.jsonl'
+RETRY_FAILED_BACKOFF_SECS = 60
+RETRY_FAILED_MAX_ATTEMPTS = 5
+
+# Replay offline: com REPLAY_DIR definido as requisições são respondidas com as páginas
+# salvas nesse diretório (ver disciplinas/replay.py e `scrapy replay`)
+REPLAY_DIR = None
+DOWNLOADER_MIDDLEWARES = {
+    'disciplinas.replay.ReplayDownloaderMiddleware': 50,
+}
+
+# Telemetria do crawl: histogramas de latência e tamanho por callback e séries temporais
+# de vazão e fila, gravados em JSON e CSV ao final (ver disciplinas/telemetry.py)
+TELEMETRY_ENABLED = True
+TELEMETRY_DIR = '../data/telemetry'
+TELEMETRY_INTERVAL = 5
+SPIDER_MIDDLEWARES = {
+    'disciplinas.telemetry.CrawlTelemetry': 1000,
+}
+
+# Os logs por disciplina e por área são emitidos para um a cada LOG_SAMPLE_EVERY eventos
+# (0 desliga). Para logs em JSON use as variáveis LOGURU_SERIALIZE=1 e LOGURU_LEVEL=INFO
+LOG_SAMPLE_EVERY = 100
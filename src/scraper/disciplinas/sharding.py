@@ -0,0 +1,102 @@
+"""
+Crawl particionado por comissão de pós-graduação.
+
+A lista de comissões (CPGLista) é dividida em N partes e cada parte é coletada por um
+processo do spider (`-a shard=k/N`), com seus próprios diretórios de saída e de cache.
+Uma comissão vai sempre para a mesma parte (crc32 do código), então o cache de cada
+parte continua válido entre execuções, mesmo que comissões sejam criadas ou removidas.
+
+Ao final, `merge_datasets` junta os shards de cada parte em um dataset único, em ordem
+determinística: o resultado não depende da ordem em que as respostas chegaram nem de
+quantas partes foram usadas. Também é possível coletar apenas algumas comissões
+(`-a comissoes=...`) e mesclá-las ao dataset existente.
+"""
+
+import zlib
+from pathlib import Path
+from typing import Any, Iterable
+
+from disciplinas.shards import MANIFEST_NAME, ShardWriter, iter_items, read_manifest
+
+# Separador da lista de comissões em `-a comissoes=`, já que os nomes contêm vírgulas
+COMISSOES_SEPARATOR = '|'
+
+# Ordem dos itens no dataset mesclado; identifica unicamente uma oferta
+MERGE_KEY = ('codigo', 'codigo_commissao', 'codigo_programa', 'codigo_area_concentracao')
+
+
+def parse_shard(spec: str) -> tuple[int, int]:
+    """Converte 'k/N' em (k, N), com 0 <= k < N."""
+    try:
+        index, total = (int(part) for part in spec.split('/'))
+    except ValueError:
+        raise ValueError(f"Shard inválido '{spec}', use o formato k/N (e.g. 0/4)")
+    if not 0 <= index < total:
+        raise ValueError(f"Shard inválido '{spec}', k deve estar entre 0 e N-1")
+    return index, total
+
+
+def shard_of(codigo_comissao: str, n_shards: int) -> int:
+    """Parte à qual uma comissão pertence, estável entre execuções."""
+    return zlib.crc32(codigo_comissao.encode('utf-8')) % n_shards
+
+
+def parse_comissoes(value: str | None) -> set[str] | None:
+    """Lista de códigos ou nomes de comissões separados por '|', ou None para todas."""
+    if not value:
+        return None
+    return {part.strip() for part in value.split(COMISSOES_SEPARATOR) if part.strip()}
+
+
+def _merge_key(item: dict[str, Any]) -> tuple:
+    return tuple(str(item.get(field) or '') for field in MERGE_KEY)
+
+
+def merge_datasets(
+    sources: Iterable[Path],
+    output: Path,
+    items_per_shard: int,
+    comissoes: set[str] | None = None,
+    patch: bool = False,
+) -> int:
+    """
+    Junta os datasets de cada parte em um dataset único, ordenado por `MERGE_KEY`.
+
+    Args:
+        sources: Diretórios de shards de cada parte.
+        output: Diretório do dataset final, substituído ao final.
+        items_per_shard: Quantidade máxima de itens por shard no dataset final.
+        comissoes: Comissões (código ou nome) coletadas em uma atualização parcial.
+            Os itens das demais comissões são mantidos do dataset em `output`.
+        patch: Mantém todos os itens do dataset em `output`, exceto os substituídos
+            por itens de `sources` com a mesma chave (e.g. `scrapy retry_failed`).
+
+    Returns:
+        Quantidade de itens do dataset final.
+    """
+    sources = list(sources)
+    items: dict[tuple, dict[str, Any]] = {}
+    for source in sources:
+        for item in iter_items(source):
+            items.setdefault(_merge_key(item), item)
+
+    keep_previous = patch or comissoes is not None
+    if keep_previous and (output / MANIFEST_NAME).exists():
+        for item in iter_items(output):
+            if comissoes is not None and (
+                    item.get('codigo_commissao') in comissoes
+                    or item.get('commissao') in comissoes):
+                continue
+            items.setdefault(_merge_key(item), item)
+
+    schema = None
+    if sources:
+        schema = read_manifest(sources[0]).get('schema')
+
+    writer = ShardWriter(output, items_per_shard, schema)
+    writer.open()
+    for key in sorted(items):
+        writer.write(items[key])
+    writer.close()
+    writer.publish()
+    return len(items)
@@ -0,0 +1,182 @@
+"""
+Armazenamento dos itens coletados em shards JSONL comprimidos.
+
+Um diretório de shards contém arquivos `part-00000.jsonl.gz`, `part-00001.jsonl.gz`,
+..., cada um com no máximo `items_per_shard` itens (um JSON por linha), e um
+`manifest.json` descrevendo os shards, a quantidade de itens, as colunas e, quando os
+itens foram normalizados, o schema dos campos (ver `disciplinas/schema.py`).
+
+O diretório é escrito em `<dir>.tmp` e só substitui o dataset anterior quando o
+crawl termina com sucesso, então um crawl interrompido nunca corrompe os dados. Um crawl
+retomado (ver `disciplinas/checkpoints.py`) continua escrevendo no mesmo `<dir>.tmp`;
+se a execução anterior morreu sem fechar o manifest, ele é reconstruído a partir dos
+shards já escritos, cujas requisições o JOBDIR já marcou como feitas.
+"""
+
+import gzip
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator, TextIO
+
+from loguru import logger
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def read_manifest(shards_dir: Path) -> dict[str, Any]:
+    with (shards_dir / MANIFEST_NAME).open(encoding='utf-8') as f:
+        return json.load(f)
+
+
+def iter_items(shards_dir: Path) -> Iterator[dict[str, Any]]:
+    """Itera sobre os itens de um diretório de shards, um shard aberto por vez."""
+    for shard in read_manifest(shards_dir)['shards']:
+        with gzip.open(shards_dir / shard['path'], 'rt', encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line)
+
+
+class ShardWriter:
+    def __init__(
+        self,
+        shards_dir: Path,
+        items_per_shard: int = 5000,
+        schema: dict[str, Any] | None = None,
+    ) -> None:
+        """
+        Escreve itens em shards JSONL comprimidos com gzip.
+
+        Args:
+            shards_dir: Diretório final dos shards.
+            items_per_shard: Quantidade máxima de itens por shard.
+            schema: Schema dos itens já normalizados, registrado no manifest.
+        """
+        self._shards_dir = shards_dir
+        self._tmp_dir = shards_dir.with_name(shards_dir.name + '.tmp')
+        self._items_per_shard = items_per_shard
+        self._schema = schema
+
+        self._file: TextIO | None = None
+        self._shards: list[dict[str, Any]] = []
+        self._columns: dict[str, None] = {}  # dict para manter a ordem de inserção
+
+    def open(self, resume: bool = False) -> None:
+        """
+        Args:
+            resume: Continua os shards de uma execução interrompida em `<dir>.tmp` em vez
+                de começar do zero. Sem o manifest (a execução morreu antes de fechá-lo),
+                ele é reconstruído a partir dos shards existentes.
+        """
+        tmp_manifest = self._tmp_dir / MANIFEST_NAME
+        if resume and tmp_manifest.exists():
+            manifest = read_manifest(self._tmp_dir)
+            self._shards = manifest['shards']
+            self._columns = dict.fromkeys(manifest['columns'])
+            tmp_manifest.unlink()
+            return
+
+        if resume and self._tmp_dir.exists():
+            self._recover()
+            return
+
+        if self._tmp_dir.exists():
+            shutil.rmtree(self._tmp_dir)
+        self._tmp_dir.mkdir(parents=True)
+
+    def _recover(self) -> None:
+        """
+        Reconstrói a lista de shards e as colunas a partir dos `part-*.jsonl.gz` de
+        `<dir>.tmp`. O último shard de uma execução morta costuma estar truncado: ele é
+        reescrito só com as linhas completas que puderam ser lidas.
+        """
+        for path in sorted(self._tmp_dir.glob('part-*.jsonl.gz')):
+            items: list[str] = []
+            truncated = False
+            try:
+                with gzip.open(path, 'rt', encoding='utf-8') as f:
+                    for line in f:
+                        json.loads(line)
+                        items.append(line)
+            except (EOFError, gzip.BadGzipFile, json.JSONDecodeError, UnicodeDecodeError):
+                truncated = True
+
+            if truncated:
+                logger.warning(
+                    f"Shard truncado {path.name}: {len(items)} itens recuperados, "
+                    "os que não chegaram ao disco antes da interrupção foram perdidos."
+                )
+                with gzip.open(path, 'wt', encoding='utf-8') as f:
+                    f.writelines(items)
+
+            # os shards são renumerados em sequência, um shard vazio é descartado
+            name = f'part-{len(self._shards):05d}.jsonl.gz'
+            if not items:
+                path.unlink()
+                continue
+            if path.name != name:
+                path.rename(self._tmp_dir / name)
+            self._shards.append({
+                'path': name,
+                'items': len(items),
+                'bytes': (self._tmp_dir / name).stat().st_size,
+            })
+            for line in items:
+                self._columns.update(dict.fromkeys(json.loads(line)))
+
+        logger.info(
+            f"Manifest de {self._tmp_dir} reconstruído: {len(self._shards)} shards, "
+            f"{sum(shard['items'] for shard in self._shards)} itens."
+        )
+
+    def write(self, item: dict[str, Any]) -> None:
+        if self._file is None or self._shards[-1]['items'] >= self._items_per_shard:
+            self._rotate()
+
+        self._file.write(json.dumps(item, ensure_ascii=False, default=str))
+        self._file.write('\n')
+        self._shards[-1]['items'] += 1
+        self._columns.update(dict.fromkeys(item))
+
+    def _rotate(self) -> None:
+        self._close_file()
+        name = f'part-{len(self._shards):05d}.jsonl.gz'
+        self._file = gzip.open(self._tmp_dir / name, 'wt', encoding='utf-8')
+        self._shards.append({'path': name, 'items': 0})
+
+    def _close_file(self) -> None:
+        if self._file is None:
+            return
+
+        self._file.close()
+        self._file = None
+        shard = self._shards[-1]
+        shard['bytes'] = (self._tmp_dir / shard['path']).stat().st_size
+
+    def close(self) -> None:
+        """Fecha o shard corrente e escreve o manifest no diretório temporário."""
+        self._close_file()
+        manifest = {
+            'format': 'jsonl.gz',
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'items': sum(shard['items'] for shard in self._shards),
+            'columns': list(self._columns),
+            'shards': self._shards,
+        }
+        if self._schema is not None:
+            manifest['schema'] = self._schema
+        with (self._tmp_dir / MANIFEST_NAME).open('w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    def publish(self) -> None:
+        """Substitui o diretório de shards anterior pelo recém escrito."""
+        old_dir = self._shards_dir.with_name(self._shards_dir.name + '.old')
+        if old_dir.exists():
+            shutil.rmtree(old_dir)
+        if self._shards_dir.exists():
+            os.replace(self._shards_dir, old_dir)
+        os.replace(self._tmp_dir, self._shards_dir)
+        if old_dir.exists():
+            shutil.rmtree(old_dir)
@@ -6,26 +6,203 @@ from loguru import logger
 from scrapy.http import FormRequest
 from scrapy import Spider
 from scrapy.http import Response, Request
+from scrapy.spidermiddlewares.httperror import HttpError
+from twisted.python.failure import Failure
+from disciplinas.checkpoints import EmentaStore, FailureLedger, finish_job, is_resuming
 from disciplinas.config.urls import (
-    COMISSAO_POS_GRADUACAO_URL,
-    BASE_URL,
+    AREA_LISTA_URL_TEMPLATE,
+    BASE_URL_TEMPLATE,
+    COMISSAO_POS_GRADUACAO_URL_TEMPLATE,
+    DISCIPLINA_URL_TEMPLATE,
+    JANUS_URL,
+    TURMA_LISTA_URL_TEMPLATE,
 )
+from disciplinas.extractors import extract_sections
+from disciplinas.incremental import FingerprintStore
+from disciplinas.sharding import parse_comissoes, parse_shard, shard_of
+from disciplinas.telemetry import LogSampler
 
 class JanusDisciplinasSpider(Spider):
     name = "janus_disciplinas"
 
-    start_urls = [BASE_URL]
+    def __init__(
+        self,
+        incremental: str | bool = False,
+        comissoes: str | None = None,
+        shard: str | None = None,
+        retry_failed: str | bool = False,
+        *args,
+        **kwargs,
+    ):
+        """
+        Args:
+            incremental: Se verdadeiro (`-a incremental=1`), só busca as ementas novas
+                ou antigas, reaproveitando as demais do dataset anterior.
+            comissoes: Códigos ou nomes das comissões a coletar, separados por '|'
+                (e.g. `-a comissoes='55|Instituto de Matemática e Estatística'`).
+            shard: Parte 'k/N' das comissões a coletar (ver disciplinas/sharding.py).
+            retry_failed: Se verdadeiro, só busca novamente as páginas registradas no
+                ledger de falhas (ver disciplinas/checkpoints.py).
+        """
+        super().__init__(*args, **kwargs)
+        self.incremental = str(incremental).lower() in ('1', 'true', 'sim')
+        self.comissoes = parse_comissoes(comissoes)
+        self.shard = parse_shard(shard) if shard else None
+        self.retry_failed = str(retry_failed).lower() in ('1', 'true', 'sim')
+        self.janus_url = JANUS_URL
+        self.start_urls = [BASE_URL_TEMPLATE.format(janus_url=self.janus_url)]
+        self.fingerprints: FingerprintStore | None = None
+        self.ledger: FailureLedger | None = None
+        self.log_sample = LogSampler(every=1)
+
+        # Cada sigla é buscada uma única vez, mesmo quando oferecida em várias áreas;
+        # as ementas já buscadas ficam em disco, só as ofertas ficam em memória
+        self._memberships: dict[str, list[dict]] = {}
+        self._ementas: EmentaStore = EmentaStore(None)
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider.janus_url = crawler.settings.get('JANUS_URL', JANUS_URL)
+        spider.start_urls = [BASE_URL_TEMPLATE.format(janus_url=spider.janus_url)]
+        if spider.incremental:
+            spider.fingerprints = FingerprintStore.from_settings(crawler.settings)
+        spider.ledger = FailureLedger.from_settings(crawler.settings)
+        # antes de o Scrapy abrir o JOBDIR, que cria o requests.seen
+        spider._ementas = EmentaStore.from_settings(crawler.settings)
+        spider._ementas.open(resume=is_resuming(crawler.settings))
+        spider.log_sample = LogSampler(crawler.settings.getint('LOG_SAMPLE_EVERY'))
+        if spider.retry_failed:
+            spider.ledger.load()
+        return spider
+
+    def _restore_state(self) -> None:
+        """
+        Liga o estado do spider a `self.state`, persistido pelo Scrapy no `JOBDIR`.
+
+        Na retomada de um crawl, as ofertas e falhas já registradas voltam do checkpoint,
+        e as ementas já buscadas do `EmentaStore` no `JOBDIR`. Só pode ser chamado depois
+        de `spider_opened`, quando o `state` já foi carregado.
+        """
+        state = getattr(self, 'state', None)
+        if state is None:
+            return
+        self._memberships = state.setdefault('memberships', self._memberships)
+        self.ledger.entries = state.setdefault('ledger', self.ledger.entries)
+
+    async def start(self):
+        self._restore_state()
+        if not self.retry_failed:
+            async for request in super().start():
+                yield request
+            return
+
+        due = self.ledger.due()
+        logger.info("Buscando novamente {n} páginas do ledger de falhas", n=len(due))
+        for entry in due:
+            del self.ledger.entries[entry['url']]
+            if entry['callback'] == 'parse_ementa':
+                codigo = entry['cb_kwargs']['codigo_disciplina']
+                self._memberships[codigo] = entry.get('memberships', [])
+
+            yield Request(
+                url=entry['url'],
+                method=entry['method'],
+                body=entry['body'],
+                headers=(
+                    {'Content-Type': 'application/x-www-form-urlencoded'}
+                    if entry['method'] == 'POST' else None
+                ),
+                callback=getattr(self, entry['callback']),
+                errback=self.on_request_failed,
+                cb_kwargs=entry['cb_kwargs'],
+                meta={'ledger_attempts': entry['attempts']},
+                dont_filter=True,
+            )
+
+    def on_request_failed(self, failure: Failure) -> Generator[dict, None, None]:
+        """
+        Registra no ledger uma requisição que falhou mesmo depois dos retries.
+
+        No modo incremental, a falha de uma ementa emite a ementa anterior, e a falha
+        de uma listagem impede que as disciplinas não vistas sejam dadas como removidas.
+        """
+        request = failure.request
+        if failure.check(HttpError):
+            reason = f'HTTP {failure.value.response.status}'
+        else:
+            reason = repr(failure.value)
+
+        self.ledger.record(request, 'failed', reason)
+        self.crawler.stats.inc_value('ledger/failed')
+        logger.warning("Falha ao buscar {url}: {reason}", url=request.url, reason=reason)
+
+        if self.fingerprints is None:
+            return
+        if request.callback.__name__ != 'parse_ementa':
+            self.fingerprints.listing_failed()
+            return
+
+        ementa = self._fallback_ementa(**request.cb_kwargs)
+        if ementa is not None:
+            for membership in self._memberships[ementa['codigo']]:
+                yield self._emit(ementa, membership)
+
+    def _fallback_ementa(self, codigo_disciplina: str, nome_disciplina: str) -> dict | None:
+        """Ementa do dataset anterior para uma disciplina cuja busca falhou ou veio incompleta."""
+        previous = self.fingerprints.fallback(codigo_disciplina)
+        if previous is None:
+            return None
+
+        self.crawler.stats.inc_value('incremental/fallback')
+        ementa = {**previous, 'disciplina': nome_disciplina}
+        self._ementas[codigo_disciplina] = ementa
+        return ementa
+
+    def closed(self, reason: str) -> None:
+        self._ementas.close()
+        if reason == 'finished':
+            for entry in self.ledger.entries.values():
+                if entry['callback'] == 'parse_ementa':
+                    codigo = entry['cb_kwargs']['codigo_disciplina']
+                    entry['memberships'] = self._memberships.get(codigo, [])
+            self.ledger.write()
+            finish_job(self.crawler.settings)
+            getattr(self, 'state', {}).clear()
+
+        stats = self.crawler.stats
+        unique = stats.get_value('disciplinas/unique', 0)
+        if unique:
+            duplication_factor = stats.get_value('disciplinas/memberships', 0) / unique
+            stats.set_value('disciplinas/duplication_factor', round(duplication_factor, 3))
+            logger.info(
+                "{unique} ementas buscadas, fator de duplicação {duplication_factor:.2f}",
+                unique=unique,
+                duplication_factor=duplication_factor,
+            )
+
+        if self.fingerprints is None:
+            return
+
+        if reason != 'finished':
+            logger.warning(
+                f"Crawl interrompido ({reason}), o dataset anterior foi mantido."
+            )
+            return
+
+        self.fingerprints.write()
 
     def parse(self, response: Response) -> Generator[FormRequest, None, None]:
         logger.debug(
             "Submetendo form para recuperar lista de comissões de pós-graduação"
         )
-        post_url = COMISSAO_POS_GRADUACAO_URL
+        post_url = COMISSAO_POS_GRADUACAO_URL_TEMPLATE.format(janus_url=self.janus_url)
 
         yield FormRequest(
             url=post_url,
             formdata={"tipo": "T"},
-            callback=self.parse_comissoes_pos_graduacao
+            callback=self.parse_comissoes_pos_graduacao,
+            errback=self.on_request_failed,
         )
 
     def parse_comissoes_pos_graduacao(self, response: Response) -> Generator[Request, None, None]:
@@ -48,11 +225,18 @@ class JanusDisciplinasSpider(Spider):
             if not codigo_comissao and not nome_comissao:
                 continue
 
-            full_link = f'https://uspdigital.usp.br/janus/AreaListaPublico?codcpg={codigo_comissao}&tipo=T&'
+            if not self._should_crawl(codigo_comissao, nome_comissao):
+                continue
+
+            full_link = AREA_LISTA_URL_TEMPLATE.format(
+                janus_url=self.janus_url,
+                codigo_comissao=codigo_comissao,
+            )
 
             yield Request(
                 url=full_link,
                 callback=self.parse_comissao_page,
+                errback=self.on_request_failed,
                 cb_kwargs={
                     'codigo_comissao': codigo_comissao,
                     'nome_comissao': nome_comissao
@@ -63,6 +247,18 @@ class JanusDisciplinasSpider(Spider):
             "Finalizado o processamento da lista de comissões de pós-graduação"
         )
 
+    def _should_crawl(self, codigo_comissao: str, nome_comissao: str) -> bool:
+        """Indica se a comissão foi selecionada e pertence à parte deste processo."""
+        if (self.comissoes is not None
+                and codigo_comissao not in self.comissoes
+                and nome_comissao not in self.comissoes):
+            return False
+
+        if self.shard is not None:
+            index, n_shards = self.shard
+            return shard_of(codigo_comissao, n_shards) == index
+        return True
+
     def parse_comissao_page(
         self,
         response: Response,
@@ -81,8 +277,10 @@ class JanusDisciplinasSpider(Spider):
         disciplinas associadas a cada área de concentração.
         """
         logger.debug(
-            f"Processando página da comissão de pós-graduação: {codigo_comissao} "
-            f"- {nome_comissao}"
+            "Processando página da comissão de pós-graduação: {codigo_comissao} "
+            "- {nome_comissao}",
+            codigo_comissao=codigo_comissao,
+            nome_comissao=nome_comissao,
         )
 
         tables = response.css("table.dataTable.selecionavel")
@@ -102,20 +300,24 @@ class JanusDisciplinasSpider(Spider):
                     )
                     continue
 
-                logger.debug(f"""
-                    Extraindo área de concentração:
-                    Código do Programa: {codigo_programa}
-                    Nome do Programa: {nome_programa}
-                    Código da Área de Concentração: {codigo_area_concentracao}
-                    Nome da Área de Concentração: {nome_area_concentracao}
-                """)
+                if self.log_sample('area'):
+                    logger.debug(
+                        "Extraindo área de concentração {codigo_area_concentracao}",
+                        codigo_comissao=codigo_comissao,
+                        codigo_programa=codigo_programa,
+                        nome_programa=nome_programa,
+                        codigo_area_concentracao=codigo_area_concentracao,
+                        nome_area_concentracao=nome_area_concentracao,
+                    )
 
                 yield Request(
-                    url=(
-                        'https://uspdigital.usp.br/janus/TurmaLista?codcpg='
-                        f'{codigo_comissao}&codare={codigo_area_concentracao}&'
+                    url=TURMA_LISTA_URL_TEMPLATE.format(
+                        janus_url=self.janus_url,
+                        codigo_comissao=codigo_comissao,
+                        codigo_area_concentracao=codigo_area_concentracao,
                     ),
                     callback=self.parse_disciplinas,
+                    errback=self.on_request_failed,
                     cb_kwargs={
                         'codigo_comissao': codigo_comissao,
                         'nome_comissao': nome_comissao,
@@ -135,14 +337,13 @@ class JanusDisciplinasSpider(Spider):
         nome_programa: str,
         codigo_area_concentracao: str,
         nome_area_concentracao: str
-    ) -> Generator[Request, None, None]:
+    ) -> Generator[Request | dict, None, None]:
         """
         Extrai as disciplinas da área de concentração específica.
+
+        No modo incremental, disciplinas com ementa ainda fresca são emitidas
+        diretamente a partir do dataset anterior, sem requisitar a ementa.
         """
-        logger.debug(
-            f"Extraindo disciplinas para a área de concentração: "
-            f"{codigo_area_concentracao} - {nome_area_concentracao}"
-        )
 
         table = response.css('table[width="95%"]')
         for row in table.css("tr[onclick]"):
@@ -154,69 +355,79 @@ class JanusDisciplinasSpider(Spider):
             if not codigo_disciplina and not nome_disciplina:
                 continue
 
-            logger.info(f"""
-                Disciplina Extraída:
-                Código da Comissão: {codigo_comissao}
-                Nome da Comissão: {nome_comissao}
-                Código do Programa: {codigo_programa}
-                Nome do Programa: {nome_programa}
-                Código da Área de Concentração: {codigo_area_concentracao}
-                Nome da Área de Concentração: {nome_area_concentracao}
-                Código da Disciplina: {codigo_disciplina}
-                Nome da Disciplina: {nome_disciplina},
-                ementa_url: {ementa_url},
-                turma_url: {turma_url}
-            """)
+            if self.log_sample('disciplina'):
+                logger.debug(
+                    "Disciplina extraída {codigo_disciplina} - {nome_disciplina}",
+                    codigo_disciplina=codigo_disciplina,
+                    nome_disciplina=nome_disciplina,
+                    codigo_comissao=codigo_comissao,
+                    codigo_programa=codigo_programa,
+                    codigo_area_concentracao=codigo_area_concentracao,
+                    ementa_url=ementa_url,
+                    turma_url=turma_url,
+                )
+
+            membership = {
+                'codigo_area_concentracao': codigo_area_concentracao,
+                'area_concentracao': nome_area_concentracao,
+                'codigo_commissao': codigo_comissao,
+                'commissao': nome_comissao,
+                'codigo_programa': codigo_programa,
+                'nome_programa': nome_programa,
+            }
+            self.crawler.stats.inc_value('disciplinas/memberships')
+
+            memberships = self._memberships.setdefault(codigo_disciplina, [])
+            memberships.append(membership)
+            if len(memberships) > 1:
+                # Ementa já requisitada: se já foi processada, emite o item desta
+                # área, senão ele será emitido por parse_ementa
+                ementa = self._ementas.get(codigo_disciplina)
+                if ementa is not None:
+                    yield self._emit(ementa, membership)
+                continue
+
+            self.crawler.stats.inc_value('disciplinas/unique')
+
+            if (self.fingerprints is not None
+                    and self.fingerprints.is_fresh(codigo_disciplina)):
+                self.crawler.stats.inc_value('incremental/reused')
+                ementa = {
+                    **self.fingerprints.reuse(codigo_disciplina),
+                    'disciplina': nome_disciplina,
+                }
+                self._ementas[codigo_disciplina] = ementa
+                yield self._emit(ementa, membership)
+                continue
 
             yield Request(
-                    url=(
-                        'https://uspdigital.usp.br/janus/Disciplina?sgldis='
-                        f'{codigo_disciplina}&'
+                    url=DISCIPLINA_URL_TEMPLATE.format(
+                        janus_url=self.janus_url,
+                        codigo_disciplina=codigo_disciplina,
                     ),
                     callback=self.parse_ementa,
+                    errback=self.on_request_failed,
                     cb_kwargs={
-                        'codigo_comissao': codigo_comissao,
-                        'nome_comissao': nome_comissao,
-                        'codigo_programa': codigo_programa,
-                        'nome_programa': nome_programa,
-                        'codigo_area_concentracao': codigo_area_concentracao,
-                        'nome_area_concentracao': nome_area_concentracao,
                         'codigo_disciplina': codigo_disciplina,
                         'nome_disciplina': nome_disciplina,
-                        'ementa_url': ementa_url,
-                        'turma_url': turma_url
                     }
                 )
 
-    def _get_text_after_strong_label(self, response: Response, label_text: str) -> str:
-        """
-        Função auxiliar para pegar o texto de um <p class="...campoTextoMantendoLinhas">
-        que vem logo após um <p> contendo um <strong> com o 'label_text'.
-        """
-        text_nodes = response.xpath(
-            f"//strong[text() = '{label_text}']/parent::p/following-sibling::p"
-            "[contains(@class, 'campoTextoMantendoLinhas')][1]//text()"
-        ).getall()
-
-        return "".join(text_nodes).strip()
-
+    def _emit(self, ementa: dict, membership: dict) -> dict:
+        """Monta o item de uma disciplina em uma (programa, área) específica."""
+        return {**ementa, **membership}
 
     def parse_ementa(
         self,
         response: Response,
-        codigo_comissao: str,
-        nome_comissao: str,
-        codigo_programa: str,
-        nome_programa: str,
-        codigo_area_concentracao: str,
-        nome_area_concentracao: str,
         codigo_disciplina: str,
         nome_disciplina: str,
-        ementa_url: str,
-        turma_url: str
     ) -> Generator[dict, None, None]:
         """
         Extrai a ementa da disciplina.
+
+        A ementa é buscada uma única vez por sigla e replicada em um item para cada
+        (programa, área de concentração) em que a disciplina é oferecida.
         """
         ementa_criacao: str | None = None
         numero_creditos: int | None = None
@@ -234,6 +445,10 @@ class JanusDisciplinasSpider(Spider):
         ementa_idiomas: str | None = None
         ementa_tipo_oferecimentos: str | None = None
 
+        sections = extract_sections(response.selector.root)
+        # Problemas que tornam a ementa incompleta, registrados no ledger de falhas
+        problemas: list[str] = []
+
         try:
             (
                 ch_teorica,
@@ -243,16 +458,17 @@ class JanusDisciplinasSpider(Spider):
                 _,
                 carga_horaria_total,
                 _
-            ) = response.css("table.dataTable.selecionavel > tr td::text").getall()
+            ) = sections.cargas
         except Exception:
             logger.error(
                 f"Erro ao extrair cargas horárias para a disciplina: "
                 f"{codigo_disciplina} - {nome_disciplina}"
-                f"foi extraido {response.css('table.dataTable.selecionavel > tr td::text').getall()}"
+                f"foi extraido {sections.cargas}"
             )
             ch_teorica = ''
             ch_pratica = ''
             ch_estudo = ''
+            problemas.append(f"carga horária com {len(sections.cargas)} células")
 
         try:
             carga_horaria_teorica = int(ch_teorica.strip())
@@ -262,14 +478,10 @@ class JanusDisciplinasSpider(Spider):
             carga_horaria_teorica = None
             carga_horaria_pratica = None
             carga_horaria_estudo = None
+            if not problemas:
+                problemas.append("carga horária não numérica")
 
-        p_elements = response.css("p.info.infopt")
-
-        for p_element in p_elements:
-            topico = p_element.css("strong::text").get(default='').strip()
-
-            valor_texto = p_element.xpath("./strong/following-sibling::text()").get(default='').strip()
-
+        for topico, valor_texto in sections.info.items():
             if topico == "Criação:":
                 ementa_criacao = valor_texto
             elif topico == "Nr. de Créditos:" or topico == "Nº de Créditos:":
@@ -278,29 +490,18 @@ class JanusDisciplinasSpider(Spider):
                 except ValueError:
                     logger.warning(f"Não foi possível converter n_creditos para int: '{valor_texto}'")
                     numero_creditos = None
-
-        docentes_nodes = response.xpath(
-            "//strong[text() = 'Docentes Responsáveis:']/parent::p/following-sibling"
-            "::p[@class='info' and not(strong)]"
-        )
-        docentes_responsaveis = ' | '.join([
-            node.css('::text').get(default='').strip() for node in docentes_nodes
-        ]) # TODO: validar se isso aqui pega quando tem 1 docente responsável
-
-        ementa_idiomas = ' | '.join(
-            response.xpath(
-                "//strong[text() = 'Idiomas ministrados:']/parent::p/"
-                "following-sibling::div/text()"
-            ).getall()
-        )
-        ementa_conteudo = self._get_text_after_strong_label(response, "Conteúdo:")
-        ementa_objetivos = self._get_text_after_strong_label(response, "Objetivos:")
-        ementa_justificativa = self._get_text_after_strong_label(response, "Justificativa:")
-        ementa_forma_avaliacao = self._get_text_after_strong_label(response, "Forma de Avaliação:")
-        ementa_bibliografia = self._get_text_after_strong_label(response, "Bibliografia:")
-        ementa_tipo_oferecimentos = self._get_text_after_strong_label(response, "Tipo de oferecimento da disciplina:")
-
-        yield {
+                    problemas.append(f"créditos inválidos: '{valor_texto}'")
+
+        docentes_responsaveis = ' | '.join(sections.docentes) # TODO: validar se isso aqui pega quando tem 1 docente responsável
+        ementa_idiomas = ' | '.join(sections.idiomas)
+        ementa_conteudo = sections.texts.get("Conteúdo:", '')
+        ementa_objetivos = sections.texts.get("Objetivos:", '')
+        ementa_justificativa = sections.texts.get("Justificativa:", '')
+        ementa_forma_avaliacao = sections.texts.get("Forma de Avaliação:", '')
+        ementa_bibliografia = sections.texts.get("Bibliografia:", '')
+        ementa_tipo_oferecimentos = sections.texts.get("Tipo de oferecimento da disciplina:", '')
+
+        ementa = {
             'codigo': codigo_disciplina,
             'disciplina': nome_disciplina,
             'criacao': ementa_criacao,
@@ -318,10 +519,21 @@ class JanusDisciplinasSpider(Spider):
             'bibliografia': ementa_bibliografia,
             'idioma': ementa_idiomas,
             'oferecimento': ementa_tipo_oferecimentos,
-            'codigo_area_concentracao': codigo_area_concentracao,
-            'area_concentracao': nome_area_concentracao,
-            'codigo_commissao': codigo_comissao,
-            'commissao': nome_comissao,
-            'codigo_programa': codigo_programa,
-            'nome_programa': nome_programa,
         }
+        self._ementas[codigo_disciplina] = ementa
+
+        if problemas:
+            self.ledger.record(response.request, 'partial', '; '.join(problemas))
+            self.crawler.stats.inc_value('ledger/partial')
+
+        if self.fingerprints is not None:
+            # uma ementa incompleta não substitui a anterior, se houver
+            previous = self._fallback_ementa(codigo_disciplina, nome_disciplina) if problemas else None
+            if previous is not None:
+                ementa = previous
+            else:
+                status = self.fingerprints.observe(ementa)
+                self.crawler.stats.inc_value(f'incremental/{status}')
+
+        for membership in self._memberships[codigo_disciplina]:
+            yield self._emit(ementa, membership)
@@ -0,0 +1,355 @@
+"""
+Servidor HTTP local que imita os endpoints do Janus usados pelo spider.
+
+O servidor gera um catálogo sintético e determinístico (mesma semente, mesmas
+páginas) de tamanho configurável, com a mesma marcação das páginas reais:
+
+    /janus/componente/disciplinasOferecidasInicial.jsf
+    /janus/CPGLista                                 (POST com tipo=T)
+    /janus/AreaListaPublico?codcpg=<comissão>&tipo=T&
+    /janus/TurmaLista?codcpg=<comissão>&codare=<área>&
+    /janus/Disciplina?sgldis=<sigla>&
+
+Cada resposta pode ser atrasada (latência média + jitter) e uma fração das respostas
+pode falhar com 500/503, para exercitar o retry e o autothrottle. Com o setting
+`JANUS_URL` apontando para o servidor, o spider roda de ponta a ponta sem acessar o
+site real (ver `scrapy standin` e `scrapy loadtest`).
+"""
+
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# Quantidade aproximada de disciplinas no Janus hoje
+DEFAULT_DISCIPLINAS = 2000
+
+_HEAD = (
+    '<html>\n<head><meta charset="utf-8">'
+    '<title>Janus - Sistema Administrativo da Pós-Graduação</title></head>\n<body>\n'
+)
+_TAIL = '</body>\n</html>\n'
+
+_WORDS = (
+    'análise', 'algoritmos', 'modelos', 'sistemas', 'teoria', 'métodos', 'dados',
+    'aprendizado', 'estatística', 'otimização', 'redes', 'computação', 'processos',
+    'equações', 'aplicações', 'estruturas', 'geometria', 'probabilidade', 'tópicos',
+    'introdução', 'avançados', 'numéricos', 'lineares', 'estocásticos', 'pesquisa',
+)
+_IDIOMAS = ('Português', 'Inglês', 'Espanhol')
+
+
+@dataclass(frozen=True)
+class Area:
+    codigo_comissao: str
+    codigo_programa: str
+    nome_programa: str
+    codigo: str
+    nome: str
+
+
+class SyntheticCatalogue:
+    def __init__(
+        self,
+        n_disciplinas: int = DEFAULT_DISCIPLINAS,
+        n_comissoes: int = 40,
+        programas_por_comissao: int = 3,
+        areas_por_programa: int = 2,
+        shared_fraction: float = 0.2,
+        malformed_rate: float = 0.01,
+        seed: int = 0,
+    ) -> None:
+        """
+        Catálogo sintético de comissões, programas, áreas e disciplinas.
+
+        Args:
+            n_disciplinas: Quantidade de siglas distintas.
+            n_comissoes: Quantidade de comissões de pós-graduação.
+            programas_por_comissao: Programas em cada comissão.
+            areas_por_programa: Áreas de concentração em cada programa.
+            shared_fraction: Fração das disciplinas oferecidas em uma segunda área.
+            malformed_rate: Fração das ementas sem carga horária e sem créditos.
+            seed: Semente do gerador, o catálogo é o mesmo para a mesma semente.
+        """
+        self.seed = seed
+        self.malformed_rate = malformed_rate
+        rng = random.Random(seed)
+
+        self.comissoes: dict[str, str] = {}
+        self.areas: dict[tuple[str, str], Area] = {}
+        self._areas_por_comissao: dict[str, list[Area]] = {}
+        for i in range(n_comissoes):
+            codigo_comissao = str(10 + i)
+            self.comissoes[codigo_comissao] = f'Instituto Sintético {i + 1}'
+            areas = self._areas_por_comissao.setdefault(codigo_comissao, [])
+            for p in range(programas_por_comissao):
+                codigo_programa = f'{codigo_comissao}{p:03d}'
+                nome_programa = f'Programa {self._title(rng)}'
+                for a in range(areas_por_programa):
+                    area = Area(
+                        codigo_comissao=codigo_comissao,
+                        codigo_programa=codigo_programa,
+                        nome_programa=nome_programa,
+                        codigo=f'{codigo_comissao}{p * areas_por_programa + a + 100}',
+                        nome=self._title(rng),
+                    )
+                    areas.append(area)
+                    self.areas[(codigo_comissao, area.codigo)] = area
+
+        # Sigla de 3 letras por comissão, e.g. 'QKD5012'
+        prefixes = {
+            codigo: ''.join(rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ') for _ in range(3))
+            for codigo in self.comissoes
+        }
+        all_areas = list(self.areas.values())
+
+        self.siglas: dict[str, tuple[int, str]] = {}
+        self.turmas: dict[tuple[str, str], list[str]] = {key: [] for key in self.areas}
+        numeros = dict.fromkeys(self.comissoes, 5000)
+        for i in range(n_disciplinas):
+            home = all_areas[i % len(all_areas)]
+            sigla = f'{prefixes[home.codigo_comissao]}{numeros[home.codigo_comissao]:04d}'
+            numeros[home.codigo_comissao] += 1
+            if sigla in self.siglas:
+                # Duas comissões sorteadas com o mesmo prefixo
+                sigla = f'{sigla}{i}'
+            self.siglas[sigla] = (i, self._title(rng))
+            self.turmas[(home.codigo_comissao, home.codigo)].append(sigla)
+
+            if rng.random() < shared_fraction:
+                other = rng.choice(all_areas)
+                if other != home:
+                    self.turmas[(other.codigo_comissao, other.codigo)].append(sigla)
+
+    @staticmethod
+    def _title(rng: random.Random) -> str:
+        return ' '.join(rng.sample(_WORDS, 3)).capitalize()
+
+    @property
+    def n_memberships(self) -> int:
+        """Quantidade de itens que um crawl completo deve emitir."""
+        return sum(len(siglas) for siglas in self.turmas.values())
+
+    @property
+    def n_pages(self) -> int:
+        """Quantidade de páginas que um crawl completo deve requisitar."""
+        return 2 + len(self.comissoes) + len(self.areas) + len(self.siglas)
+
+    def render_inicial(self) -> str:
+        return _HEAD + (
+            '<form id="form" method="post" action="/janus/CPGLista">\n'
+            '<input type="hidden" name="tipo" value="T">\n'
+            '<input type="submit" value="Buscar">\n'
+            '</form>\n'
+        ) + _TAIL
+
+    def render_cpg_lista(self) -> str:
+        rows = ''.join(
+            f'<tr>\n<td>{codigo}</td>\n'
+            f'<td><a href="AreaListaPublico?codcpg={codigo}&tipo=T">{nome}</a></td>\n</tr>\n'
+            for codigo, nome in self.comissoes.items()
+        )
+        return _HEAD + f'<table class="dataTable selecionavel">\n{rows}</table>\n' + _TAIL
+
+    def render_area_lista(self, codigo_comissao: str) -> str | None:
+        areas = self._areas_por_comissao.get(codigo_comissao)
+        if areas is None:
+            return None
+
+        programas: dict[tuple[str, str], list[Area]] = {}
+        for area in areas:
+            programas.setdefault((area.codigo_programa, area.nome_programa), []).append(area)
+
+        tables = ''
+        for (codigo_programa, nome_programa), areas_programa in programas.items():
+            rows = ''.join(
+                f'<tr><td><a href="TurmaLista?codcpg={codigo_comissao}&codare={area.codigo}">'
+                f'{area.codigo} - {area.nome}</a></td></tr>\n'
+                for area in areas_programa
+            )
+            tables += (
+                '<table class="dataTable selecionavel">\n'
+                f'<tr><th>{codigo_programa}</th><th>{nome_programa}</th></tr>\n{rows}</table>\n'
+            )
+        return _HEAD + tables + _TAIL
+
+    def render_turma_lista(self, codigo_comissao: str, codigo_area: str) -> str | None:
+        siglas = self.turmas.get((codigo_comissao, codigo_area))
+        if siglas is None:
+            return None
+
+        rows = ''.join(
+            f'<tr onclick="location.href=\'Disciplina?sgldis={sigla}\'">\n'
+            f'<td><font>{sigla}</font></td>\n'
+            f'<td><font>{self.siglas[sigla][1]}</font></td>\n'
+            f'<td><a href="Disciplina?sgldis={sigla}">Ementa</a></td>\n'
+            f'<td><a href="TurmaDisciplina?sgldis={sigla}">Turmas</a></td>\n</tr>\n'
+            for sigla in siglas
+        )
+        return _HEAD + (
+            '<table width="95%">\n'
+            '<tr><th>Sigla</th><th>Nome</th><th></th><th></th></tr>\n'
+            f'{rows}</table>\n'
+        ) + _TAIL
+
+    def render_disciplina(self, sigla: str) -> str | None:
+        if sigla not in self.siglas:
+            return None
+
+        # Gerador próprio por sigla: a página não depende da ordem das requisições
+        index, _ = self.siglas[sigla]
+        rng = random.Random(self.seed * 1_000_003 + index)
+        malformed = rng.random() < self.malformed_rate
+
+        def paragraph(n_words: int) -> str:
+            return ' '.join(rng.choice(_WORDS) for _ in range(n_words)).capitalize() + '.'
+
+        semanas = rng.choice((10, 12, 15))
+        teorica, pratica, estudo = rng.randint(1, 4), rng.randint(0, 2), rng.randint(2, 6)
+        creditos = '' if malformed else str((teorica + pratica + estudo) * semanas // 15)
+
+        html = (
+            '<div id="conteudo">\n'
+            f'<p class="info infopt"><strong>Criação:</strong> '
+            f'{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(2000, 2024)}</p>\n'
+            f'<p class="info infopt"><strong>Nr. de Créditos:</strong> {creditos}</p>\n'
+            '<p class="info infopt"><strong>Carga Horária:</strong></p>\n'
+        )
+        if not malformed:
+            total = (teorica + pratica + estudo) * semanas
+            cells = (teorica, pratica, estudo, f'{semanas} semanas', '-', f'{total} horas', '-')
+            html += (
+                '<table class="dataTable selecionavel">\n'
+                '<tr><th>Teórica<br>(por semana)</th><th>Prática<br>(por semana)</th>'
+                '<th>Estudos<br>(por semana)</th><th>Duração</th><th></th><th>Total</th>'
+                '<th></th></tr>\n'
+                '<tr>' + ''.join(f'<td>{cell}</td>' for cell in cells) + '</tr>\n</table>\n'
+            )
+
+        html += '<p class="info"><strong>Docentes Responsáveis:</strong></p>\n'
+        html += ''.join(
+            f'<p class="info">{rng.randint(1000000, 9999999)} - Docente {self._title(rng)}</p>\n'
+            for _ in range(rng.randint(1, 3))
+        )
+        for label, n_words in (
+            ('Objetivos:', 40),
+            ('Justificativa:', 30),
+            ('Conteúdo:', 120),
+            ('Forma de Avaliação:', 15),
+            ('Bibliografia:', 60),
+        ):
+            html += (
+                f'<p><strong>{label}</strong></p>\n'
+                f'<p class="campoTextoMantendoLinhas">{paragraph(n_words)}</p>\n'
+            )
+        idiomas = rng.sample(_IDIOMAS, rng.randint(1, 2))
+        html += '<p><strong>Idiomas ministrados:</strong></p>\n'
+        html += ''.join(f'<div>{idioma}</div>\n' for idioma in idiomas)
+        html += (
+            '<p><strong>Tipo de oferecimento da disciplina:</strong></p>\n'
+            '<p class="campoTextoMantendoLinhas">Presencial</p>\n</div>\n'
+        )
+        return _HEAD + html + _TAIL
+
+    def render(self, path: str, query: dict[str, str]) -> str | None:
+        """Página de um endpoint do Janus, ou None se não existir."""
+        endpoint = path.removeprefix('/janus/')
+        if endpoint == 'componente/disciplinasOferecidasInicial.jsf':
+            return self.render_inicial()
+        if endpoint == 'CPGLista':
+            return self.render_cpg_lista()
+        if endpoint == 'AreaListaPublico':
+            return self.render_area_lista(query.get('codcpg', ''))
+        if endpoint == 'TurmaLista':
+            return self.render_turma_lista(query.get('codcpg', ''), query.get('codare', ''))
+        if endpoint == 'Disciplina':
+            return self.render_disciplina(query.get('sgldis', ''))
+        return None
+
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        catalogue: SyntheticCatalogue,
+        host: str = '127.0.0.1',
+        port: int = 8765,
+        latency: float = 0.05,
+        jitter: float = 0.02,
+        error_rate: float = 0.0,
+    ) -> None:
+        """
+        Servidor com latência e erros injetáveis sobre um catálogo sintético.
+
+        Args:
+            catalogue: Catálogo servido.
+            latency: Atraso médio de cada resposta, em segundos.
+            jitter: Desvio padrão do atraso, em segundos.
+            error_rate: Fração das respostas que falham com 500 ou 503.
+        """
+        super().__init__((host, port), _StandinHandler)
+        self.catalogue = catalogue
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._rng = random.Random(catalogue.seed)
+        self._rng_lock = threading.Lock()
+
+    @property
+    def janus_url(self) -> str:
+        """Valor do setting `JANUS_URL` para crawlear este servidor."""
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/janus'
+
+    def draw(self) -> tuple[float, int | None]:
+        """Sorteia o atraso e o status de erro da próxima resposta (None se não falhar)."""
+        with self._rng_lock:
+            delay = max(0.0, self._rng.gauss(self.latency, self.jitter))
+            error = None
+            if self._rng.random() < self.error_rate:
+                error = self._rng.choice((500, 503))
+        return delay, error
+
+
+class _StandinHandler(BaseHTTPRequestHandler):
+    server: StandinServer
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self) -> None:
+        self._respond()
+
+    def do_POST(self) -> None:
+        # O form da página inicial só envia tipo=T, o corpo é descartado
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self._respond()
+
+    def _respond(self) -> None:
+        delay, error = self.server.draw()
+        time.sleep(delay)
+
+        if error is not None:
+            self._send(error, 'Erro simulado')
+            return
+
+        url = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        page = self.server.catalogue.render(url.path, query)
+        if page is None:
+            self._send(404, 'Página não encontrada')
+        else:
+            self._send(200, page)
+
+    def _send(self, status: int, body: str) -> None:
+        payload = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format: str, *args) -> None:
+        # Uma linha por requisição atrapalharia a saída do crawl
+        pass
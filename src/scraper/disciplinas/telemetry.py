@@ -0,0 +1,260 @@
+"""
+Telemetria do crawl: latência por callback, tamanho das respostas e séries temporais.
+
+O `CrawlTelemetry` é um spider middleware posicionado junto ao spider, então recebe a
+saída crua de cada callback e mede só o tempo gasto dentro dele. Para cada callback
+são mantidos histogramas de latência do callback, latência do download e tamanho das
+respostas. A cada `TELEMETRY_INTERVAL` segundos é registrada uma amostra com itens/s,
+páginas/s, profundidade da fila do scheduler, requisições em andamento e acertos do
+cache HTTP.
+
+Ao final do crawl o resumo é gravado em `<TELEMETRY_DIR>/<spider>-<início>.json` e as
+amostras em `<TELEMETRY_DIR>/<spider>-<início>.csv`.
+
+O `LogSampler` limita os logs por item do spider a um a cada `LOG_SAMPLE_EVERY`, para
+que formatar logs não pese no laço dos callbacks.
+"""
+
+import bisect
+import csv
+import json
+import math
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter, time
+from typing import Any
+
+from scrapy import Spider, signals
+from scrapy.exceptions import NotConfigured
+from scrapy.http import Response
+from twisted.internet import task
+
+# Limites superiores dos baldes dos histogramas, o último balde é aberto
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+SIZE_BUCKETS_BYTES = (1024, 4096, 16384, 65536, 262144, 1048576)
+
+SAMPLE_FIELDS = (
+    'elapsed_secs', 'responses', 'items', 'response_bytes', 'pages_per_sec',
+    'items_per_sec', 'queue_depth', 'in_flight', 'cache_hits', 'cache_misses',
+)
+
+
+@dataclass
+class Histogram:
+    """Histograma de baldes fixos, com contagem, soma e máximo exatos."""
+
+    bounds: tuple[float, ...]
+    counts: list[int] = field(default_factory=list)
+    total: int = 0
+    sum: float = 0.0
+    max: float = 0.0
+
+    def __post_init__(self) -> None:
+        self.counts = [0] * (len(self.bounds) + 1)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Limite superior do balde que contém o quantil `q` (entre 0 e 1)."""
+        if not self.total:
+            return 0.0
+        rank = math.ceil(q * self.total)
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> dict[str, Any]:
+        labels = [f'<={bound:g}' for bound in self.bounds] + [f'>{self.bounds[-1]:g}']
+        return {
+            'count': self.total,
+            'mean': self.sum / self.total if self.total else 0.0,
+            'p50': self.quantile(0.5),
+            'p90': self.quantile(0.9),
+            'p99': self.quantile(0.99),
+            'max': self.max,
+            'buckets': dict(zip(labels, self.counts)),
+        }
+
+
+class LogSampler:
+    def __init__(self, every: int) -> None:
+        """
+        Decide quais eventos de cada tipo são logados: o primeiro e um a cada `every`.
+
+        Args:
+            every: Intervalo de amostragem, 1 loga todos os eventos e 0 nenhum.
+        """
+        self._every = every
+        self._counts: Counter[str] = Counter()
+
+    def __call__(self, key: str) -> bool:
+        if not self._every:
+            return False
+        count = self._counts[key]
+        self._counts[key] = count + 1
+        return count % self._every == 0
+
+
+class CrawlTelemetry:
+    def __init__(self, crawler, report_dir: Path, interval: float) -> None:
+        """
+        Args:
+            crawler: Crawler do spider, fonte dos stats e do estado do engine.
+            report_dir: Diretório onde os relatórios JSON e CSV são gravados.
+            interval: Segundos entre duas amostras da série temporal.
+        """
+        self._crawler = crawler
+        self._stats = crawler.stats
+        self._report_dir = report_dir
+        self._interval = interval
+        self._callback_ms: dict[str, Histogram] = {}
+        self._download_ms: dict[str, Histogram] = {}
+        self._sizes: dict[str, Histogram] = {}
+        self._samples: list[dict[str, Any]] = []
+        self._task: task.LoopingCall | None = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool('TELEMETRY_ENABLED'):
+            raise NotConfigured
+        telemetry = cls(
+            crawler,
+            report_dir=Path(settings.get('TELEMETRY_DIR')),
+            interval=settings.getfloat('TELEMETRY_INTERVAL'),
+        )
+        crawler.signals.connect(telemetry.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(telemetry.spider_closed, signal=signals.spider_closed)
+        return telemetry
+
+    @staticmethod
+    def _callback_name(response: Response) -> str:
+        callback = response.request.callback if response.request else None
+        return getattr(callback, '__name__', 'parse')
+
+    def process_spider_input(self, response: Response, spider: Spider) -> None:
+        name = self._callback_name(response)
+        if name not in self._sizes:
+            self._sizes[name] = Histogram(SIZE_BUCKETS_BYTES)
+            self._download_ms[name] = Histogram(LATENCY_BUCKETS_MS)
+            self._callback_ms[name] = Histogram(LATENCY_BUCKETS_MS)
+        self._sizes[name].observe(len(response.body))
+        download_latency = response.meta.get('download_latency')
+        # Respostas vindas do cache HTTP ou do replay não passam pelo download
+        if download_latency is not None and 'cached' not in response.flags:
+            self._download_ms[name].observe(download_latency * 1000)
+
+    def process_spider_output(self, response: Response, result, spider: Spider):
+        # Só o tempo dentro do gerador do callback conta, não o dos consumidores
+        histogram = self._callback_ms.get(self._callback_name(response))
+        elapsed = 0.0
+        started = perf_counter()
+        try:
+            for output in result:
+                elapsed += perf_counter() - started
+                yield output
+                started = perf_counter()
+            elapsed += perf_counter() - started
+        finally:
+            if histogram is not None:
+                histogram.observe(elapsed * 1000)
+
+    async def process_spider_output_async(self, response: Response, result, spider: Spider):
+        histogram = self._callback_ms.get(self._callback_name(response))
+        elapsed = 0.0
+        started = perf_counter()
+        try:
+            async for output in result:
+                elapsed += perf_counter() - started
+                yield output
+                started = perf_counter()
+            elapsed += perf_counter() - started
+        finally:
+            if histogram is not None:
+                histogram.observe(elapsed * 1000)
+
+    def spider_opened(self, spider: Spider) -> None:
+        self._started_at = time()
+        self._previous = (self._started_at, 0, 0)
+        self._task = task.LoopingCall(self._sample)
+        self._task.start(self._interval, now=False)
+
+    def _sample(self) -> dict[str, Any]:
+        now = time()
+        responses = self._stats.get_value('response_received_count', 0)
+        items = self._stats.get_value('item_scraped_count', 0)
+        previous_at, previous_responses, previous_items = self._previous
+        window = max(now - previous_at, 1e-9)
+        self._previous = (now, responses, items)
+
+        engine = self._crawler.engine
+        downloader = getattr(engine, 'downloader', None)
+        sample = {
+            'elapsed_secs': round(now - self._started_at, 3),
+            'responses': responses,
+            'items': items,
+            'response_bytes': self._stats.get_value('downloader/response_bytes', 0),
+            'pages_per_sec': round((responses - previous_responses) / window, 3),
+            'items_per_sec': round((items - previous_items) / window, 3),
+            'queue_depth': (
+                self._stats.get_value('scheduler/enqueued', 0)
+                - self._stats.get_value('scheduler/dequeued', 0)
+            ),
+            'in_flight': len(downloader.active) if downloader is not None else 0,
+            'cache_hits': self._stats.get_value('httpcache/hit', 0),
+            'cache_misses': self._stats.get_value('httpcache/miss', 0),
+        }
+        self._samples.append(sample)
+        return sample
+
+    def spider_closed(self, spider: Spider, reason: str) -> None:
+        if self._task is not None and self._task.running:
+            self._task.stop()
+        last = self._sample()
+        elapsed = last['elapsed_secs']
+        lookups = last['cache_hits'] + last['cache_misses']
+
+        report = {
+            'spider': spider.name,
+            'reason': reason,
+            'started_at': datetime.fromtimestamp(self._started_at).isoformat(),
+            'elapsed_secs': elapsed,
+            'responses': last['responses'],
+            'items': last['items'],
+            'response_bytes': last['response_bytes'],
+            'pages_per_sec': last['responses'] / elapsed if elapsed else 0.0,
+            'items_per_sec': last['items'] / elapsed if elapsed else 0.0,
+            'cache_hit_ratio': last['cache_hits'] / lookups if lookups else None,
+            'max_queue_depth': max(sample['queue_depth'] for sample in self._samples),
+            'callbacks': {
+                name: {
+                    'callback_ms': self._callback_ms[name].to_dict(),
+                    'download_ms': self._download_ms[name].to_dict(),
+                    'response_bytes': self._sizes[name].to_dict(),
+                }
+                for name in sorted(self._sizes)
+            },
+        }
+
+        self._report_dir.mkdir(parents=True, exist_ok=True)
+        stem = f"{spider.name}-{datetime.fromtimestamp(self._started_at):%Y%m%dT%H%M%S}"
+        report_path = self._report_dir / f'{stem}.json'
+        report_path.write_text(
+            json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8'
+        )
+        with (self._report_dir / f'{stem}.csv').open('w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=SAMPLE_FIELDS)
+            writer.writeheader()
+            writer.writerows(self._samples)
+
+        self._stats.set_value('telemetry/report', str(report_path))